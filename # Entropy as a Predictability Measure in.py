@@ -29,7 +29,6 @@ Steps to compute:
 3. Entropy Calculation in RabbitAI
 
 import numpy as np
-from scipy.stats import entropy as shannon_entropy
 
 def calc_entropy(series: pd.Series, bins: str | int = "fd") -> float:
     """
@@ -39,7 +38,7 @@ def calc_entropy(series: pd.Series, bins: str | int = "fd") -> float:
         return 0.0
     p, _ = np.histogram(series, bins=bins, density=True)
     p = p[p > 0]  # drop zero-probability bins
-    return float(shannon_entropy(p, base=np.e))
+    return float(scipy_stats.entropy(p, base=np.e))   # scipy is imported on the first call
 
 	•	series: last 20 log-returns →
 
@@ -49,6 +48,10 @@ returns_20 = np.log(df["Close"]).diff().dropna().tail(20)
 	•	bins: "fd" (Freedman–Diaconis) by default.
 	•	output: entropy in nats.
 
+For research and E_ref calibration, ROLLING-ENTROPY.py computes Entropy20 for every bar of a history in one vectorised pass (strided windows, batched Freedman–Diaconis binning), matching calc_entropy per window:
+
+ent = entropy20_series(df["Close"])   # NaN for the first 20 bars
+
 ⸻
 
 4. Trading Signal Integration
@@ -1,22 +1,25 @@
 # Extracts features, computes confidence, and generates the core signal for each ticker.
 
-def analyze_ticker(symbol: str) -> Tuple[float, float, str, str, float, float, float, float]:
+def analyze_ticker(symbol: str, ctx: Optional["MarketContext"] = None) -> Tuple[float, float, str, str, float, float, float, float]:
     """
     Full AI/TA analysis for one ticker.
     Returns (confidence, probability).  Skips gracefully on bad feeds.
+    `ctx` is the sweep's MarketContext; a standalone call loads its own.
     """
     try:
-        global dynamic_weights, top_headline, charts, confidence_history
+        global charts, confidence_history
         sym = symbol
-        asset_cls = asset_class(sym)                # <-- NEW
-        rules = _rules_for(sym)                     # <-- NEW
-        print(f"   ↳ asset class = {asset_cls}")
-
         # ---------- ROUTING ----------
-        tv_sym, exchange, screener = tv_symbol_info(symbol)
+        with METRICS.span("routing"):
+            route = SYMBOL_ROUTES.get(sym)              # resolved once per symbol, see SYMBOL-ROUTING.py
+            asset_cls = route.asset_class
+            rules = route.rules
+            tv_sym, exchange, screener = route.tv_symbol, route.exchange, route.screener
 
-        print(f"\n📈 Analyzing ticker: {symbol}")
-        print(f"   ↳ routed to {tv_sym}@{exchange}/{screener}")
+        if DEBUG:
+            print(f"\n📈 Analyzing ticker: {symbol}")
+            print(f"   ↳ asset class = {asset_cls}")
+            print(f"   ↳ routed to {tv_sym}@{exchange}/{screener}")
 
         # ---------- TradingView TA -----------
         def safe_ta(sym, exch, scrn, ivl):
@@ -30,54 +33,62 @@ def analyze_ticker(symbol: str) -> Tuple[float, float, str, str, float, float, f
                 return None
 
         try:
-            tf_15m = get_ta(tv_sym, exchange, screener, TVI.INTERVAL_15_MINUTES)
-            tf_30m = get_ta(tv_sym, exchange, screener, TVI.INTERVAL_30_MINUTES)
-            tf_1h  = get_ta(tv_sym, exchange, screener, TVI.INTERVAL_1_HOUR)
-            tf_4h  = get_ta(tv_sym, exchange, screener, TVI.INTERVAL_4_HOURS)
+            tf_15m, tf_30m, tf_1h, tf_4h = fetch_timeframes(
+                tv_sym, exchange, screener,
+                LOCAL_TA_INTERVALS)     # TradingView's Interval values; no tradingview_ta import needed
         except RuntimeError as e:
-            print(f"⚠️ Skipping {symbol}: {e}")
+            _skip_symbol("ta_unavailable")
+            if DEBUG:
+                print(f"⚠️ Skipping {symbol}: {e}")
             return 0.0, 50.0, None, None, 0.0, 0.0, 0.0, 0.0
 
         # ---------- INDICATORS ----------
         indicators = {k: ensure_scalar(v) for k, v in tf_1h.indicators.items()}
-        print(f"   ↳ indicators pulled: {list(indicators)[:8]}…")
+        if DEBUG:
+            print(f"   ↳ indicators pulled: {list(indicators)[:8]}…")
 
         # ---------- PRICE FEED ----------
-        _epic_cache: Dict[str, str] = {}
-        def get_epic(sym):
-            if sym not in _epic_cache:
-                _epic_cache[sym] = lookup_epic(sym)
-            return _epic_cache[sym]
-
-        realtime_price = get_realtime_price(symbol, epic=get_epic(symbol))
+        with METRICS.span("realtime_price"), upstream_slot("capital"):
+            realtime_price = get_realtime_price(symbol, epic=route.epic)
         if realtime_price is None:
-            print(f"⚠️ Skipping {symbol}: real-time price unavailable.")
+            _skip_symbol("no_realtime_price")
+            if DEBUG:
+                print(f"⚠️ Skipping {symbol}: real-time price unavailable.")
             return 0.0, 50.0, None, None, 0.0, 0.0, 0.0, 0.0
 
         price = realtime_price
+        _scan_state.price = float(realtime_price)       # reported back in ScanResult for SIGNAL_HISTORY
         indicators["price"] = realtime_price
-        print(f"   ↳ real-time price = {realtime_price:.2f}")
+        if DEBUG:
+            print(f"   ↳ real-time price = {realtime_price:.2f}")
 
         # ---------- OHLCV ----------
-        ohlcv_df = fetch_ohlcv(symbol)
+        with METRICS.span("ohlcv"):
+            ohlcv_df = fetch_ohlcv(symbol)
         if ohlcv_df is None or ohlcv_df.empty:
-            print(f"⚠️ Skipping {symbol}: OHLCV feed missing.")
+            _skip_symbol("no_ohlcv")
+            if DEBUG:
+                print(f"⚠️ Skipping {symbol}: OHLCV feed missing.")
             return 0.0, 50.0, None, None, 0.0, 0.0, 0.0, 0.0
 
         # Compute EMA9 and EMA21 directly from real OHLCV data.
         if "Close" not in ohlcv_df.columns:
             raise ValueError("OHLCV does not contain 'Close' values; cannot compute EMAs.")
-        indicators["EMA9"] = ohlcv_df["Close"].ewm(span=9, adjust=False).mean().iloc[-1].item()
-        indicators["EMA21"] = ohlcv_df["Close"].ewm(span=21, adjust=False).mean().iloc[-1].item()
-
-        if "ADX" not in indicators or not indicators["ADX"]: 
-            adx_calc = calculate_adx(ohlcv_df) 
-            if hasattr(adx_calc, "iloc"): 
-                adx_calc = adx_calc.iloc[-1] 
-            indicators["ADX"] = float(adx_calc)  # Ensure ADX is a scalar float
-            print(f" ↳ ADX computed locally = {adx_calc:.1f}")
-
-        vbp_stats = calc_vbp(ohlcv_df, bins=20)
+        with METRICS.span("indicators"):
+            indicators["EMA9"] = ohlcv_df["Close"].ewm(span=9, adjust=False).mean().iloc[-1].item()
+            indicators["EMA21"] = ohlcv_df["Close"].ewm(span=21, adjust=False).mean().iloc[-1].item()
+
+            if "ADX" not in indicators or not indicators["ADX"]: 
+                adx_calc = calculate_adx(ohlcv_df) 
+                if hasattr(adx_calc, "iloc"): 
+                    adx_calc = adx_calc.iloc[-1] 
+                indicators["ADX"] = float(adx_calc)  # Ensure ADX is a scalar float
+                METRICS.inc("local_adx_total")
+                if DEBUG:
+                    print(f" ↳ ADX computed locally = {adx_calc:.1f}")
+
+        with METRICS.span("vbp"):
+            vbp_stats = VBP_INDEX.sync(symbol, ohlcv_df)     # incremental calc_vbp(ohlcv_df, bins=20)
         indicators.update(vbp_stats)  
 
         latest_volume = int(ensure_scalar(ohlcv_df['Volume'].iloc[-1]))  # use most recent bar
@@ -87,11 +98,30 @@ def analyze_ticker(symbol: str) -> Tuple[float, float, str, str, float, float, f
         atr = to_scalar(indicators.get("ATR", price * 0.01))
         if 'ATR' not in indicators or not indicators["ATR"]:
             indicators["ATR"] = atr
-        print(f"ATR for {symbol}: {atr}")
-
-        # --- Log indicator data into rl_trainingsheet.csv for RL retraining ---
+        if DEBUG:
+            print(f"ATR for {symbol}: {atr}")
+
+        # --- Sweep-wide context, and Stoch RSI from the frame already held ---
+        if ctx is None:
+            ctx = load_market_context([symbol])
+        indicators["vix"] = ctx.vix
+        top_headline = ctx.top_headline
+        dynamic_weights = dict(ctx.weights)                 # the sweep's snapshot, not the live global
+        sentiment_score = ctx.sentiment_for(symbol)         # ΔC_sent input, 0–100
+        if not indicators.get("Stoch.RSI"):
+            rsi_series = compute_rsi(ohlcv_df["Close"], window=14)
+            indicators["Stoch.RSI"] = to_scalar(compute_stoch_rsi(rsi_series, window=14))
+
+        # --- Log indicator data into the feature log for RL retraining ---
+        # TF votes and the raw vote decision are logged so the weight learner
+        # can rebuild calculate_trade_probability()'s exact feature vector.
+        # A tied vote has no direction and is logged "neutral"; the learner
+        # and the labeller leave those rows out.
+        tf_votes = [tf.summary.get("RECOMMENDATION", "N/A") for tf in (tf_15m, tf_30m, tf_1h, tf_4h)]
+        tf_buys, tf_sells, tf_n = (float(x[0]) for x in tf_vote_counts([tf_votes]))
         data_row = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
+            "symbol": symbol,
             "price": parse_number(indicators.get("price", 0)),
             "SMA50": parse_number(indicators.get("SMA50", 0)),
             "SMA200": parse_number(indicators.get("SMA200", 0)),
@@ -107,27 +137,25 @@ def analyze_ticker(symbol: str) -> Tuple[float, float, str, str, float, float, f
             "BB.lower": parse_number(indicators.get("BB.lower", 0)),
             "volume": parse_number(indicators.get("volume", 0)),
             "vix": parse_number(indicators.get("vix", 0)),
-            "success": 0
+            "ADX": parse_number(indicators.get("ADX", 0)),
+            "tf_buys": tf_buys,
+            "tf_sells": tf_sells,
+            "tf_votes": tf_n,
+            "direction": "bullish" if tf_buys > tf_sells else "bearish" if tf_sells > tf_buys else "neutral",
+            "success": 0                     # placeholder; OUTCOME_LABELLER writes the real label
         }
 
-        print(f"Logging data for {symbol} into rl_trainingsheet.csv...")
-        csv_path = Path("rl_trainingsheet.csv")
-        is_new_file = not csv_path.exists()
-        with open(csv_path, mode="a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=list(data_row.keys()))
-            if is_new_file:
-                writer.writeheader()
-            writer.writerow(data_row)
-            print(f"✅ Successfully appended data for {symbol} to rl_trainingsheet.csv")
-
         multi_summary = f"15m: {tf_15m.summary.get('RECOMMENDATION', 'N/A')}, 30m: {tf_30m.summary.get('RECOMMENDATION', 'N/A')}, 1H: {tf_1h.summary.get('RECOMMENDATION', 'N/A')}, 4H: {tf_4h.summary.get('RECOMMENDATION', 'N/A')}"
-        print(f"Multi-timeframe summary for {symbol}: {multi_summary}")
+        if DEBUG:
+            print(f"Multi-timeframe summary for {symbol}: {multi_summary}")
         
         if not all([
             realtime_price,
             ohlcv_df is not None and not ohlcv_df.empty
         ]):
-            print(f"⚠️ Missing data for {symbol}. Skipping analysis.")
+            _skip_symbol("missing_data")
+            if DEBUG:
+                print(f"⚠️ Missing data for {symbol}. Skipping analysis.")
             return confidence, 50  
 
         sma_50 = float(indicators.get("SMA50", 0))
@@ -146,9 +174,17 @@ def analyze_ticker(symbol: str) -> Tuple[float, float, str, str, float, float, f
 
         # --- ENTROPY (20‑bar rolling) ---------------------------------------
         # log‑returns → last 20 bars → Shannon entropy
-        returns_20 = np.log(ohlcv_df["Close"]).diff().dropna().tail(20)
-        ent_20     = calc_entropy(returns_20)        # nats
+        with METRICS.span("entropy"):
+            returns_20 = np.log(ohlcv_df["Close"]).diff().dropna().tail(20)
+            ent_20     = calc_entropy(returns_20)        # nats
         indicators["Entropy20"] = ent_20
-        print(f"Entropy(20) for {symbol}: {ent_20:.3f} nats")
+        if DEBUG:
+            print(f"Entropy(20) for {symbol}: {ent_20:.3f} nats")
+
+        data_row["Entropy20"] = ent_20
+        with METRICS.span("feature_log"):
+            FEATURE_LOG.append(data_row)
+        if DEBUG:
+            print(f"✅ Queued feature row for {symbol} (flushed in batches to {FEATURE_LOG.root}/)")
 
         .......
\ No newline at end of file
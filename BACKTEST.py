@@ -0,0 +1,254 @@
+# Offline replay of the analyze_ticker confidence pipeline over stored OHLCV history, all bars at once.
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@dataclass
+class BacktestParams:
+    """
+    Gate thresholds and confidence terms of the live pipeline (README §3),
+    plus the simulated exit.  Defaults follow the documented values.
+    """
+    e_ref: float = 2.0                  # entropy reference for the asset class (1.60 … 2.30)
+    entropy_weight: float = 0.13
+    momentum_weight: float = 0.20
+    rsi_band: Tuple[float, float] = (30.0, 70.0)
+    tf_weight: float = 0.19
+    tf_multiples: Tuple[int, ...] = (1, 2, 4, 16)   # 15m base → 15m / 30m / 1h / 4h votes
+    abort_on_tf_split: bool = True      # 3-vs-1 TF mismatch aborts
+    sentiment: float = 50.0             # no client positions offline: neutral
+    sentiment_weight: float = 0.15
+    vbp_window: int = 120
+    vbp_bins: int = 20
+    hvn_quantile: float = 0.7
+    zone_buffer: float = 0.005
+    prob_threshold: float = 60.0        # TP-probability bump when P ≥ threshold
+    prob_bump: float = 0.05
+    llm: str = "none"                   # "none" or "stub" (StubMetaBackend's EMA/MACD rule)
+    llm_weight: float = 0.20
+    weights: Optional[Dict[str, float]] = None
+    bias: float = 0.1
+    entry_conf: float = 0.30            # |tech_conf| needed to open a simulated trade
+    tp_atr: float = 2.0
+    sl_atr: float = 1.0
+    horizon: int = 48                   # bars before an open trade times out
+    warmup: int = 200                   # bars before SMA200 exists; never traded
+
+
+def _tf_votes(close: np.ndarray, multiples: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (buys, sells) per bar from EMA9/21 + MACD votes on each higher timeframe,
+    using only the last *completed* higher-TF bar so nothing looks ahead.
+    """
+    n = len(close)
+    buys, sells = np.zeros(n), np.zeros(n)
+    for k in multiples:
+        ck = close[k - 1::k]
+        if len(ck) == 0:
+            continue
+        fast, slow = _ema_arr(ck, 9), _ema_arr(ck, 21)
+        macd = _ema_arr(ck, 12) - _ema_arr(ck, 26)
+        sig = _ema_arr(macd, 9)
+        up = (fast > slow) & (macd > sig)
+        dn = (fast < slow) & (macd < sig)
+        done = (np.arange(n) + 1) // k - 1          # last completed block per bar
+        ok = done >= 0
+        buys[ok] += up[done[ok]]
+        sells[ok] += dn[done[ok]]
+    return buys, sells
+
+
+def _rolling_hvn(close: np.ndarray, volume: np.ndarray, window: int, bins: int, q: float,
+                 chunk: int = 20_000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Volume-by-price over each trailing `window` of closes: (poc, hvn_low,
+    hvn_high) per bar.  The HVN band spans the bins holding at least the
+    q-quantile of bin volume, the same zone calc_vbp() reports as
+    "hvn_band".
+    """
+    n = len(close)
+    poc, lo_band, hi_band = (np.full(n, np.nan) for _ in range(3))
+    if n < window:
+        return poc, lo_band, hi_band
+    cw, vw = sliding_window_view(close, window), sliding_window_view(volume, window)
+    for s in range(0, len(cw), chunk):
+        c, v = cw[s:s + chunk], vw[s:s + chunk]
+        m = len(c)
+        lo, hi = c.min(axis=1, keepdims=True), c.max(axis=1, keepdims=True)
+        span = np.where(hi > lo, hi - lo, 1.0)
+        idx = np.clip(((c - lo) / span * bins).astype(np.int64), 0, bins - 1)
+        flat = (idx + np.arange(m)[:, None] * bins).ravel()
+        prof = np.bincount(flat, weights=v.ravel(), minlength=m * bins).reshape(m, bins)
+        step = span[:, 0] / bins
+        heavy = prof >= np.quantile(prof, q, axis=1, keepdims=True)
+        first = heavy.argmax(axis=1)
+        last = bins - 1 - heavy[:, ::-1].argmax(axis=1)
+        at = slice(window - 1 + s, window - 1 + s + m)
+        poc[at] = lo[:, 0] + (prof.argmax(axis=1) + 0.5) * step
+        lo_band[at] = lo[:, 0] + first * step
+        hi_band[at] = lo[:, 0] + (last + 1) * step
+    return poc, lo_band, hi_band
+
+
+def _first_touch(high: np.ndarray, low: np.ndarray, side: np.ndarray, tp: np.ndarray,
+                 sl: np.ndarray, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulated exit for a trade opened at every bar's close: outcome +1 (TP),
+    -1 (SL), 0 (timed out) or NaN (history ends first), and bars held.  A
+    bar that spans both levels counts as SL.
+    """
+    n = len(high)
+    outcome, held = np.zeros(n), np.full(n, float(horizon))
+    if n <= 1:
+        return outcome, held
+    pad = np.full(horizon, np.nan)
+    fh = sliding_window_view(np.r_[high[1:], pad], horizon)[:n - 1]
+    fl = sliding_window_view(np.r_[low[1:], pad], horizon)[:n - 1]
+    s = side[:n - 1, None]
+    tp_, sl_ = tp[:n - 1, None], sl[:n - 1, None]
+    hit_tp = np.where(s > 0, fh >= tp_, fl <= tp_)
+    hit_sl = np.where(s > 0, fl <= sl_, fh >= sl_)
+    never = horizon + 1
+    t_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), never)
+    t_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), never)
+    out = np.where(t_sl <= t_tp, np.where(t_sl < never, -1.0, 0.0), 1.0)
+    outcome[:n - 1] = out
+    held[:n - 1] = np.minimum(np.minimum(t_tp, t_sl) + 1, horizon)
+    # Unresolved trades without a full horizon of future bars are censored, not timeouts.
+    outcome[(outcome == 0) & (np.arange(n) + horizon >= n)] = np.nan
+    return outcome, held
+
+
+def backtest_frame(df: pd.DataFrame, params: Optional[BacktestParams] = None) -> pd.DataFrame:
+    """
+    Replay one symbol's OHLCV history.  Returns one row per bar with the
+    indicators, the probability, every confidence term, the gates, the
+    final `tech_conf` and the simulated trade outcome.
+
+    Indicators come from indicator_arrays(), Entropy20 from
+    entropy20_series(), and probabilities from
+    calculate_trade_probability_batch().  These are the same definitions
+    analyze_ticker() uses on its latest bar.
+    """
+    p = params or BacktestParams()
+    col = lambda name: df[name].to_numpy(dtype=np.float64).reshape(-1)
+    high, low, close, volume = col("High"), col("Low"), col("Close"), col("Volume")
+    ind = indicator_arrays(high, low, close, volume)
+    ind["Entropy20"] = entropy20_series(close).to_numpy()
+
+    buys, sells = _tf_votes(close, p.tf_multiples)
+    n_votes = np.full(len(close), float(len(p.tf_multiples)))
+    bullish = buys > sells
+    direction = np.where(bullish, 1, -1)
+    probability = calculate_trade_probability_batch(ind, direction, buys, sells, n_votes, p.weights, p.bias)
+
+    ema_up = (ind["EMA9"] > ind["EMA21"]) & (ind["MACD.macd"] > ind["MACD.signal"])
+    ema_dn = (ind["EMA9"] < ind["EMA21"]) & (ind["MACD.macd"] < ind["MACD.signal"])
+    momentum = p.momentum_weight * (ema_up.astype(float) - ema_dn)
+
+    terms = {
+        "c_entropy": np.nan_to_num((p.e_ref - ind["Entropy20"]) / p.e_ref * p.entropy_weight),
+        "c_momentum": momentum,
+        "c_tf": p.tf_weight * (buys - sells),
+        "c_sentiment": np.full(len(close), p.sentiment_weight * (p.sentiment - 50) / 50),
+    }
+
+    poc, demand_z, supply_z = _rolling_hvn(close, volume, p.vbp_window, p.vbp_bins, p.hvn_quantile)
+    near_demand = close <= demand_z * (1 + p.zone_buffer)
+    near_supply = close >= supply_z * (1 - p.zone_buffer)
+    terms["c_zone"] = np.where(bullish, np.where(near_demand, 0.10, np.where(near_supply, -0.05, 0.0)),
+                               np.where(near_supply, -0.10, np.where(near_demand, 0.05, 0.0)))
+
+    pre = sum(terms.values())
+    terms["c_probability"] = np.where(probability >= p.prob_threshold, p.prob_bump * np.sign(pre), 0.0)
+    terms["c_llm"] = (momentum / p.momentum_weight * p.llm_weight if p.llm == "stub"
+                      else np.zeros(len(close)))
+    tech_conf = np.clip(sum(terms.values()), -1.0, 1.0)
+
+    rsi_ok = (ind["RSI"] >= p.rsi_band[0]) & (ind["RSI"] <= p.rsi_band[1])
+    tf_split = ((buys == 3) & (sells == 1)) | ((buys == 1) & (sells == 3))
+    tradable = rsi_ok & ~(p.abort_on_tf_split & tf_split) & np.isfinite(ind["ATR"])
+    tradable[:p.warmup] = False
+
+    side = np.where(tradable & (np.abs(tech_conf) >= p.entry_conf), np.sign(tech_conf), 0.0)
+    atr = np.nan_to_num(ind["ATR"])
+    tp = close + side * p.tp_atr * atr
+    sl = close - side * p.sl_atr * atr
+    outcome, held = _first_touch(high, low, side, tp, sl, p.horizon)
+    outcome[side == 0] = np.nan
+    r_multiple = np.where(outcome > 0, p.tp_atr / p.sl_atr, np.where(outcome < 0, -1.0, 0.0))
+    r_multiple[np.isnan(outcome)] = np.nan
+
+    out = pd.DataFrame(ind, index=df.index)
+    out["poc"], out["hvn_low"], out["hvn_high"] = poc, demand_z, supply_z
+    out["tf_buys"], out["tf_sells"] = buys, sells
+    out["direction"] = np.where(bullish, "bullish", "bearish")
+    out["probability"] = probability
+    for k, v in terms.items():
+        out[k] = v
+    out["tech_conf"] = tech_conf
+    out["tradable"] = tradable
+    out["side"] = side
+    out["outcome"] = outcome
+    out["bars_held"] = np.where(side != 0, held, np.nan)
+    out["r_multiple"] = r_multiple
+    return out
+
+
+def summarise_backtest(symbol: str, bars: pd.DataFrame) -> dict:
+    """Per-symbol trade statistics; censored trades count as signals only."""
+    trades = bars[bars["side"] != 0]
+    done = trades[trades["outcome"].notna()]
+    n = len(done)
+    return {
+        "symbol": symbol,
+        "bars": len(bars),
+        "signals": len(trades),
+        "trades": n,
+        "win_rate": float((done["outcome"] > 0).mean()) if n else np.nan,
+        "timeouts": int((done["outcome"] == 0).sum()),
+        "mean_r": float(done["r_multiple"].mean()) if n else np.nan,
+        "total_r": float(done["r_multiple"].sum()),
+        "mean_probability": float(done["probability"].mean()) if n else np.nan,
+        "mean_abs_conf": float(done["tech_conf"].abs().mean()) if n else np.nan,
+    }
+
+
+def _backtest_job(job) -> Tuple[dict, Optional[pd.DataFrame]]:
+    symbol, source, params, interval, store_root, keep_bars = job
+    df = source if isinstance(source, pd.DataFrame) else BarStore(store_root, offline=True).load(source, interval)
+    if df is None or df.empty:
+        return {"symbol": symbol, "bars": 0, "signals": 0, "trades": 0}, None
+    bars = backtest_frame(df, params)
+    return summarise_backtest(symbol, bars), (bars if keep_bars else None)
+
+
+def run_backtest(universe, params: Optional[BacktestParams] = None, interval: str = "15m",
+                 store_root: str = "bar_store", processes: int = 0,
+                 keep_bars: bool = False) -> Tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Backtest many symbols.
+
+    `universe` maps symbol → OHLCV DataFrame, or symbol → bar-store ticker.
+    A plain list of tickers is read from the store as is.  Tickers are
+    loaded inside the worker, so only results cross process boundaries.
+    With `processes` > 0 the symbols are split across a process pool.
+
+    Returns a per-symbol summary frame and, with `keep_bars`, the per-bar
+    frames keyed by symbol.
+    """
+    if not isinstance(universe, dict):
+        universe = {t: t for t in universe}
+    jobs = [(sym, src, params, interval, store_root, keep_bars) for sym, src in universe.items()]
+    if processes:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_backtest_job, jobs, chunksize=max(1, len(jobs) // (4 * processes))))
+    else:
+        results = [_backtest_job(j) for j in jobs]
+
+    summary = pd.DataFrame([s for s, _ in results]).set_index("symbol")
+    bars = {s["symbol"]: b for s, b in results if b is not None}
+    return summary, bars
@@ -0,0 +1,215 @@
+# Local OHLCV bar store: one set of memory-mapped column files per (ticker, interval),
+# refreshed by downloading only the bars after the last stored timestamp.
+
+import os
+import shutil
+import threading
+import time
+from urllib.parse import quote
+
+_BAR_COLUMNS = ("Open", "High", "Low", "Close", "Adj close", "Volume")
+
+# Bar length per Yahoo interval; a key is refreshed at most once per bar.
+_INTERVAL_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "60m": 3600, "4h": 14400, "1d": 86400,
+}
+
+
+class BarStore:
+    """
+    Columnar bar cache on disk.
+
+    Layout: <root>/<interval>/<ticker>/<generation>/{ts,Open,…}.npy plus a
+    CURRENT file naming the live generation.  Writers build a new generation
+    and swap CURRENT with os.replace, so readers always see a consistent set
+    of columns without locking.  Reads are memory-mapped.
+
+    Set `offline=True` (or RABIT_OFFLINE=1) to never touch the network:
+    scans then run purely from what is on disk, which makes them reproducible.
+    """
+
+    def __init__(self, root: str = "bar_store", max_bars: int = 20000, offline: bool = False):
+        self.root = Path(root)
+        self.max_bars = max_bars
+        self.offline = offline or os.getenv("RABIT_OFFLINE") == "1"
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._refreshed_at: Dict[Tuple[str, str], float] = {}
+
+    # ---------- paths / locking ----------
+    def _key_dir(self, ticker: str, interval: str) -> Path:
+        return self.root / interval / quote(ticker, safe="")
+
+    def _lock(self, ticker: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    # ---------- read ----------
+    def load(self, ticker: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        Return every stored bar for the key as a DataFrame, or None.
+        Columns are read-only memory maps until pandas copies them.
+        """
+        key_dir = self._key_dir(ticker, interval)
+        for _ in range(2):  # retry once if a writer retired our generation mid-read
+            try:
+                gen = (key_dir / "CURRENT").read_text().strip()
+                gen_dir = key_dir / gen
+                ts = np.load(gen_dir / "ts.npy", mmap_mode="r")
+                cols = {c: np.load(gen_dir / f"{quote(c)}.npy", mmap_mode="r")
+                        for c in _BAR_COLUMNS if (gen_dir / f"{quote(c)}.npy").exists()}
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            return None
+        if len(ts) == 0:
+            return None
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(ts), unit="ns", utc=True), name="Datetime")
+        return pd.DataFrame(cols, index=index)
+
+    def last_timestamp(self, ticker: str, interval: str) -> Optional[pd.Timestamp]:
+        df = self.load(ticker, interval)
+        return None if df is None else df.index[-1]
+
+    def read(self, ticker: str, interval: str, period: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Refresh the key if its newest bar may have closed, then return the
+        stored bars trimmed to `period` (e.g. "5d", counted in sessions).
+        """
+        if not self.offline and self._stale(ticker, interval):
+            try:
+                self.refresh(ticker, interval)
+            except Exception as e:
+                logging.info(f"bar store refresh failed for {ticker}/{interval}: {e}")
+        df = self.load(ticker, interval)
+        if df is None:
+            return None
+        return _trim_period(df, period) if period else df
+
+    def _stale(self, ticker: str, interval: str) -> bool:
+        last = self._refreshed_at.get((ticker, interval))
+        return last is None or time.time() - last >= _INTERVAL_SECONDS.get(interval, 3600)
+
+    # ---------- write ----------
+    def append(self, ticker: str, interval: str, new: pd.DataFrame) -> int:
+        """
+        Merge freshly downloaded bars into the key.  Stored bars at or after
+        the first new timestamp are replaced, because the last stored bar is
+        usually still forming.  Returns the number of bars stored.
+        """
+        new = _normalise_bars(new)
+        with self._lock(ticker, interval):
+            old = self.load(ticker, interval)
+            if old is not None and not new.empty:
+                old = old[old.index < new.index[0]]
+            merged = new if old is None else pd.concat([old, new])
+            merged = merged[~merged.index.duplicated(keep="last")].tail(self.max_bars)
+            self._write(ticker, interval, merged)
+            self._refreshed_at[(ticker, interval)] = time.time()
+            return len(merged)
+
+    def _write(self, ticker: str, interval: str, df: pd.DataFrame) -> None:
+        key_dir = self._key_dir(ticker, interval)
+        key_dir.mkdir(parents=True, exist_ok=True)
+        gen = f"{time.time_ns():x}"
+        gen_dir = key_dir / gen
+        gen_dir.mkdir()
+        np.save(gen_dir / "ts.npy", df.index.as_unit("ns").asi8)
+        for c in df.columns:
+            np.save(gen_dir / f"{quote(c)}.npy", df[c].to_numpy(dtype=np.float64))
+        tmp = key_dir / f"CURRENT.{gen}"
+        tmp.write_text(gen)
+        os.replace(tmp, key_dir / "CURRENT")
+        for old in key_dir.iterdir():
+            if old.is_dir() and old.name != gen:
+                shutil.rmtree(old, ignore_errors=True)
+
+    # ---------- refresh ----------
+    def refresh(self, ticker: str, interval: str, period: str = "60d") -> int:
+        """
+        Download only the bars from the last stored timestamp onward (or the
+        full `period` on a cold key, or one last refreshed longer ago than
+        that) and append them.
+        """
+        last = self._resume_from(ticker, interval, period)
+        kwargs = {"period": period} if last is None else {"start": last.to_pydatetime()}
+        with upstream_slot("yahoo"):
+            df = yf.download(ticker, interval=interval, progress=False, auto_adjust=False, **kwargs)
+        if df is None or df.empty:
+            self._refreshed_at[(ticker, interval)] = time.time()
+            return 0
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.droplevel(1, axis=1)  # (Price, Ticker) → Price
+        return self.append(ticker, interval, df.rename(columns=str.capitalize))
+
+    def _resume_from(self, ticker: str, interval: str, period: str) -> Optional[pd.Timestamp]:
+        """
+        The last stored bar to download on from, or None to fetch the full
+        `period` ("Nd"): Yahoo rejects intraday starts further back than
+        that, so a key that old is treated as cold.
+        """
+        last = self.last_timestamp(ticker, interval)
+        if last is None or last < _period_start(period):
+            return None
+        return last
+
+    def refresh_many(self, tickers: List[str], intervals, period: str = "60d") -> int:
+        """
+        Refresh many keys with one multi-ticker download per interval and
+        start date.  Cold tickers get the full `period`; warm ones are
+        grouped by the day of their last stored bar, so one ticker that
+        fell behind does not make the others re-download from its start.
+        """
+        updated = 0
+        for interval in intervals:
+            cold, warm_start = [], {}
+            for t in dict.fromkeys(tickers):
+                last = self._resume_from(t, interval, period)
+                if last is None:
+                    cold.append(t)
+                else:
+                    warm_start[t] = last
+            frames = fetch_ohlcv_bulk(cold, (interval,), period=period) if cold else {}
+            by_day: Dict[pd.Timestamp, List[str]] = {}
+            for t, last in warm_start.items():
+                by_day.setdefault(last.normalize(), []).append(t)
+            oldest = _period_start(period)
+            for day, group in sorted(by_day.items()):
+                start = max(day, oldest).to_pydatetime()
+                frames.update(fetch_ohlcv_bulk(group, (interval,), start=start))
+            for (t, ivl), df in frames.items():
+                df = _normalise_bars(df)
+                if t in warm_start:
+                    df = df[df.index >= warm_start[t]]
+                self.append(t, ivl, df)
+                updated += 1
+        return updated
+
+
+def _normalise_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flat float64 OHLCV columns on a UTC DatetimeIndex, sorted, no empty rows.
+    """
+    df = df[[c for c in _BAR_COLUMNS if c in df.columns]].astype(np.float64)
+    idx = pd.DatetimeIndex(df.index)
+    df.index = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    return df.dropna(how="all").sort_index()
+
+
+def _period_start(period: str) -> pd.Timestamp:
+    """The oldest time a Yahoo-style "Nd" period reaches back to from now."""
+    return pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=int(period.rstrip("d")))
+
+
+def _trim_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Keep the last N sessions of a frame for a Yahoo-style "Nd" period.
+    """
+    days = int(period.rstrip("d"))
+    sessions = df.index.normalize().unique()
+    return df[df.index.normalize() >= sessions[-min(days, len(sessions))]]
+
+
+BAR_STORE = BarStore()
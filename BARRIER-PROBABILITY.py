@@ -0,0 +1,202 @@
+# Batch TP-before-SL probabilities: drifted two-barrier closed form, ATR discount, Monte Carlo check and calibration.
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _hit_upper_first(a, b, k):
+    """
+    P(a Brownian motion with drift hits +a before -b), with k = 2·μ/σ²:
+
+        P = (1 - e^{k·b}) / (e^{-k·a} - e^{k·b}) = expm1(-k·b) / expm1(-k·(a+b))
+
+    Evaluated without overflow for either sign of k.  The k → 0 limit is
+    b / (a + b), the whitepaper's driftless formula.
+    """
+    a, b, k = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (a, b, k)))
+    driftless = b / (a + b)
+    x, y = -k * b, -k * (a + b)
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        pos = np.expm1(x) / np.expm1(y)                                   # k > 0: x, y ≤ 0
+        neg = np.exp(x - y) * np.expm1(-x) / np.expm1(-y)                 # k < 0: x, y ≥ 0
+    p = np.where(k > 0, pos, neg)
+    return np.where(np.abs(y) < 1e-9, driftless, p)
+
+
+def _atr_discount(entry, atr, expected_atr, sharpness):
+    """The whitepaper's exp(-(atr/entry - expected_atr)·sharpness·10) above expected_atr, else 1."""
+    ratio = np.asarray(atr, dtype=np.float64) / np.asarray(entry, dtype=np.float64)
+    return np.where(ratio > expected_atr, np.exp(-(ratio - expected_atr) * sharpness * 10), 1.0)
+
+
+def tp_sl_probability_batch(entry, sl, tp, atr, direction, drift=0.0, sigma=None,
+                            expected_atr: float = 0.01, sharpness: float = 1.0,
+                            decimals: Optional[int] = 2) -> np.ndarray:
+    """
+    calculate_tp_sl_probability() over arrays of trades (broadcast together).
+
+    `direction` is "bullish"/"bearish" (or +1/-1).  `drift` is the expected
+    price change per bar and `sigma` the per-bar price std (default: ATR).
+    Drift in the trade's direction raises the TP odds and drift against it
+    lowers them.  With drift=0 this is risk / (risk + reward) times the ATR
+    discount, exactly the scalar function.  Returns percent, rounded to
+    `decimals` (None for unrounded).
+    """
+    entry = np.asarray(entry, dtype=np.float64)
+    d = np.asarray(direction)
+    side = np.where(d == "bearish", -1.0, 1.0) if d.dtype.kind in "OUS" else np.sign(d).astype(np.float64)
+    risk = np.abs(entry - np.asarray(sl, dtype=np.float64))
+    reward = np.abs(np.asarray(tp, dtype=np.float64) - entry)
+    sigma = np.asarray(atr if sigma is None else sigma, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(sigma > 0, 2.0 * side * np.asarray(drift, dtype=np.float64) / sigma ** 2, 0.0)
+    p = _hit_upper_first(reward, risk, k) * _atr_discount(entry, atr, expected_atr, sharpness)
+    p = np.clip(p * 100, 0.0, 100.0)
+    return p if decimals is None else np.round(p, decimals)
+
+
+def tp_sl_grid(entry, atr, direction, sl_mults, tp_mults, drift=0.0, sigma=None,
+               expected_atr: float = 0.01, sharpness: float = 1.0) -> Dict[str, np.ndarray]:
+    """
+    Score every (SL, TP) pair of ATR multiples for every entry at once.
+
+    Returns arrays shaped (entries, len(sl_mults), len(tp_mults)):
+    "probability" (percent, unrounded), "sl", "tp" and "expected_r", the
+    expected R multiple p·(reward/risk) - (1 - p).
+    """
+    entry = np.atleast_1d(np.asarray(entry, dtype=np.float64))[:, None, None]
+    atr_ = np.atleast_1d(np.asarray(atr, dtype=np.float64))[:, None, None]
+    d = np.atleast_1d(np.asarray(direction))
+    side = (np.where(d == "bearish", -1.0, 1.0) if d.dtype.kind in "OUS" else np.sign(d))[:, None, None]
+    slm = np.asarray(sl_mults, dtype=np.float64)[None, :, None]
+    tpm = np.asarray(tp_mults, dtype=np.float64)[None, None, :]
+    sl = entry - side * slm * atr_
+    tp = entry + side * tpm * atr_
+    drift_ = np.atleast_1d(np.asarray(drift, dtype=np.float64))[:, None, None]
+    sigma_ = None if sigma is None else np.atleast_1d(np.asarray(sigma, dtype=np.float64))[:, None, None]
+    p = tp_sl_probability_batch(entry, sl, tp, atr_, side, drift_, sigma_, expected_atr, sharpness, decimals=None)
+    q = p / 100
+    return {"probability": p, "sl": sl, "tp": tp, "expected_r": q * (tpm / slm) - (1 - q)}
+
+
+# ---------- Monte Carlo ----------
+def _mc_chunk(job) -> np.ndarray:
+    """Counts [tp, sl, neither] per scenario for one seeded chunk of paths."""
+    a, b, mu, sigma, n_paths, n_steps, dt, seed = job
+    rng = np.random.default_rng(seed)
+    s = len(a)
+    x = np.zeros((s, n_paths))
+    alive = np.ones((s, n_paths), dtype=bool)
+    tp_hits = np.zeros(s)
+    sl_hits = np.zeros(s)
+    step_mu, step_sd = (mu * dt)[:, None], (sigma * np.sqrt(dt))[:, None]
+    # Broadie–Glasserman shift: discrete checks miss crossings between steps,
+    # so move the simulated barriers inward by 0.5826·σ·√dt.
+    a = a - 0.5826 * step_sd[:, 0]
+    b = b - 0.5826 * step_sd[:, 0]
+    for _ in range(n_steps):
+        x += step_mu + step_sd * rng.standard_normal((s, n_paths))
+        up = alive & (x >= a[:, None])
+        dn = alive & (x <= -b[:, None])
+        tp_hits += up.sum(axis=1)
+        sl_hits += dn.sum(axis=1)
+        alive &= ~(up | dn)
+        if not alive.any():
+            break
+    return np.column_stack([tp_hits, sl_hits, alive.sum(axis=1)])
+
+
+def simulate_barrier_hits(entry, sl, tp, direction, drift=0.0, sigma=None, atr=None,
+                          n_paths: int = 20_000, horizon: int = 500, steps_per_bar: int = 20,
+                          seed: int = 0, chunk: int = 5_000, processes: int = 0) -> pd.DataFrame:
+    """
+    Monte Carlo estimate of P(TP first), P(SL first) and P(neither within
+    `horizon` bars) for each scenario, with the closed form alongside.
+
+    Paths are arithmetic Brownian motion with per-bar `drift` and `sigma`
+    (default: `atr`), stepped `steps_per_bar` times per bar.  Barriers are
+    continuity-corrected for the discrete monitoring.  The closed form has
+    no time limit, so keep `horizon` long when comparing.
+
+    Paths are drawn in chunks of `chunk`, each from its own SeedSequence
+    child.  Results depend on `seed` only, not on `processes`.
+    """
+    entry = np.atleast_1d(np.asarray(entry, dtype=np.float64))
+    d = np.atleast_1d(np.asarray(direction))
+    side = np.where(d == "bearish", -1.0, 1.0) if d.dtype.kind in "OUS" else np.sign(d).astype(np.float64)
+    entry, side = np.broadcast_arrays(entry, side)
+    a = np.broadcast_to(np.abs(np.asarray(tp, dtype=np.float64) - entry), entry.shape).astype(np.float64)
+    b = np.broadcast_to(np.abs(entry - np.asarray(sl, dtype=np.float64)), entry.shape).astype(np.float64)
+    sig = np.broadcast_to(np.asarray(atr if sigma is None else sigma, dtype=np.float64), entry.shape).astype(np.float64)
+    mu = np.broadcast_to(side * np.asarray(drift, dtype=np.float64), entry.shape).astype(np.float64)
+
+    sizes = [min(chunk, n_paths - i) for i in range(0, n_paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    dt = 1.0 / steps_per_bar
+    jobs = [(a, b, mu, sig, m, horizon * steps_per_bar, dt, sq) for m, sq in zip(sizes, seeds)]
+    if processes:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            counts = sum(pool.map(_mc_chunk, jobs))
+    else:
+        counts = sum(map(_mc_chunk, jobs))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(sig > 0, 2.0 * mu / sig ** 2, 0.0)
+    return pd.DataFrame({
+        "p_tp": counts[:, 0] / n_paths,
+        "p_sl": counts[:, 1] / n_paths,
+        "p_open": counts[:, 2] / n_paths,
+        "p_tp_given_hit": counts[:, 0] / np.maximum(counts[:, 0] + counts[:, 1], 1),
+        "closed_form": _hit_upper_first(a, b, k),
+        "stderr": np.sqrt(np.maximum(counts[:, 0] * counts[:, 1], 0)
+                          / np.maximum(counts[:, 0] + counts[:, 1], 1) ** 3),
+    })
+
+
+# ---------- calibration against backtested outcomes ----------
+def trades_from_backtest(bars: pd.DataFrame, params: Optional["BacktestParams"] = None) -> pd.DataFrame:
+    """
+    Resolved trades from a backtest_frame() result as (entry, sl, tp, atr,
+    direction, win) rows, with TP/SL at the params' ATR multiples.
+    """
+    p = params or BacktestParams()
+    t = bars[(bars["side"] != 0) & bars["outcome"].notna() & (bars["outcome"] != 0)]
+    side = t["side"].to_numpy()
+    entry, atr = t["price"].to_numpy(), t["ATR"].to_numpy()
+    return pd.DataFrame({
+        "entry": entry,
+        "sl": entry - side * p.sl_atr * atr,
+        "tp": entry + side * p.tp_atr * atr,
+        "atr": atr,
+        "direction": side,
+        "win": (t["outcome"].to_numpy() > 0).astype(np.float64),
+    }, index=t.index)
+
+
+def calibrate_atr_discount(trades: pd.DataFrame, expected_atr_grid=None, sharpness_grid=None,
+                           drift=0.0) -> Tuple[Dict[str, float], pd.DataFrame]:
+    """
+    Grid-search `expected_atr` and `sharpness` so that the predicted TP
+    probability best matches observed wins (lowest Brier score).  `trades`
+    comes from trades_from_backtest().  Returns the best pair and the full
+    score table.
+    """
+    expected_atr_grid = np.asarray(expected_atr_grid if expected_atr_grid is not None
+                                   else np.linspace(0.002, 0.03, 15))
+    sharpness_grid = np.asarray(sharpness_grid if sharpness_grid is not None
+                                else np.r_[0.0, np.geomspace(0.1, 20, 14)])
+    entry, atr, win = (trades[c].to_numpy(dtype=np.float64) for c in ("entry", "atr", "win"))
+    base = tp_sl_probability_batch(entry, trades["sl"], trades["tp"], atr, trades["direction"],
+                                   drift, expected_atr=np.inf, decimals=None) / 100
+    ratio = (atr / entry)[:, None, None]
+    e = expected_atr_grid[None, :, None]
+    s = sharpness_grid[None, None, :]
+    pred = base[:, None, None] * np.where(ratio > e, np.exp(-(ratio - e) * s * 10), 1.0)
+    brier = ((pred - win[:, None, None]) ** 2).mean(axis=0)
+
+    i, j = np.unravel_index(np.argmin(brier), brier.shape)
+    table = pd.DataFrame(brier, index=pd.Index(expected_atr_grid, name="expected_atr"),
+                         columns=pd.Index(sharpness_grid, name="sharpness"))
+    best = {"expected_atr": float(expected_atr_grid[i]), "sharpness": float(sharpness_grid[j]),
+            "brier": float(brier[i, j]), "win_rate": float(win.mean()),
+            "mean_predicted": float(pred[:, i, j].mean())}
+    return best, table
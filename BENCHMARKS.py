@@ -0,0 +1,410 @@
+# Reproducible benchmarks for the scan hot paths: synthetic OHLCV, mocked feeds with set latency, JSON results.
+
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+
+_BENCH_FREQ = {"15m": "15min", "30m": "30min", "1h": "h", "4h": "4h", "1d": "D"}
+
+# Per-request latency (seconds) of each mocked upstream.
+BENCH_LATENCY = {"tradingview": 0.05, "yahoo": 0.15, "capital": 0.03, "llm": 0.4}
+
+
+def synthetic_ohlcv(n_bars: int = 500, interval: str = "1h", start_price: float = 100.0,
+                    vol: float = 0.004, seed: int = 0, end=None) -> pd.DataFrame:
+    """
+    Geometric random walk with bar-shaped OHLC and a volume that rises with
+    the absolute return, in the bar store's column layout.  The index ends at
+    `end` (default: the last whole bar before now), so period trims and
+    staleness checks behave as they do on live data.  The same arguments
+    always give the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    r = rng.normal(0.0, vol, n_bars)
+    close = start_price * np.exp(np.cumsum(r))
+    open_ = np.r_[start_price, close[:-1]]
+    wick = np.abs(rng.normal(0.0, vol / 2, (2, n_bars)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = np.round(rng.lognormal(10.0, 0.5, n_bars) * (1 + 50 * np.abs(r)))
+    freq = _BENCH_FREQ.get(interval, "h")
+    end = pd.Timestamp.now(tz="UTC").floor(freq) if end is None else pd.Timestamp(end)
+    index = pd.date_range(end=end, periods=n_bars, freq=freq, name="Datetime")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close,
+                         "Adj close": close, "Volume": volume}, index=index)
+
+
+def _symbol_seed(symbol: str, interval: str, seed: int) -> int:
+    return zlib.crc32(f"{symbol}|{interval}|{seed}".encode())
+
+
+class MockFeeds:
+    """
+    Swap every network edge of the scan for synthetic, seeded data with a
+    fixed latency per request:
+
+      • TA_Handler      → indicator pack of a synthetic frame ("tradingview")
+      • yf              → synthetic bars for download() / Ticker().history() ("yahoo")
+      • get_realtime_price, lookup_epic, fetch_client_sentiment ("capital")
+      • get_top_headline → a fixed headline
+      • META_CACHE      → a fresh cache over StubMetaBackend ("llm")
+
+    BAR_STORE and FEATURE_LOG are pointed at a temporary directory, and
+    TA_CACHE, LOCAL_TA, VBP_INDEX, SYMBOL_ROUTES and SIGNAL_HISTORY start
+    empty, with a fresh FEED_ROUTER (breakers closed, no latency samples).
+    Every run therefore starts cold, and nothing real is read or written,
+    nor leaks into the real routing afterwards.  `tv_fail` is the fraction of
+    TradingView requests that come back empty, to exercise the Yahoo
+    fallback.  Request counts per upstream are kept in `calls`.
+
+        with MockFeeds(latency={"llm": 0.0}) as feeds:
+            analyze_ticker("EURUSD")
+    """
+
+    def __init__(self, latency: Optional[Dict[str, float]] = None, n_bars: int = 500,
+                 tv_fail: float = 0.0, seed: int = 0):
+        self.latency = {**BENCH_LATENCY, **(latency or {})}
+        self.n_bars = n_bars
+        self.tv_fail = tv_fail
+        self.seed = seed
+        self.calls = {name: 0 for name in self.latency}
+        self._frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._lock = threading.Lock()
+        self._saved: Dict[str, Any] = {}
+        self._tmp = None
+
+    # ---------- synthetic upstreams ----------
+    def _hit(self, upstream: str) -> None:
+        with self._lock:
+            self.calls[upstream] += 1
+        if self.latency[upstream]:
+            time.sleep(self.latency[upstream])
+
+    def frame(self, ticker: str, interval: str = "1h") -> pd.DataFrame:
+        key = (str(ticker).upper(), interval)
+        with self._lock:
+            df = self._frames.get(key)
+            if df is None:
+                s = _symbol_seed(*key, self.seed)
+                df = self._frames[key] = synthetic_ohlcv(self.n_bars, interval, start_price=10 + s % 5000, seed=s)
+        return df
+
+    def _ta_handler(self):
+        feeds = self
+
+        class MockTAHandler:
+            def __init__(self, symbol, exchange="", screener="", interval="1h"):
+                self.symbol, self.interval = symbol, str(interval)
+
+            def get_analysis(self):
+                feeds._hit("tradingview")
+                s = _symbol_seed(self.symbol, self.interval, feeds.seed)
+                if feeds.tv_fail and (s % 1000) / 1000 < feeds.tv_fail:
+                    return None
+                ind = local_indicators(feeds.frame(self.symbol, _YF_INTERVAL.get(self.interval, "1h")))
+                return _DummyTA(ind, local_recommend(ind))
+
+        return MockTAHandler
+
+    def _yahoo(self):
+        feeds = self
+
+        class MockTicker:
+            def __init__(self, ticker):
+                self.ticker = ticker
+
+            def history(self, period="5d", interval="1d", **_):
+                feeds._hit("yahoo")
+                return feeds.frame(self.ticker, interval)
+
+        class MockYahoo:
+            Ticker = MockTicker
+
+            @staticmethod
+            def download(tickers, period=None, interval="1h", start=None, group_by=None, **_):
+                feeds._hit("yahoo")
+                names = [tickers] if isinstance(tickers, str) else list(tickers)
+                frames = [feeds.frame(t, interval) for t in names]
+                if start is not None:
+                    start = pd.Timestamp(start)
+                    start = start.tz_localize("UTC") if start.tzinfo is None else start
+                    frames = [f[f.index >= start] for f in frames]
+                if len(names) == 1 and group_by != "ticker":
+                    return frames[0].copy()
+                return pd.concat(frames, axis=1, keys=names)
+
+        return MockYahoo()
+
+    def _realtime_price(self, symbol, epic=None):
+        self._hit("capital")
+        return float(self.frame(convert_to_yf_symbol(symbol), "1h")["Close"].iloc[-1])
+
+    def _sentiment(self, symbol):
+        self._hit("capital")
+        return float(_symbol_seed(symbol, "sentiment", self.seed) % 101)
+
+    # ---------- install / restore ----------
+    def __enter__(self) -> "MockFeeds":
+        g = globals()
+        self._tmp = tempfile.TemporaryDirectory(prefix="rabit-bench-")
+        replacements = {
+            "TA_Handler": self._ta_handler(),
+            "yf": self._yahoo(),
+            "get_realtime_price": self._realtime_price,
+            "lookup_epic": lambda symbol: str(symbol).upper(),
+            "fetch_client_sentiment": self._sentiment,
+            "get_top_headline": lambda: "Synthetic markets drift sideways",
+            "META_CACHE": MetaSignalCache(backend=StubMetaBackend(self.latency["llm"])),
+            "BAR_STORE": BarStore(root=os.path.join(self._tmp.name, "bar_store")),
+            "FEATURE_LOG": FeatureLogWriter(root=os.path.join(self._tmp.name, "rl_features")),
+            "TA_CACHE": TACache(background=False),
+            "LOCAL_TA": LocalTAPacks(),
+            "FEED_ROUTER": default_feed_router(),
+            "VBP_INDEX": VBPIndex(),
+            "SYMBOL_ROUTES": SymbolRegistry(path=None),
+            "SIGNAL_HISTORY": SignalHistory(),
+            "_SCAN_POOL": None,                 # workers forked under the mocks end with them
+        }
+        self._saved = {name: g.get(name) for name in replacements}
+        g.update(replacements)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        g = globals()
+        self.calls["llm"] = g["META_CACHE"].backend.calls
+        g["FEED_ROUTER"]._pool.shutdown(wait=False)
+        if g["_SCAN_POOL"] is not None:
+            g["_SCAN_POOL"].close()
+        g.update(self._saved)
+        self._saved = {}
+        self._tmp.cleanup()
+
+
+# ---------- measurement ----------
+def _measure(fn, repeat: int = 50, warmup: int = 3, memory: bool = True) -> dict:
+    """
+    Latency percentiles and throughput over `repeat` timed calls, plus the
+    peak traced allocation of one extra call (tracemalloc slows the code it
+    watches, so it never overlaps the timed calls).
+    """
+    for _ in range(warmup):
+        fn()
+    times = np.empty(repeat)
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - t0
+    out = {
+        "calls": repeat,
+        "mean_ms": times.mean() * 1e3,
+        "p50_ms": np.percentile(times, 50) * 1e3,
+        "p95_ms": np.percentile(times, 95) * 1e3,
+        "min_ms": times.min() * 1e3,
+        "ops_per_s": 1.0 / times.mean(),
+    }
+    if memory:
+        out["peak_kib"] = _peak_memory(fn) / 1024
+    return {k: round(float(v), 6) for k, v in out.items()}
+
+
+def _peak_memory(fn) -> int:
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    try:
+        fn()
+        return max(tracemalloc.get_traced_memory()[1] - base, 0)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def benchmark_hot_paths(sizes=(200, 2_000, 20_000), repeat: int = 50, seed: int = 0) -> Dict[str, dict]:
+    """
+    Per-call latency, throughput and peak memory of the per-symbol hot
+    functions on synthetic frames of each size in `sizes` (bars).
+    Size-independent functions run once, keyed without a size.  get_ta
+    runs against MockFeeds with zero latency, so only our own overhead is
+    timed: "cold" misses TA_CACHE on every call, "warm" always hits.
+    """
+    results: Dict[str, dict] = {}
+    for n in sizes:
+        df = synthetic_ohlcv(n, seed=seed)
+        rows = pd.DataFrame([local_indicators(df)] * n)
+        direction = np.where(rows["MACD.macd"] >= rows["MACD.signal"], "bullish", "bearish")
+        cases = {
+            "local_indicators": lambda: local_indicators(df),
+            "local_indicators_reference": lambda: local_indicators_reference(df.reset_index(drop=True)),
+            "calc_vbp": lambda: calc_vbp(df, bins=20),
+            "vbp_index_cold": lambda: VBPIndex().sync("BENCH", df),
+            "entropy20_series": lambda: entropy20_series(df["Close"]),
+            "trade_probability_batch": lambda: calculate_trade_probability_batch(rows, direction),
+        }
+        for name, fn in cases.items():
+            results[f"{name}[{n}]"] = {"name": name, "size": n, **_measure(fn, repeat)}
+
+    df = synthetic_ohlcv(500, seed=seed)
+    returns_20 = np.log(df["Close"]).diff().dropna().tail(20)
+    ind = {**local_indicators(df), "Entropy20": calc_entropy(returns_20), "vix": 20.0}
+    votes = ["BUY", "BUY", "NEUTRAL", "SELL"]
+    single = {
+        "calc_entropy": lambda: calc_entropy(returns_20),
+        "calculate_trade_probability": lambda: calculate_trade_probability(ind, "bullish", votes),
+    }
+    with MockFeeds(latency=dict.fromkeys(BENCH_LATENCY, 0.0), seed=seed):
+        cold = lambda: (TA_CACHE.clear(), get_ta("BENCH", "FX", "forex", "1h"))
+        single["get_ta_cold"] = cold
+        single["get_ta_warm"] = lambda: get_ta("BENCH", "FX", "forex", "1h")
+        for name, fn in single.items():
+            results[name] = {"name": name, "size": None, **_measure(fn, repeat)}
+    return results
+
+
+def benchmark_sweep(n_symbols: int = 50, max_workers: int = 16, latency: Optional[Dict[str, float]] = None,
+                    n_bars: int = 500, tv_fail: float = 0.0, symbols: Optional[List[str]] = None,
+                    memory: bool = True, seed: int = 0, processes: int = 0) -> dict:
+    """
+    One end-to-end sweep (market context, OHLCV prefetch, analyze_ticker
+    for every symbol, feature-log flush) against MockFeeds.  Reports wall
+    time, symbols/s, per-symbol latency percentiles, mean time per stage
+    from METRICS, upstream request counts and, with `memory`, the peak
+    traced allocation of a second identical sweep.  With `processes`, the
+    scan runs in worker processes (upstream counts then cover the parent
+    only).
+    """
+    symbols = symbols or [f"SYM{i:03d}" for i in range(n_symbols)]
+
+    def sweep():
+        SYMBOL_ROUTES.sync(symbols)
+        ctx = load_market_context(symbols)
+        prefetch_ohlcv(symbols)
+        if processes:
+            results = list(scan_watchlist_processes(symbols, processes, ctx=ctx,
+                                                    threads=max(1, max_workers // processes)))
+        else:
+            results = list(scan_watchlist(symbols, max_workers=max_workers, ctx=ctx))
+        FEATURE_LOG.flush()
+        return results
+
+    METRICS.reset()
+    with MockFeeds(latency, n_bars, tv_fail, seed) as feeds:
+        t0 = time.perf_counter()
+        results = sweep()
+        wall = time.perf_counter() - t0
+    calls = dict(feeds.calls)
+    stages = {h["labels"]["stage"] + (f"[{h['labels']['interval']}]" if "interval" in h["labels"] else ""):
+              round(h["mean"] * 1e3, 3)
+              for h in METRICS.to_json()["histograms"].get("stage_seconds", [])}
+    peak = None
+    if memory:
+        with MockFeeds(latency, n_bars, tv_fail, seed):
+            peak = _peak_memory(sweep) / 2 ** 20
+
+    per_symbol = np.array([r.wall_time for r in results])
+    return {
+        "name": "sweep",
+        "size": len(symbols),
+        "wall_s": round(wall, 4),
+        "symbols_per_s": round(len(results) / wall, 3),
+        "p50_ms": round(float(np.percentile(per_symbol, 50)) * 1e3, 3),
+        "p95_ms": round(float(np.percentile(per_symbol, 95)) * 1e3, 3),
+        "failed": sum(1 for r in results if r.error),
+        "stage_mean_ms": stages,
+        "upstream_calls": calls,
+        "peak_mib": None if peak is None else round(peak, 3),
+        "max_workers": max_workers,
+        "processes": processes,
+        "latency": {**BENCH_LATENCY, **(latency or {})},
+    }
+
+
+# ---------- results ----------
+def _bench_meta(params: dict) -> dict:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+
+def run_benchmarks(out: Optional[str] = "benchmarks/latest.json", sizes=(200, 2_000, 20_000),
+                   repeat: int = 50, n_symbols: int = 50, max_workers: int = 16,
+                   latency: Optional[Dict[str, float]] = None, seed: int = 0,
+                   import_budget_s: float = 1.0) -> dict:
+    """
+    Hot paths plus one end-to-end sweep, written to `out` as JSON
+    ({"meta": …, "results": {key: record}}) for compare_benchmarks().
+    Pass out=None to only return the dict.  Starts with check_cold_start()
+    from the current directory (the checkout), so a start-up over
+    `import_budget_s`, or one that imports a heavy module, fails the run.
+    """
+    params = {"sizes": list(sizes), "repeat": repeat, "n_symbols": n_symbols,
+              "max_workers": max_workers, "latency": {**BENCH_LATENCY, **(latency or {})}, "seed": seed,
+              "import_budget_s": import_budget_s}
+    cold = check_cold_start(budget_s=import_budget_s)
+    results = {"cold_start_imports": {"p50_ms": round(cold["total_s"] * 1e3, 3), "slowest": cold["slowest"][:5]}}
+    results.update(benchmark_hot_paths(sizes, repeat, seed))
+    results[f"sweep[{n_symbols}]"] = benchmark_sweep(n_symbols, max_workers, latency, seed=seed)
+    report = {"meta": _bench_meta(params), "results": results}
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        tmp = f"{out}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(report, fh, indent=2, default=str)
+        os.replace(tmp, out)
+    return report
+
+
+def compare_benchmarks(baseline, current, tolerance: float = 0.10, metric: str = "p50_ms",
+                       min_delta_ms: float = 0.005) -> pd.DataFrame:
+    """
+    Line up two run_benchmarks() reports (paths or dicts) by key.
+    `ratio` is current / baseline for `metric`.  Rows more than `tolerance`
+    slower are "regression", more than `tolerance` faster "improvement";
+    for millisecond metrics, moves under `min_delta_ms` are timer noise and
+    stay "ok".
+    Keys present on one side only are "new" or "missing".  `mem_ratio`
+    compares peak memory where both runs recorded it.
+    """
+    def _load(r):
+        if isinstance(r, (str, os.PathLike)):
+            with open(r) as fh:
+                r = json.load(fh)
+        return r["results"]
+
+    base, cur = _load(baseline), _load(current)
+    rows = []
+    for key in sorted(set(base) | set(cur)):
+        b, c = base.get(key), cur.get(key)
+        row = {"key": key, "baseline": b and b.get(metric), "current": c and c.get(metric)}
+        if b is None or c is None:
+            row["status"] = "new" if b is None else "missing"
+        else:
+            row["ratio"] = c[metric] / b[metric] if b[metric] else np.nan
+            noise = metric.endswith("_ms") and abs(c[metric] - b[metric]) < min_delta_ms
+            row["status"] = ("ok" if noise else "regression" if row["ratio"] > 1 + tolerance
+                             else "improvement" if row["ratio"] < 1 - tolerance else "ok")
+            mem = "peak_kib" if "peak_kib" in b else "peak_mib"
+            if b.get(mem) and c.get(mem) is not None:
+                row["mem_ratio"] = c[mem] / b[mem]
+        rows.append(row)
+    cols = ["key", "baseline", "current", "ratio", "mem_ratio", "status"]
+    return pd.DataFrame(rows).reindex(columns=cols).set_index("key")
@@ -1,4 +1,8 @@
-def local_indicators(df: pd.DataFrame) -> dict:
+def local_indicators_reference(df: pd.DataFrame) -> dict:
+    """
+    Original pandas implementation of local_indicators(), kept as the
+    reference the NumPy kernel is verified against (verify_indicator_kernel).
+    """
     close = df["Close"].squeeze()  # ensure 1D series
     high  = df["High"].squeeze()
     low   = df["Low"].squeeze()
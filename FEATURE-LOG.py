@@ -0,0 +1,146 @@
+# Buffered, append-only columnar log of the per-tick feature rows (replaces rl_trainingsheet.csv appends).
+
+import atexit
+import importlib.util
+import os
+import threading
+import time
+
+# Parquet when pyarrow is installed, otherwise one .npz of column arrays per part.
+_PARQUET = importlib.util.find_spec("pyarrow") is not None
+_STRING_COLUMNS = {"symbol", "direction"}
+
+
+class FeatureLogWriter:
+    """
+    Collects feature rows in memory and flushes them in batches.
+
+    Each flush writes one new immutable part file per UTC day touched:
+    <root>/date=YYYY-MM-DD/part-<pid>-<ns>.(parquet|npz).  The file is
+    written to a temp name and renamed into place.  Any number of threads
+    or processes can log at once: rows never interleave, and a reader never
+    sees a half-written part.
+    """
+
+    def __init__(self, root: str = "rl_features", batch_size: int = 500, max_age: float = 60.0):
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self._rows: List[dict] = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def append(self, row: dict) -> None:
+        """
+        Queue one row; flushes once the buffer is `batch_size` rows or
+        `max_age` seconds old.
+        """
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._rows) >= self.batch_size or time.monotonic() - self._oldest >= self.max_age
+            if not due:
+                return
+            rows, self._rows, self._oldest = self._rows, [], None
+        self._write(rows)
+
+    def flush(self) -> int:
+        """Write everything buffered; returns the number of rows written."""
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+        if rows:
+            self._write(rows)
+        return len(rows)
+
+    def _write(self, rows: List[dict]) -> None:
+        self.write_frame(pd.DataFrame(rows))
+
+    def write_frame(self, df: pd.DataFrame) -> None:
+        """Write a whole frame of rows straight to part files, bypassing the buffer."""
+        df = df.copy()
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True).dt.as_unit("ns")
+        for day, part in df.groupby(df["timestamp"].dt.strftime("%Y-%m-%d")):
+            part_dir = self.root / f"date={day}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            name = f"part-{os.getpid()}-{time.time_ns()}"
+            if _PARQUET:
+                tmp = part_dir / f".{name}.parquet"
+                part.to_parquet(tmp, index=False)
+                os.replace(tmp, part_dir / f"{name}.parquet")
+            else:
+                tmp = part_dir / f".{name}.npz"
+                with open(tmp, "wb") as fh:
+                    np.savez(fh, **_npz_columns(part))
+                os.replace(tmp, part_dir / f"{name}.npz")
+
+
+def _npz_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    cols = {}
+    for c in df.columns:
+        if c == "timestamp":
+            cols[c] = df[c].astype("int64").to_numpy()
+        elif c in _STRING_COLUMNS:
+            cols[c] = df[c].astype(str).to_numpy(dtype=str)
+        else:
+            cols[c] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float64)
+    return cols
+
+
+def _read_part(path: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    # Parts written before a column was added lack it: read what the part
+    # has, and the missing columns come back as NaN.
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        names = pq.read_schema(path).names
+        df = pd.read_parquet(path, columns=None if columns is None else [c for c in columns if c in names])
+    else:
+        with np.load(path) as z:
+            keep = [c for c in z.files if columns is None or c in columns]
+            df = pd.DataFrame({c: z[c] for c in keep})
+        if "timestamp" in df:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ns", utc=True)
+    return df if columns is None else df.reindex(columns=columns)
+
+
+def _utc(ts) -> Optional[pd.Timestamp]:
+    if ts is None:
+        return None
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def read_feature_log(root: str = "rl_features", columns: Optional[List[str]] = None,
+                     start=None, end=None) -> pd.DataFrame:
+    """
+    Load logged feature rows for the retrain job.
+
+    Only day partitions overlapping [start, end] are opened, and only the
+    requested `columns` are read (timestamp is always included for the
+    range filter).  Rows come back sorted by timestamp.
+    """
+    root = Path(root)
+    start, end = _utc(start), _utc(end)
+    cols = None if columns is None else list(dict.fromkeys(["timestamp", *columns]))
+
+    frames = []
+    for part_dir in sorted(root.glob("date=*")):
+        day = pd.Timestamp(part_dir.name[5:], tz="UTC")
+        if start is not None and day + pd.Timedelta(days=1) <= start:
+            continue
+        if end is not None and day > end:
+            continue
+        for path in sorted(part_dir.glob("part-*")):
+            frames.append(_read_part(path, cols))
+    if not frames:
+        return pd.DataFrame(columns=cols or [])
+    df = pd.concat(frames, ignore_index=True)
+    if start is not None:
+        df = df[df["timestamp"] >= start]
+    if end is not None:
+        df = df[df["timestamp"] <= end]
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+FEATURE_LOG = FeatureLogWriter()
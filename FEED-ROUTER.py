@@ -0,0 +1,434 @@
+# Feed routing: per-venue circuit breakers, hedged fallbacks, keep-alive HTTP pools and venue health.
+
+import http.client
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+_CLOSED, _OPEN, _HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    Closed → open → half-open breaker over the last `window` calls.
+
+    Trips when at least `min_calls` outcomes are recorded and the share of
+    failures reaches `failure_ratio`.  A call slower than `slow_call`
+    seconds counts as a failure even if it answered.  An open breaker
+    rejects calls for `cooldown` seconds, then lets `half_open_probes`
+    calls through.  A successful probe closes it and a failed one opens
+    it again.
+    """
+
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_ratio: float = 0.5,
+                 slow_call: Optional[float] = None, cooldown: float = 30.0, half_open_probes: int = 1):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self.state = _CLOSED
+        self.trips = 0
+        self._outcomes: deque = deque(maxlen=window)     # True = failure
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """May a call go out now?  In half-open this claims one probe slot."""
+        with self._lock:
+            if self.state == _OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self.state, self._probes = _HALF_OPEN, 0
+            if self.state == _HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    return False
+                self._probes += 1
+            return True
+
+    def record(self, ok: bool, latency: float) -> None:
+        failed = not ok or (self.slow_call is not None and latency > self.slow_call)
+        with self._lock:
+            if self.state == _HALF_OPEN:
+                if failed:
+                    self._trip()
+                else:
+                    self.state = _CLOSED
+                    self._outcomes.clear()
+                return
+            if self.state == _OPEN:
+                return                                      # a late answer from before the trip
+            self._outcomes.append(failed)
+            n = len(self._outcomes)
+            if n >= self.min_calls and sum(self._outcomes) / n >= self.failure_ratio:
+                self._trip()
+
+    def _trip(self) -> None:
+        self.state = _OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+
+
+class VenueStats:
+    """
+    Call counts and a rolling latency sample for one venue.  With
+    `empty_is_failure` off, a None answer is not held against the breaker
+    (it still counts if slow): for venues where None means "no data for
+    this symbol" rather than "venue down".
+    """
+
+    def __init__(self, name: str, breaker: CircuitBreaker, sample: int = 200, empty_is_failure: bool = True):
+        self.name = name
+        self.breaker = breaker
+        self.empty_is_failure = empty_is_failure
+        self.latencies: deque = deque(maxlen=sample)        # successful calls only
+        self.calls = self.errors = self.empty = self.rejected = self.wins = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None, empty: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self.latencies.append(latency)
+            elif empty:
+                self.empty += 1
+            else:
+                self.errors += 1
+                self.last_error = error
+        self.breaker.record(ok or (empty and not self.empty_is_failure), latency)
+        METRICS.observe("venue_seconds", latency, venue=self.name)
+        METRICS.inc("venue_calls_total", venue=self.name,
+                    outcome="ok" if ok else "empty" if empty else "error")
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            sample = list(self.latencies)
+        return float(np.percentile(sample, 95)) if len(sample) >= 10 else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            sample = np.array(self.latencies) if self.latencies else None
+            out = {
+                "state": self.breaker.state,
+                "trips": self.breaker.trips,
+                "calls": self.calls,
+                "errors": self.errors,
+                "empty": self.empty,
+                "rejected": self.rejected,
+                "wins": self.wins,
+                "last_error": self.last_error,
+            }
+        out["p50_ms"] = None if sample is None else round(float(np.percentile(sample, 50)) * 1e3, 2)
+        out["p95_ms"] = None if sample is None else round(float(np.percentile(sample, 95)) * 1e3, 2)
+        return out
+
+
+class FeedRouter:
+    """
+    Try an ordered list of (venue, call) pairs and return the first answer.
+
+        data = FEED_ROUTER.route([
+            ("tradingview", lambda: _tv_analysis(...)),
+            ("yahoo",       lambda: LOCAL_TA.get(...)),
+        ])
+
+    A call that raises or returns None has failed.  The next venue is then
+    tried at once, not after a timeout.  Venues whose breaker is open are
+    skipped without being called.  With hedging on, the next venue also
+    starts when the current one has not answered within its p95 latency
+    (`default_hedge_delay` until 10 samples exist, never below
+    `min_hedge_delay`).  The first answer wins.  A losing call runs to
+    completion in the background, and its outcome still counts towards
+    the venue's health.
+
+    Breakers are per venue and shared by every route through the router;
+    configure_venue() tunes one.
+    """
+
+    def __init__(self, hedge: bool = True, default_hedge_delay: float = 2.0,
+                 min_hedge_delay: float = 0.05, max_workers: int = 32, **breaker_defaults):
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.breaker_defaults = breaker_defaults
+        self._venues: Dict[str, VenueStats] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed")
+        self.hedges = 0
+
+    def venue(self, name: str) -> VenueStats:
+        with self._lock:
+            v = self._venues.get(name)
+            if v is None:
+                v = self._venues[name] = VenueStats(name, CircuitBreaker(**self.breaker_defaults))
+            return v
+
+    def configure_venue(self, name: str, empty_is_failure: bool = True, **breaker_kwargs) -> None:
+        """Replace a venue's breaker, e.g. configure_venue("tradingview", slow_call=5.0)."""
+        v = self.venue(name)
+        v.breaker = CircuitBreaker(**{**self.breaker_defaults, **breaker_kwargs})
+        v.empty_is_failure = empty_is_failure
+
+    def hedge_delay(self, name: str) -> float:
+        p95 = self.venue(name).p95()
+        return max(self.min_hedge_delay, self.default_hedge_delay if p95 is None else p95)
+
+    def _run(self, v: VenueStats, fn):
+        t0 = time.perf_counter()
+        try:
+            value = fn()
+        except Exception as e:
+            v.record(False, time.perf_counter() - t0, error=f"{type(e).__name__}: {e}")
+            raise
+        v.record(value is not None, time.perf_counter() - t0, empty=value is None)
+        return value
+
+    def route(self, calls: Sequence[Tuple[str, Callable[[], Any]]], hedge: Optional[bool] = None,
+              timeout: Optional[float] = None):
+        """
+        First non-None answer from `calls`, in order.  Raises RuntimeError
+        naming every venue's failure if none answers (within `timeout`
+        seconds overall, if given).
+        """
+        hedge = self.hedge if hedge is None else hedge
+        queue = list(calls)
+        pending: Dict[Any, VenueStats] = {}
+        failures: List[str] = []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        current = None
+
+        def launch() -> Optional[VenueStats]:
+            while queue:
+                name, fn = queue.pop(0)
+                v = self.venue(name)
+                if v.breaker.allow():
+                    pending[self._pool.submit(self._run, v, fn)] = v
+                    return v
+                with v._lock:
+                    v.rejected += 1
+                METRICS.inc("venue_calls_total", venue=name, outcome="rejected")
+                failures.append(f"{name}: circuit open")
+            return None
+
+        current = launch()
+        while pending:
+            waits = []
+            if hedge and queue:
+                waits.append(self.hedge_delay(current.name))
+            if deadline is not None:
+                waits.append(max(deadline - time.monotonic(), 0.0))
+            done, _ = wait(list(pending), timeout=min(waits) if waits else None, return_when=FIRST_COMPLETED)
+            if not done:
+                if deadline is not None and time.monotonic() >= deadline:
+                    failures.extend(f"{v.name}: timed out" for v in pending.values())
+                    break
+                hedged = launch()
+                if hedged is not None:
+                    current = hedged
+                    with self._lock:
+                        self.hedges += 1
+                    METRICS.inc("venue_hedges_total", venue=hedged.name)
+                continue
+            for fut in done:
+                v = pending.pop(fut)
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    failures.append(f"{v.name}: {e}")
+                    continue
+                if value is not None:
+                    with v._lock:
+                        v.wins += 1
+                    return value
+                failures.append(f"{v.name}: no data")
+            if not pending:
+                current = launch() or current
+        raise RuntimeError("all venues failed (" + "; ".join(failures) + ")")
+
+    def health(self) -> Dict[str, dict]:
+        """Per-venue breaker state, counts and latency percentiles."""
+        with self._lock:
+            venues = dict(self._venues)
+        return {name: v.snapshot() for name, v in venues.items()}
+
+
+def default_feed_router() -> FeedRouter:
+    router = FeedRouter()
+    # TradingView answers None both when it errors and when it has no indicators
+    # for a symbol, so only slow answers (its timeouts) count against it.
+    router.configure_venue("tradingview", empty_is_failure=False, slow_call=10.0)
+    # Yahoo answers None for a ticker it does not list; a handful of those
+    # must not open its breaker for every other symbol.  Errors still count.
+    router.configure_venue("yahoo", empty_is_failure=False)
+    return router
+
+
+FEED_ROUTER = default_feed_router()
+
+
+# ---------- pooled keep-alive HTTP ----------
+class KeepAlivePool:
+    """
+    Idle HTTP/1.1 connections kept per (scheme, host, port) and reused
+    across threads, so repeat calls to a venue skip the TCP and TLS
+    handshakes.  A reused connection the server has meanwhile closed
+    is retried once on a fresh one.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._idle: Dict[tuple, deque] = {}
+        self._lock = threading.Lock()
+        self.created = self.reused = 0
+
+    def _checkout(self, key: tuple, timeout: float):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.created += 1
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def _checkin(self, key: tuple, conn) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Tuple[int, bytes]:
+        """(status, body) of one request; the connection goes back to the pool unless the server closes it."""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(2):
+            conn, reused = self._checkout(key, timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                conn.close()
+                if reused and attempt == 0:
+                    continue                                # stale keep-alive socket
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return resp.status, data
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+HTTP_POOL = KeepAlivePool()
+
+
+# ---------- local fake venues ----------
+class FakeVenue:
+    """
+    Local JSON venue for exercising the router: GET /quote?symbol=… answers
+    {"symbol", "price", "venue"} after `latency` (+ uniform `jitter`)
+    seconds.  A `fail_rate` share of requests gets HTTP 503, and a
+    `hang_rate` share sleeps `hang` seconds first.  Keep-alive is on, and
+    `connections` counts the TCP connections accepted.
+
+        with FakeVenue("primary", latency=0.05, fail_rate=0.2) as venue:
+            FEED_ROUTER.route([("primary", venue.quote_fn("EURUSD"))])
+    """
+
+    def __init__(self, name: str, latency: float = 0.02, jitter: float = 0.0, fail_rate: float = 0.0,
+                 hang_rate: float = 0.0, hang: float = 5.0, seed: int = 0):
+        self.name = name
+        self.latency, self.jitter = latency, jitter
+        self.fail_rate, self.hang_rate, self.hang = fail_rate, hang_rate, hang
+        self.rng = np.random.default_rng(seed)
+        self.requests = self.connections = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def _handler(self):
+        venue = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True      # headers and body go out as separate writes
+
+            def setup(self):
+                super().setup()
+                with venue._lock:
+                    venue.connections += 1
+
+            def do_GET(self):
+                with venue._lock:
+                    venue.requests += 1
+                    u, j = venue.rng.random(2)
+                    delay = venue.latency + venue.jitter * j
+                    if u < venue.hang_rate:
+                        delay += venue.hang
+                    fail = venue.hang_rate <= u < venue.hang_rate + venue.fail_rate
+                time.sleep(delay)
+                if fail:
+                    body, status = b'{"error": "unavailable"}', 503
+                else:
+                    symbol = urlsplit(self.path).query.partition("symbol=")[2] or "?"
+                    body = json.dumps({"symbol": symbol, "price": 100.0, "venue": venue.name}).encode()
+                    status = 200
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def quote(self, symbol: str, timeout: float = 10.0) -> Optional[dict]:
+        status, body = HTTP_POOL.request("GET", f"{self.url}/quote?symbol={symbol}", timeout=timeout)
+        if status >= 500:
+            raise RuntimeError(f"{self.name} returned HTTP {status}")
+        return json.loads(body)
+
+    def quote_fn(self, symbol: str):
+        return lambda: self.quote(symbol)
+
+    def __enter__(self) -> "FakeVenue":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,219 @@
+# NumPy indicator kernel behind local_indicators(): the whole TA pack from float64 arrays.
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _ema_arr(x: np.ndarray, span: int) -> np.ndarray:
+    """
+    Full EMA series along the last axis, same recursion as
+    Series.ewm(span, adjust=False).  Evaluated in blocks as a scaled
+    cumulative sum, with blocks short enough that r**-k stays below e**20.
+    """
+    a = 2.0 / (span + 1.0)
+    r = 1.0 - a
+    n = x.shape[-1]
+    block = max(1, int(20.0 / -np.log(r)))
+    out = np.empty_like(x)
+    out[..., 0] = x[..., 0]
+    prev = x[..., 0]
+    for start in range(1, n, block):
+        end = min(n, start + block)
+        rk = r ** np.arange(1, end - start + 1)
+        y = rk * (prev[..., None] + a * np.cumsum(x[..., start:end] / rk, axis=-1))
+        out[..., start:end] = y
+        prev = y[..., -1]
+    return out
+
+
+def _diff_arr(x: np.ndarray) -> np.ndarray:
+    """x[t] - x[t-1] with a leading NaN, like Series.diff()."""
+    d = np.empty_like(x)
+    d[..., 0] = np.nan
+    np.subtract(x[..., 1:], x[..., :-1], out=d[..., 1:])
+    return d
+
+
+def _tail_mean(x: np.ndarray, n: int) -> np.ndarray:
+    """Last value of rolling(n).mean(); NaN if fewer than n bars."""
+    if x.shape[-1] < n:
+        return np.full(x.shape[:-1], np.nan)
+    return x[..., -n:].mean(axis=-1)
+
+
+def _tail_std(x: np.ndarray, n: int) -> np.ndarray:
+    """Last value of rolling(n).std() (ddof=1); NaN if fewer than n bars."""
+    if x.shape[-1] < n:
+        return np.full(x.shape[:-1], np.nan)
+    return x[..., -n:].std(axis=-1, ddof=1)
+
+
+def _as_float(v):
+    return v.item() if np.ndim(v) == 0 else v
+
+
+def indicator_pack(high, low, close, volume) -> dict:
+    """
+    Compute the local_indicators() dict from raw arrays in one pass.
+
+    Inputs are float arrays with bars on the last axis.  1-D inputs give
+    plain floats; stacking several series of equal length as rows gives one
+    array per key, so many symbols or timeframes can be scored at once.
+    `volume` only contributes its last bar.
+
+    Only the EMAs need the full history.  Every windowed indicator is
+    evaluated on the tail it depends on, because the pack keeps only the
+    latest value.
+    """
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+    v = np.asarray(volume, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Moving averages / MACD (12-26-9)
+        ema12, ema26 = _ema_arr(c, 12), _ema_arr(c, 26)
+        macd_line = ema12 - ema26
+        macd_sig = _ema_arr(macd_line, 9)
+
+        # Awesome Oscillator (median-price SMA5 – SMA34)
+        median = (h + l) / 2
+        ao = _tail_mean(median, 5) - _tail_mean(median, 34)
+
+        # RSI-14 (simple-average variant, as in the pandas engine)
+        delta = _diff_arr(c)
+        up, dn = np.maximum(delta, 0.0), -np.minimum(delta, 0.0)
+        rs = _tail_mean(up, 14) / _tail_mean(dn, 14)
+        rsi = 100 - 100 / (1 + rs)
+
+        # True range; fmax skips the NaN previous close on the first bar
+        prev_c = np.roll(c, 1, axis=-1)
+        prev_c[..., 0] = np.nan
+        tr = np.fmax(np.fmax(np.abs(h - l), np.abs(h - prev_c)), np.abs(l - prev_c))
+        atr = _tail_mean(tr, 14)
+
+        # CCI-20
+        tp = (h + l + c) / 3
+        cci = (tp[..., -1] - _tail_mean(tp, 20)) / (0.015 * _tail_std(tp, 20))
+
+        # ADX-14: needs the last 14 DX values, each over a 14-bar window
+        if c.shape[-1] >= 27:
+            up_move, down_move = _diff_arr(h), -_diff_arr(l)
+            plus_dm = np.where((up_move > 0) & (up_move > down_move), up_move, 0.0)
+            minus_dm = np.where((down_move > 0) & (down_move > up_move), down_move, 0.0)
+            win = lambda x: sliding_window_view(x[..., -27:], 14, axis=-1).sum(axis=-1)
+            tr14 = win(tr)
+            plus_di = 100 * win(plus_dm) / tr14
+            minus_di = 100 * win(minus_dm) / tr14
+            dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+            adx = dx.mean(axis=-1)
+        else:
+            adx = np.full(c.shape[:-1], np.nan)
+
+        # Bollinger Bands (20-period)
+        bb_basis = _tail_mean(c, 20)
+        bb_std = _tail_std(c, 20)
+
+    return {
+        "price":       _as_float(c[..., -1]),
+        "EMA9":        _as_float(_ema_arr(c, 9)[..., -1]),
+        "EMA21":       _as_float(_ema_arr(c, 21)[..., -1]),
+        "SMA50":       _as_float(_tail_mean(c, 50)),
+        "SMA200":      _as_float(_tail_mean(c, 200)),
+        "MACD.macd":   _as_float(macd_line[..., -1]),
+        "MACD.signal": _as_float(macd_sig[..., -1]),
+        "AO":          _as_float(ao),
+        "RSI":         _as_float(rsi),
+        "CCI20":       _as_float(cci),
+        "ATR":         _as_float(atr),
+        "ADX":         _as_float(adx),
+        "BB.upper":    _as_float(bb_basis + 2 * bb_std),
+        "BB.lower":    _as_float(bb_basis - 2 * bb_std),
+        "volume":      _as_float(v[..., -1]),
+    }
+
+
+def verify_indicator_kernel(df: pd.DataFrame, rtol: float = 1e-8) -> Dict[str, float]:
+    """
+    Compare local_indicators() against the pandas reference on `df` and
+    return the relative error per key.  Raises AssertionError above `rtol`.
+
+    The reference runs on a positional index: with a DatetimeIndex its ADX
+    divides a RangeIndex Series by a DatetimeIndex one and always comes out
+    NaN, while the kernel computes the intended value.
+    """
+    ref = local_indicators_reference(df.reset_index(drop=True))
+    new = local_indicators(df)
+    errors = {}
+    for k, r in ref.items():
+        n = new[k]
+        if np.isnan(r) and np.isnan(n):
+            errors[k] = 0.0
+            continue
+        errors[k] = abs(n - r) / max(abs(r), 1e-12)
+    bad = {k: e for k, e in errors.items() if not e <= rtol}
+    assert not bad, f"indicator kernel mismatch: {bad}"
+    return errors
+
+
+def _roll(x: np.ndarray, n: int, reduce) -> np.ndarray:
+    """rolling(n) reduction along the last axis, NaN for the first n-1 bars."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= n:
+        out[..., n - 1:] = reduce(sliding_window_view(x, n, axis=-1))
+    return out
+
+
+def indicator_arrays(high, low, close, volume) -> dict:
+    """
+    Every indicator_pack() key as a full series: element t is the value the
+    pack gives for the bars up to and including t.  Used by the backtester
+    to evaluate the whole history at once instead of one pack per bar.
+    Bars are on the last axis, as in indicator_pack().
+    """
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+    v = np.asarray(volume, dtype=np.float64)
+    mean = lambda x, n: _roll(x, n, lambda w: w.mean(axis=-1))
+    std = lambda x, n: _roll(x, n, lambda w: w.std(axis=-1, ddof=1))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        macd_line = _ema_arr(c, 12) - _ema_arr(c, 26)
+
+        median = (h + l) / 2
+        delta = _diff_arr(c)
+        rs = mean(np.maximum(delta, 0.0), 14) / mean(-np.minimum(delta, 0.0), 14)
+
+        prev_c = np.roll(c, 1, axis=-1)
+        prev_c[..., 0] = np.nan
+        tr = np.fmax(np.fmax(np.abs(h - l), np.abs(h - prev_c)), np.abs(l - prev_c))
+
+        tp = (h + l + c) / 3
+
+        up_move, down_move = _diff_arr(h), -_diff_arr(l)
+        plus_dm = np.where((up_move > 0) & (up_move > down_move), up_move, 0.0)
+        minus_dm = np.where((down_move > 0) & (down_move > up_move), down_move, 0.0)
+        tr14 = _roll(tr, 14, lambda w: w.sum(axis=-1))
+        plus_di = 100 * _roll(plus_dm, 14, lambda w: w.sum(axis=-1)) / tr14
+        minus_di = 100 * _roll(minus_dm, 14, lambda w: w.sum(axis=-1)) / tr14
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+        bb_basis, bb_std = mean(c, 20), std(c, 20)
+
+        return {
+            "price":       c,
+            "EMA9":        _ema_arr(c, 9),
+            "EMA21":       _ema_arr(c, 21),
+            "SMA50":       mean(c, 50),
+            "SMA200":      mean(c, 200),
+            "MACD.macd":   macd_line,
+            "MACD.signal": _ema_arr(macd_line, 9),
+            "AO":          mean(median, 5) - mean(median, 34),
+            "RSI":         100 - 100 / (1 + rs),
+            "CCI20":       (tp - mean(tp, 20)) / (0.015 * std(tp, 20)),
+            "ATR":         mean(tr, 14),
+            "ADX":         mean(dx, 14),
+            "BB.upper":    bb_basis + 2 * bb_std,
+            "BB.lower":    bb_basis - 2 * bb_std,
+            "volume":      v,
+        }
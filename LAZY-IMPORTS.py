@@ -0,0 +1,178 @@
+# Heavy optional dependencies bound as lazy proxies, plus an import-time budget check for cold starts.
+
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import types
+
+# Imported only on the code path that needs them; a cron run that never
+# takes that path never pays for them.
+HEAVY_MODULES = ("scipy", "yfinance", "tradingview_ta", "sklearn", "openai", "jsonschema")
+
+
+# The scanner's start-up, in load order: every fragment a bar-store sweep
+# runs before its first symbol.  ANALYZE.py and LLM are excerpts here and
+# cannot be executed on their own.
+COLD_START_FILES = (
+    "LAZY-IMPORTS.py", "METRICS.py", "SCAN-ORCHESTRATOR.py", "FEED-ROUTER.py", "TA-CACHE.py",
+    "BAR-STORE.py", "INDICATOR-KERNEL.py", "FEATURE-EXTRACTION.py", "MULTI-VENUE PROCESS.py",
+    "MTF-RESAMPLE.py", "SYMBOL-ROUTING.py", "FEATURE-LOG.py", "ONLINE-WEIGHTS.py", "LLM-CACHE.py",
+    "MARKET-CONTEXT.py", "VBP-PROFILE.py", "ROLLING-ENTROPY.py", "EDGE-SCORING.PY",
+    "PROCESS-SCAN.py", "SIGNAL-HISTORY.py", "SCAN-DAEMON.py",
+)
+# What every fragment expects to be in scope already.
+_COLD_START_PRELUDE = (
+    "import logging, os, sys\n"
+    "import numpy as np, pandas as pd\n"
+    "from datetime import datetime, timezone\n"
+    "from pathlib import Path\n"
+    "from typing import *\n"
+)
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for `import name` that imports on first attribute access.
+
+        yf = LazyModule("yfinance")
+        yf.download(...)            # yfinance is imported here, once
+
+    After the first access the real module's attributes are copied onto
+    the proxy, so later lookups cost a plain attribute read.  Import time
+    is recorded as import_seconds{module=…} in METRICS.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        mod = self.__dict__["_lazy_module"]
+        if mod is not None:
+            return mod
+        with self.__dict__["_lazy_lock"]:
+            mod = self.__dict__["_lazy_module"]
+            if mod is None:
+                t0 = time.perf_counter()
+                mod = importlib.import_module(self.__name__)
+                METRICS.observe("import_seconds", time.perf_counter() - t0, module=self.__name__)
+                self.__dict__.update({k: v for k, v in vars(mod).items() if not k.startswith("__")})
+                self.__dict__["_lazy_module"] = mod
+        return mod
+
+    def __getattr__(self, item: str):
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self.__name__!r}{' (loaded)' if self.loaded else ''}>"
+
+
+class LazyAttr:
+    """`from module import attr` deferred until the attribute is called or inspected."""
+
+    def __init__(self, module: LazyModule, attr: str):
+        self._module, self._attr = module, attr
+
+    def resolve(self):
+        return getattr(self._module, self._attr)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, item: str):
+        return getattr(self.resolve(), item)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._module.__name__}.{self._attr}>"
+
+
+_tradingview_ta = LazyModule("tradingview_ta")
+
+yf = LazyModule("yfinance")                             # fallbacks, bar-store refresh, VIX
+TA_Handler = LazyAttr(_tradingview_ta, "TA_Handler")    # first TradingView request
+TVI = LazyAttr(_tradingview_ta, "Interval")
+scipy_stats = LazyModule("scipy.stats")                 # calc_entropy
+jsonschema = LazyModule("jsonschema")                   # meta-signal validation
+openai = LazyModule("openai")                           # LLM client, only with meta-signals on
+sklearn_ensemble = LazyModule("sklearn.ensemble")       # nightly Random Forest retrain
+
+
+def heavy_modules_loaded() -> List[str]:
+    """HEAVY_MODULES already imported into this process."""
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+def import_profile(code: str, python: str = sys.executable, timeout: float = 120.0) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Run `code` in a fresh interpreter under -X importtime.  Returns the
+    cumulative import seconds of each module imported at top level (not as
+    another module's dependency), and the names of every module imported.
+    """
+    proc = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True,
+                          text=True, timeout=timeout)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import profile failed: {proc.stderr.strip().splitlines()[-1:]}")
+    totals, everything = {}, set()
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if not m:
+            continue
+        everything.add(m.group(3))
+        if len(m.group(2)) == 1:                        # one space of indent: not nested
+            totals[m.group(3)] = totals.get(m.group(3), 0.0) + int(m.group(1)) / 1e6
+    return totals, sorted(everything)
+
+
+def check_import_budget(code: str, budget_s: float = 1.0, forbidden=HEAVY_MODULES,
+                        python: str = sys.executable) -> dict:
+    """
+    Import-time budget for a cold start: run `code` (the scanner's
+    start-up, e.g. cold_start_code()) in a fresh interpreter.  It passes
+    if the imports fit in `budget_s` and none of `forbidden` was imported.
+    Returns the report; `ok` is the verdict.
+
+        report = check_import_budget(cold_start_code())
+        assert report["ok"], report
+    """
+    profile, everything = import_profile(code, python)
+    total = sum(profile.values())
+    loaded = sorted({name.split(".")[0] for name in everything} & set(forbidden))
+    report = {
+        "total_s": round(total, 4),
+        "budget_s": budget_s,
+        "forbidden_loaded": loaded,
+        "slowest": sorted(profile.items(), key=lambda kv: kv[1], reverse=True)[:10],
+        "ok": total <= budget_s and not loaded,
+    }
+    if not report["ok"]:
+        logging.warning(f"import budget exceeded: {report['total_s']}s (budget {budget_s}s), "
+                        f"heavy modules loaded: {loaded or 'none'}")
+    return report
+
+
+def cold_start_code(root: str = ".", files=COLD_START_FILES) -> str:
+    """Code that loads `files` from the checkout at `root` into one namespace, as the scanner starts."""
+    paths = [os.path.join(os.path.abspath(root), f) for f in files]
+    return _COLD_START_PRELUDE + (
+        f"for _path in {paths!r}:\n"
+        f"    exec(compile(open(_path, encoding='utf-8').read(), _path, 'exec'))\n"
+    )
+
+
+def check_cold_start(root: str = ".", budget_s: float = 1.0) -> dict:
+    """check_import_budget() on the scanner's own start-up; raises AssertionError if it fails."""
+    report = check_import_budget(cold_start_code(root), budget_s)
+    assert report["ok"], f"cold start over budget: {report}"
+    return report
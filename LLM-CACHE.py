@@ -0,0 +1,202 @@
+# Content-addressed response cache and in-flight dedup for generate_meta_signal().
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+
+# Quantisation step per prompt input.  Price-denominated fields are steps as a
+# fraction of the current price; oscillators, VIX and probability are absolute.
+META_TOLERANCES = {
+    "price": 0.001, "SMA50": 0.001, "SMA200": 0.001, "EMA9": 0.001, "EMA21": 0.001,
+    "MACD.macd": 0.0005, "MACD.signal": 0.0005, "AO": 0.0005, "ATR": 0.0005,
+    "poc": 0.001, "hvn_low": 0.001, "hvn_high": 0.001,
+    "CCI20": 10.0, "RSI": 1.0, "ADX": 1.0, "vix": 0.5, "probability": 1.0,
+}
+_PRICE_UNIT_FIELDS = {
+    "price", "SMA50", "SMA200", "EMA9", "EMA21", "MACD.macd", "MACD.signal",
+    "AO", "ATR", "poc", "hvn_low", "hvn_high",
+}
+_SIGNALS = {"BUY", "SELL", "HOLD"}
+
+
+def meta_fingerprint(symbol: str, indicators: Dict[str, Any], headlines: list,
+                     multi_summary: str, probability: float,
+                     tolerances: Dict[str, float] = META_TOLERANCES) -> str:
+    """
+    Stable hash of the quantised prompt inputs.  Two snapshots that differ by
+    less than the tolerances (and share headlines and TF summary) map to
+    the same key.
+    """
+    def num(v):
+        v = v.item() if hasattr(v, "item") else v
+        try:
+            return float(v)
+        except (TypeError, ValueError):
+            return float("nan")
+
+    price = num(indicators.get("price", 0)) or 1.0
+    hvn_low, hvn_high = indicators.get("hvn_band", (0, 0))
+    raw = {k: num(indicators.get(k, 0)) for k in META_TOLERANCES if k not in ("hvn_low", "hvn_high", "probability")}
+    raw.update(hvn_low=num(hvn_low), hvn_high=num(hvn_high), probability=num(probability))
+
+    q = {}
+    for k, v in raw.items():
+        step = tolerances[k] * abs(price) if k in _PRICE_UNIT_FIELDS else tolerances[k]
+        q[k] = None if v != v else (round(v / step) if step else v)  # NaN → None
+
+    payload = json.dumps([symbol, q, list(headlines or []), multi_summary], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _valid_trade(signal, price, reason) -> bool:
+    """Same shape _TRADE_SCHEMA enforces on the model's JSON."""
+    return signal in _SIGNALS and isinstance(price, (int, float)) and isinstance(reason, str)
+
+
+class MetaSignalCache:
+    """
+    Caches validated meta-signal responses by meta_fingerprint() and
+    coalesces concurrent identical requests: while one call for a key is in
+    flight, every other caller waits for that result instead of sending its
+    own prompt.
+
+    `backend` is any callable with generate_meta_signal()'s signature and
+    return shape; swap in StubMetaBackend to measure hit rates and latency
+    offline.
+    """
+
+    def __init__(self, backend=None, ttl: float = 900.0, maxsize: int = 4096,
+                 tolerances: Dict[str, float] = META_TOLERANCES):
+        self.backend = backend
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.tolerances = tolerances
+        self._data: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.coalesced = self.invalid = 0
+        self.backend_seconds = 0.0
+
+    def get(self, symbol, indicators, headlines, multi_summary, probability, **kwargs):
+        key = meta_fingerprint(symbol, indicators, headlines, multi_summary, probability, self.tolerances)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._unpack(entry[1])
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result()
+
+        try:
+            t0 = time.perf_counter()
+            result = self.backend(symbol, indicators, headlines, multi_summary, probability, **kwargs)
+            self.backend_seconds += time.perf_counter() - t0
+            signal, price, reason, details = result
+            if _valid_trade(signal, price, reason):
+                self._store(key, {"signal": signal, "price": price, "reason": reason, "details": details})
+            else:
+                self.invalid += 1
+            fut.set_result(result)
+            return result
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _store(self, key: str, response: dict) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), response)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    @staticmethod
+    def _unpack(r: dict):
+        return r["signal"], r["price"], r["reason"], r["details"]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            calls = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "invalid": self.invalid,
+                "hit_rate": (self.hits + self.coalesced) / calls if calls else 0.0,
+                "backend_seconds": round(self.backend_seconds, 3),
+            }
+
+
+class StubMetaBackend:
+    """
+    Offline stand-in for the GPT call: deterministic EMA/MACD rule with an
+    optional fixed latency, returning generate_meta_signal()'s tuple shape.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, symbol, indicators, headlines, multi_summary, probability, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        f = lambda k: float(indicators.get(k, 0) or 0)
+        if f("EMA9") > f("EMA21") and f("MACD.macd") > f("MACD.signal"):
+            signal = "BUY"
+        elif f("EMA9") < f("EMA21") and f("MACD.macd") < f("MACD.signal"):
+            signal = "SELL"
+        else:
+            signal = "HOLD"
+        reason = f"stub: EMA/MACD consensus {signal.lower()} at P={probability:.0f}%"
+        return signal, f("price"), reason, f"stub backend for {symbol}"
+
+
+META_CACHE = MetaSignalCache()
+
+
+def cached_meta_signal(fn):
+    """
+    Route generate_meta_signal() through META_CACHE.  The undecorated
+    function becomes the default backend.  The sweep context's headlines
+    and VIX, which the prompt falls back on, are filled in before the key
+    is computed, so a headline change misses the cache.  A backend that
+    raises RuntimeError (no valid answer) gives HOLD at the current price,
+    which is not cached.
+    """
+    if META_CACHE.backend is None:
+        META_CACHE.backend = fn
+
+    @wraps(fn)
+    def wrapper(symbol, indicators, headlines, multi_summary, probability,
+                ohlcv_df=None, ctx=None, **kwargs):
+        # generate_meta_signal()'s own parameters, so they may be passed positionally too.
+        kwargs.update(ohlcv_df=ohlcv_df, ctx=ctx)
+        if ctx is not None:
+            if not headlines:
+                headlines = list(ctx.headlines)
+            if indicators.get("vix") is None or indicators.get("vix") == 20:
+                indicators = {**indicators, "vix": ctx.vix}
+        try:
+            return META_CACHE.get(symbol, indicators, headlines, multi_summary, probability, **kwargs)
+        except RuntimeError as e:
+            logging.warning(f"meta-signal unavailable for {symbol}: {e}")
+            price = indicators.get("price", 0)
+            return "HOLD", float(price.item() if hasattr(price, "item") else price), "meta-signal unavailable", ""
+    wrapper.uncached = fn
+    return wrapper
@@ -0,0 +1,83 @@
+# Per-sweep market context: VIX, RSS headlines and client sentiment, fetched once and shared.
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+_DEFAULT_VIX = 20.0
+_DEFAULT_SENTIMENT = 50.0
+
+
+@dataclass(frozen=True)
+class MarketContext:
+    """
+    Snapshot of the sweep-wide inputs.  analyze_ticker() and
+    generate_meta_signal() read from it instead of each fetching their own
+    VIX, headline and sentiment, and score with its `weights` rather than
+    the live dynamic_weights, so one sweep is scored with one set of weights.
+    It is frozen, so worker threads can share one instance safely, and
+    small enough to pickle to worker processes.
+    """
+    vix: float = _DEFAULT_VIX
+    headlines: Tuple[str, ...] = ()
+    sentiment: Dict[str, float] = field(default_factory=dict)
+    weights: Dict[str, float] = field(default_factory=dict)
+    fetched_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def top_headline(self) -> str:
+        return self.headlines[0] if self.headlines else ""
+
+    def sentiment_for(self, symbol: str) -> float:
+        return self.sentiment.get(symbol, _DEFAULT_SENTIMENT)
+
+
+def _load_vix() -> float:
+    try:
+        with upstream_slot("yahoo"):
+            hist = yf.Ticker("^VIX").history(period="5d", interval="1d")
+        if not hist.empty:
+            return float(hist["Close"].dropna().iloc[-1])
+    except Exception as e:
+        print(f"VIX fetch error: {e}")
+    return _DEFAULT_VIX
+
+
+def _load_headlines() -> Tuple[str, ...]:
+    try:
+        top = get_top_headline()
+    except Exception as e:
+        logging.warning(f"headline fetch failed: {e}")
+        return ()
+    if not top:
+        return ()
+    return tuple(top) if isinstance(top, (list, tuple)) else (str(top),)
+
+
+def _load_sentiment(symbol: str) -> Optional[float]:
+    try:
+        with upstream_slot("capital"):
+            return float(fetch_client_sentiment(symbol))
+    except Exception as e:
+        logging.warning(f"sentiment fetch failed for {symbol}: {e}")
+        return None
+
+
+def load_market_context(symbols: List[str] = (), max_workers: int = 8) -> MarketContext:
+    """
+    Fetch VIX, headlines and per-symbol client sentiment concurrently and
+    return one MarketContext, together with a copy of the current
+    dynamic_weights.  Failed feeds fall back to the neutral
+    defaults (VIX 20, no headline, sentiment 50), so a sweep never stalls
+    on context.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ctx") as pool:
+        vix = pool.submit(_load_vix)
+        headlines = pool.submit(_load_headlines)
+        sentiment = {sym: pool.submit(_load_sentiment, sym) for sym in dict.fromkeys(symbols)}
+        scores = {sym: f.result() for sym, f in sentiment.items()}
+        return MarketContext(
+            vix=vix.result(),
+            headlines=headlines.result(),
+            sentiment={sym: s for sym, s in scores.items() if s is not None},
+            weights=dict(dynamic_weights or {}),
+        )
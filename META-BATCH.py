@@ -0,0 +1,264 @@
+# Batched meta-signal prompts: N symbols per chat completion, per-element schema validation and retry.
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+META_MODEL = os.getenv("META_MODEL", "gpt-4")
+META_BATCH_SIZE = 25
+
+_BATCH_SYSTEM_PROMPT = (
+    "You are a trading assistant. For every instrument block in the user's JSON "
+    "array, decide BUY, SELL or HOLD from its indicators, timeframe summary and "
+    "headline. Reply with ONLY a JSON array holding one object per instrument, "
+    'in any order: {"symbol": str, "signal": "BUY"|"SELL"|"HOLD", '
+    '"price": number, "reason": str}.'
+)
+
+
+@dataclass
+class MetaRequest:
+    """One symbol's inputs, in generate_meta_signal()'s argument shape."""
+    symbol: str
+    indicators: Dict[str, Any]
+    headlines: list = field(default_factory=list)
+    multi_summary: str = ""
+    probability: float = 0.0
+
+
+def _meta_block(req: MetaRequest) -> dict:
+    """Compact per-symbol block: the prompt inputs rounded to 4 significant digits."""
+    ind = req.indicators
+    f = lambda k, d=0.0: float(to_scalar(ind.get(k, d)) or 0.0)
+    r = lambda x: float(f"{x:.4g}")
+    hvn_low, hvn_high = ind.get("hvn_band", (0, 0))
+    return {
+        "symbol": req.symbol,
+        "price": f("price"),
+        "SMA50": r(f("SMA50")), "SMA200": r(f("SMA200")),
+        "MACD": r(f("MACD.macd")), "MACD_signal": r(f("MACD.signal")),
+        "AO": r(f("AO")), "CCI20": r(f("CCI20")), "RSI": r(f("RSI", 50)),
+        "EMA9": r(f("EMA9")), "EMA21": r(f("EMA21")),
+        "ADX": r(f("ADX")), "ATR": r(f("ATR")), "VIX": r(f("vix", 20)),
+        "PoC": r(f("poc")), "HVN": [r(float(to_scalar(hvn_low))), r(float(to_scalar(hvn_high)))],
+        "P": round(float(req.probability), 1),
+        "TF": req.multi_summary,
+        "headline": req.headlines[0] if req.headlines else "",
+    }
+
+
+def _block_details(block: dict) -> str:
+    return ", ".join(f"{k}: {v}" for k, v in block.items() if k not in ("symbol", "headline"))
+
+
+def chat_completion(messages: List[dict], model: str = META_MODEL, base_url: str = OPENAI_BASE_URL,
+                    api_key: Optional[str] = None, timeout: float = 120.0) -> str:
+    """
+    POST one chat-completions request and return the first choice's text.
+    Any server speaking the OpenAI wire format works (see MockLLMServer).
+    """
+    body = json.dumps({"model": model, "messages": messages, "temperature": 0}).encode()
+    headers = {"Content-Type": "application/json",
+               "Authorization": f"Bearer {api_key or os.getenv('OPENAI_API_KEY', '')}"}
+    with upstream_slot("openai"):
+        status, data = HTTP_POOL.request("POST", f"{base_url.rstrip('/')}/chat/completions",
+                                         body=body, headers=headers, timeout=timeout)
+    if status >= 400:
+        raise RuntimeError(f"chat completion failed: HTTP {status} {data[:200]!r}")
+    return json.loads(data)["choices"][0]["message"]["content"]
+
+
+def _parse_array(text: str) -> list:
+    """JSON array out of a completion, tolerating ```json fences and prose around it."""
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return []
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    return items if isinstance(items, list) else []
+
+
+def _valid_items(items: list, wanted: set) -> Dict[str, dict]:
+    """
+    Elements that name a requested symbol and pass _TRADE_SCHEMA once the
+    symbol is stripped.  The first valid answer per symbol wins.
+    """
+    ok = {}
+    for item in items:
+        if not isinstance(item, dict) or item.get("symbol") not in wanted or item["symbol"] in ok:
+            continue
+        trade = {k: v for k, v in item.items() if k != "symbol"}
+        try:
+            jsonschema.validate(trade, _TRADE_SCHEMA)
+        except jsonschema.ValidationError:
+            continue
+        ok[item["symbol"]] = trade
+    return ok
+
+
+def generate_meta_signals_batch(requests: List[MetaRequest], batch_size: int = META_BATCH_SIZE,
+                                max_retries: int = 2, complete: Callable[[List[dict]], str] = None,
+                                max_workers: int = 4) -> Dict[str, Tuple[str, float, str, str]]:
+    """
+    Meta-signals for many symbols with one completion per `batch_size`
+    symbols.  Batches run concurrently under the "openai" upstream limit.
+
+    Each returned element is validated on its own.  Only symbols that are
+    missing, duplicated or schema-invalid are re-sent, for up to
+    `max_retries` extra rounds.  Symbols still unanswered after that are left
+    out of the result.  Values have generate_meta_signal()'s return shape.
+    """
+    complete = complete or chat_completion
+    blocks = {r.symbol: _meta_block(r) for r in requests}
+    results: Dict[str, Tuple[str, float, str, str]] = {}
+
+    def run(symbols: List[str]) -> Dict[str, dict]:
+        messages = [
+            {"role": "system", "content": _BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": json.dumps([blocks[s] for s in symbols], separators=(",", ":"))},
+        ]
+        try:
+            return _valid_items(_parse_array(complete(messages)), set(symbols))
+        except Exception as e:
+            logging.warning(f"meta batch of {len(symbols)} failed: {e}")
+            return {}
+
+    pending = list(blocks)
+    for attempt in range(max_retries + 1):
+        if not pending:
+            break
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+            for answered in pool.map(run, chunks):
+                for sym, t in answered.items():
+                    results[sym] = (t["signal"], float(t["price"]), t["reason"], _block_details(blocks[sym]))
+        pending = [s for s in pending if s not in results]
+        if pending and attempt < max_retries:
+            logging.info(f"meta batch: retrying {len(pending)} symbol(s)")
+    return results
+
+
+def meta_signal_one(symbol: str, indicators: Dict[str, Any], headlines: list,
+                    multi_summary: str, probability: float, ohlcv_df: Optional[pd.DataFrame] = None,
+                    ctx: Optional["MarketContext"] = None, **kwargs) -> Tuple[str, float, str, str]:
+    """
+    Per-symbol call through the batch path (a batch of one), with
+    generate_meta_signal()'s signature, so it can back META_CACHE.
+    Raises RuntimeError if no valid answer arrives, so the cache does not
+    keep an outage as a HOLD; cached_meta_signal() holds for the caller.
+    """
+    if ctx is not None:
+        indicators = {"vix": ctx.vix, **indicators}
+        headlines = headlines or list(ctx.headlines)
+    req = MetaRequest(symbol, indicators, headlines, multi_summary, probability)
+    res = generate_meta_signals_batch([req], batch_size=1, **kwargs)
+    if symbol not in res:
+        raise RuntimeError(f"no valid meta-signal for {symbol}")
+    return res[symbol]
+
+
+# ---------- local mock server for offline throughput / latency runs ----------
+class MockLLMServer:
+    """
+    Chat-completions server on localhost that answers batch prompts with the
+    EMA/MACD rule StubMetaBackend uses.  Each response costs `latency`
+    seconds plus `per_item` per symbol.  A `corrupt` fraction of elements
+    comes back schema-invalid, to exercise the retry path.
+
+        with MockLLMServer(latency=0.4) as srv:
+            generate_meta_signals_batch(reqs, complete=srv.complete)
+    """
+
+    def __init__(self, latency: float = 0.4, per_item: float = 0.01, corrupt: float = 0.0, seed: int = 0):
+        self.latency, self.per_item, self.corrupt = latency, per_item, corrupt
+        self.rng = np.random.default_rng(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def _answer(self, blocks: list) -> list:
+        out = []
+        for b in blocks:
+            up, macd_up = b["EMA9"] > b["EMA21"], b["MACD"] > b["MACD_signal"]
+            signal = "BUY" if up and macd_up else "SELL" if not up and not macd_up else "HOLD"
+            item = {"symbol": b["symbol"], "signal": signal, "price": b["price"], "reason": "mock"}
+            with self._lock:
+                if self.rng.random() < self.corrupt:
+                    item["signal"] = "MAYBE"
+            out.append(item)
+        return out
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                blocks = json.loads(payload["messages"][-1]["content"])
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency + server.per_item * len(blocks))
+                content = "```json\n" + json.dumps(server._answer(blocks)) + "\n```"
+                body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_address[1]}/v1"
+
+    def complete(self, messages: List[dict]) -> str:
+        return chat_completion(messages, base_url=self.base_url, api_key="mock")
+
+    def __enter__(self) -> "MockLLMServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def benchmark_meta_batch(n_symbols: int = 100, batch_sizes=(1, 10, 25, 50), latency: float = 0.4,
+                         per_item: float = 0.01, corrupt: float = 0.02) -> pd.DataFrame:
+    """
+    Wall time, symbols/s and request count for a synthetic watchlist against
+    MockLLMServer at each batch size.  batch_size=1 is today's one
+    prompt per symbol.
+    """
+    rng = np.random.default_rng(1)
+    reqs = []
+    for i in range(n_symbols):
+        p = float(rng.uniform(10, 5000))
+        ind = {"price": p, "EMA9": p * rng.normal(1, 0.01), "EMA21": p,
+               "MACD.macd": rng.normal(), "MACD.signal": rng.normal(), "RSI": rng.uniform(20, 80)}
+        reqs.append(MetaRequest(f"SYM{i:04d}", ind, ["headline"], "BUY,BUY,SELL,NEUTRAL", 55.0))
+
+    rows = []
+    for bs in batch_sizes:
+        with MockLLMServer(latency, per_item, corrupt) as srv:
+            t0 = time.perf_counter()
+            res = generate_meta_signals_batch(reqs, batch_size=bs, complete=srv.complete)
+            wall = time.perf_counter() - t0
+            rows.append({"batch_size": bs, "wall_s": round(wall, 3), "symbols_per_s": round(len(res) / wall, 1),
+                         "requests": srv.requests, "answered": len(res)})
+    return pd.DataFrame(rows)
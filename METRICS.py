@@ -0,0 +1,186 @@
+# Per-stage latency spans, counters and histograms for the scan pipeline, exportable as Prometheus text or JSON.
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Verbose progress and [DEBUG] output.  Call sites guard with `if DEBUG:`,
+# so when it is off the f-strings are never even built.
+DEBUG = os.getenv("RABIT_DEBUG", "0") == "1"
+
+# Seconds; covers a cached indicator lookup up to a slow GPT round trip.
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)          # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound holding the q-quantile (coarse, Prometheus-style)."""
+        rank, seen = q * self.count, 0
+        for bound, c in zip(self.buckets + (float("inf"),), self.counts):
+            seen += c
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key, extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metrics:
+    """
+    Thread-safe counters and histograms keyed by metric name plus labels.
+
+        with METRICS.span("ohlcv"):
+            df = fetch_ohlcv(symbol)
+        METRICS.inc("skips_total", reason="no_price")
+
+    Spans record into the `stage_seconds` histogram under a `stage` label.
+    Export with to_prometheus() or to_json().
+    """
+
+    def __init__(self, buckets=_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._hists: Dict[str, Dict[tuple, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(self.buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        """Time the body into stage_seconds{stage=…}; exceptions are timed and counted too."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - t0, stage=stage, **labels)
+
+    def timed(self, stage: str):
+        """Decorator form of span() for functions that are one stage."""
+        def deco(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def merge(self, exported: dict) -> None:
+        """Add another instance's to_json() export into this one (e.g. a worker process's)."""
+        with self._lock:
+            for name, series in exported.get("counters", {}).items():
+                mine = self._counters.setdefault(name, {})
+                for s in series:
+                    key = _label_key(s["labels"])
+                    mine[key] = mine.get(key, 0.0) + s["value"]
+            for name, series in exported.get("histograms", {}).items():
+                mine = self._hists.setdefault(name, {})
+                for s in series:
+                    key = _label_key(s["labels"])
+                    hist = mine.get(key)
+                    if hist is None:
+                        hist = mine[key] = _Histogram(self.buckets)
+                    hist.counts = [a + b for a, b in zip(hist.counts, s["buckets"].values())]
+                    hist.sum += s["sum"]
+                    hist.count += s["count"]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._hists.clear()
+
+    # ---------- export ----------
+    def to_prometheus(self, prefix: str = "rabit_") -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for key, v in sorted(series.items()):
+                    lines.append(f"{prefix}{name}{_fmt_labels(key)} {v:g}")
+            for name, series in sorted(self._hists.items()):
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                for key, h in sorted(series.items()):
+                    cum = 0
+                    for bound, c in zip(h.buckets + (float("inf"),), h.counts):
+                        cum += c
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        le_label = f'le="{le}"'
+                        lines.append(f"{prefix}{name}_bucket{_fmt_labels(key, le_label)} {cum}")
+                    lines.append(f"{prefix}{name}_sum{_fmt_labels(key)} {h.sum:.6f}")
+                    lines.append(f"{prefix}{name}_count{_fmt_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        with self._lock:
+            return {
+                "counters": {name: [{"labels": dict(k), "value": v} for k, v in series.items()]
+                             for name, series in self._counters.items()},
+                "histograms": {name: [{"labels": dict(k), "count": h.count, "sum": h.sum,
+                                       "mean": h.sum / h.count if h.count else 0.0,
+                                       "p50": h.quantile(0.5), "p95": h.quantile(0.95),
+                                       "buckets": dict(zip([*map(str, h.buckets), "+Inf"], h.counts))}
+                                      for k, h in series.items()]
+                               for name, series in self._hists.items()},
+            }
+
+    def dump(self, path: str) -> None:
+        """Write the JSON export to `path` (atomic rename)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.to_json(), fh, indent=2, default=str)
+        os.replace(tmp, path)
+
+    def stage_report(self) -> str:
+        """One line per stage, slowest total first, for the end-of-sweep printout."""
+        with self._lock:
+            series = dict(self._hists.get("stage_seconds", {}))
+        rows = sorted(series.items(), key=lambda kv: kv[1].sum, reverse=True)
+        return "\n".join(
+            f"   ↳ {dict(k).get('stage', '?'):<16} n={h.count:<5} total={h.sum:7.2f}s "
+            f"mean={h.sum / h.count * 1000:7.1f}ms p95≤{h.quantile(0.95):g}s"
+            for k, h in rows
+        )
+
+
+METRICS = Metrics()
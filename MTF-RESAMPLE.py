@@ -0,0 +1,216 @@
+# Multi-timeframe bars from one base series: 30m / 1h / 4h are resampled locally from 15m.
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Finest interval the fallbacks fetch; every other TA interval is derived from it.
+BASE_INTERVAL = "15m"
+LOCAL_TA_INTERVALS = ("15m", "30m", "1h", "4h")
+
+_DAY_NS = 86_400 * 10 ** 9
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86_400}
+
+# Session opens (local time, exchange time zone) that intraday bars are cut
+# from.  Anything not listed trades round the clock and is cut on the UTC clock.
+FUTURES_SESSION = ("17:00", "America/Chicago")          # CME Globex, Yahoo "=F" tickers
+EQUITY_SESSIONS = {                                     # Yahoo ticker suffix → session
+    "": ("09:30", "America/New_York"),
+    ".TO": ("09:30", "America/Toronto"),
+    ".L": ("08:00", "Europe/London"),
+    ".DE": ("09:00", "Europe/Berlin"),
+    ".PA": ("09:00", "Europe/Paris"),
+    ".AS": ("09:00", "Europe/Amsterdam"),
+    ".SW": ("09:00", "Europe/Zurich"),
+    ".T": ("09:00", "Asia/Tokyo"),
+    ".HK": ("09:30", "Asia/Hong_Kong"),
+    ".AX": ("10:00", "Australia/Sydney"),
+}
+
+
+def interval_seconds(interval: str) -> int:
+    """'15m' → 900, '1h' / '60m' → 3600, '4h' → 14400, '1d' → 86400."""
+    m = re.fullmatch(r"(\d+)\s*([mhd])", str(interval).strip().lower())
+    if not m:
+        raise ValueError(f"unsupported interval {interval!r}")
+    return int(m.group(1)) * _UNIT_SECONDS[m.group(2)]
+
+
+def session_for(yf_symbol: str) -> Optional[Tuple[str, str]]:
+    """(open, time zone) of the session `yf_symbol` trades in, or None for round-the-clock markets."""
+    yf_symbol = str(yf_symbol)
+    if yf_symbol.endswith("=F"):
+        return FUTURES_SESSION
+    if asset_class(yf_symbol).lower() != "equity":
+        return None
+    suffix = yf_symbol[yf_symbol.rfind("."):] if "." in yf_symbol else ""
+    return EQUITY_SESSIONS.get(suffix, EQUITY_SESSIONS[""])
+
+
+def resample_ohlcv(df: pd.DataFrame, interval: str,
+                   session: Optional[Tuple[str, str]] = None) -> pd.DataFrame:
+    """
+    Aggregate intraday bars into `interval` bars: first Open, max High,
+    min Low, last Close / Adj close, summed Volume.
+
+    Bars are cut from the session open, `session` = ("HH:MM", time zone)
+    as session_for() gives it, so a US equity gets 09:30 / 10:30 … hourly
+    and 09:30 / 13:30 four-hour bars, and CME futures count from 17:00
+    Chicago, the way TradingView and Yahoo cut them.  Without a session
+    the bars are aligned to the UTC clock (round-the-clock markets).  The
+    cut depends only on the clock, never on which bars happen to be
+    present, so a missing bar does not shift the rest of the day.  The
+    last bar may still be forming, as on the live feeds.
+    """
+    step = interval_seconds(interval) * 10 ** 9
+    if step >= _DAY_NS:
+        raise ValueError(f"resample_ohlcv only builds intraday bars, got {interval!r}")
+    df = df[df["Close"].notna()].sort_index()
+    if df.empty:
+        return df
+    idx = pd.DatetimeIndex(df.index)
+    idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    ts = idx.as_unit("ns").asi8
+
+    # Work in exchange wall time, where the session opens at the same
+    # clock time every day, then shift each bar start back to UTC.
+    offset, open_ns = np.zeros_like(ts), 0
+    if session is not None:
+        open_time, tz = session
+        offset = idx.tz_convert(tz).tz_localize(None).as_unit("ns").asi8 - ts
+        open_ns = pd.Timedelta(f"{open_time}:00").value
+    local = ts + offset
+    anchor = (local - open_ns) // _DAY_NS * _DAY_NS + open_ns
+    start = anchor + (local - anchor) // step * step - offset
+    begins = np.flatnonzero(np.r_[True, start[1:] != start[:-1]])
+    ends = np.r_[begins[1:], len(ts)] - 1
+
+    col = lambda name: df[name].to_numpy(dtype=np.float64).reshape(-1)
+    out = {
+        "Open": col("Open")[begins],
+        "High": np.fmax.reduceat(col("High"), begins),
+        "Low": np.fmin.reduceat(col("Low"), begins),
+        "Close": col("Close")[ends],
+    }
+    if "Adj close" in df.columns:
+        out["Adj close"] = col("Adj close")[ends]
+    if "Volume" in df.columns:
+        out["Volume"] = np.add.reduceat(np.nan_to_num(col("Volume")), begins)
+    index = pd.DatetimeIndex(pd.to_datetime(start[begins], unit="ns", utc=True), name=idx.name or "Datetime")
+    return pd.DataFrame(out, index=index)
+
+
+def timeframe_frames(base: pd.DataFrame, intervals=LOCAL_TA_INTERVALS,
+                     base_interval: str = BASE_INTERVAL,
+                     session: Optional[Tuple[str, str]] = None) -> Dict[str, pd.DataFrame]:
+    """{interval: bars} for every interval, the base one as-is and the rest resampled."""
+    return {ivl: base if interval_seconds(ivl) == interval_seconds(base_interval)
+            else resample_ohlcv(base, ivl, session)
+            for ivl in intervals}
+
+
+def indicator_packs(frames: Dict[str, pd.DataFrame]) -> Dict[str, dict]:
+    """
+    local_indicators() for several frames with indicator_pack() calls on
+    stacked rows: frames of equal length share one call, so the usual four
+    timeframes at full lookback cost one pass instead of four.
+    """
+    by_len: Dict[int, List[str]] = {}
+    for ivl, df in frames.items():
+        by_len.setdefault(len(df), []).append(ivl)
+    packs = {}
+    for names in by_len.values():
+        col = lambda name: np.stack([frames[n][name].to_numpy(dtype=np.float64).reshape(-1) for n in names])
+        stacked = indicator_pack(col("High"), col("Low"), col("Close"), col("Volume"))
+        for row, ivl in enumerate(names):
+            packs[ivl] = {k: float(v[row]) for k, v in stacked.items()}
+    return {ivl: packs[ivl] for ivl in frames}
+
+
+class LocalTAPacks:
+    """
+    get_ta()'s fallback TA, built per Yahoo ticker from a single base-interval
+    fetch: every interval in `intervals` is resampled from it and scored in
+    one batched indicator pass.  Concurrent fallbacks for the same ticker
+    (fetch_timeframes asks for all four at once) wait on one build instead
+    of each downloading.  Results are kept for `ttl_fraction` of a base bar,
+    like TA_CACHE.
+    """
+
+    def __init__(self, intervals=LOCAL_TA_INTERVALS, base_interval: str = BASE_INTERVAL,
+                 lookback: int = 200, ttl_fraction: float = 0.25, maxsize: int = 512):
+        self.intervals = tuple(intervals)
+        self.base_interval = base_interval
+        self.lookback = lookback
+        self.ttl = interval_seconds(base_interval) * ttl_fraction
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.builds = self.hits = self.coalesced = 0
+
+    def get(self, yf_symbol: str, interval: str):
+        """
+        _DummyTA for `interval`, or None if Yahoo has no bars for the
+        ticker; intervals outside the derived set are fetched on their own.
+        """
+        secs = interval_seconds(interval)
+        for ivl in self.intervals:
+            if interval_seconds(ivl) == secs:
+                packs = self.packs(yf_symbol)
+                return None if packs is None else packs[ivl]
+        df = local_fetch_ohlcv(yf_symbol, interval)
+        if df is None:
+            return None
+        ind = local_indicators(df)
+        return _DummyTA(ind, local_recommend(ind))
+
+    def packs(self, yf_symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(yf_symbol)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._data.move_to_end(yf_symbol)
+                self.hits += 1
+                return entry[1]
+            fut = self._inflight.get(yf_symbol)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[yf_symbol] = Future()
+                self.builds += 1
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result()
+        try:
+            value = self._build(yf_symbol)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(value)
+            with self._lock:
+                self._data[yf_symbol] = (time.monotonic(), value)
+                self._data.move_to_end(yf_symbol)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(yf_symbol, None)
+
+    def _build(self, yf_symbol: str) -> Optional[Dict[str, Any]]:
+        # All stored sessions, so every derived interval still has `lookback` bars.
+        base = local_fetch_ohlcv(yf_symbol, self.base_interval, lookback=None)
+        if base is None:
+            return None                                   # cached too: no re-download until the TTL
+        frames = {ivl: df.tail(self.lookback) for ivl, df in
+                  timeframe_frames(base, self.intervals, self.base_interval, session_for(yf_symbol)).items()}
+        out = {ivl: _DummyTA(ind, local_recommend(ind)) for ivl, ind in indicator_packs(frames).items()}
+        logging.info(f"↻ Local TA generated for {yf_symbol} ({', '.join(out)}) "
+                     f"from {len(base)} {self.base_interval} bars")
+        return out
+
+
+LOCAL_TA = LocalTAPacks()
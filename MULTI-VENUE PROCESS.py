@@ -1,135 +1,106 @@
-def get_ta(tv_sym: str, exchange: str, screener: str, interval):
+# TradingView commodity names → Yahoo continuous futures, used by get_ta's fallback.
+_FUTURES_YF_ALIAS = {
+    "COPPER": "HG=F",
+    "GOLD":   "GC=F",
+    "SILVER": "SI=F",
+    "PLATINUM":  "PL=F",
+    "PALLADIUM": "PA=F",
+    "ALUMINIUM": "ALI=F",
+    "WHEAT":  "ZW=F",
+}
+
+_BULK_PERIOD = "60d"
+_FEED_TIMEOUT = 30.0        # overall deadline for one FEED_ROUTER call, in seconds
+
+def _tv_analysis(tv_sym: str, exchange: str, screener: str, interval):
     """
-    Try TradingView_TA first. If that returns no indicators,
-    switch to the local indicator engine (via Yahoo) and return
-    a drop-in dummy TA object.
+    One TradingView_TA request.  Returns the analysis, or None if TV failed
+    or had no indicators.
     """
     try:
-        data = TA_Handler(symbol=tv_sym,
-                          exchange=exchange,
-                          screener=screener,
-                          interval=interval).get_analysis()
+        with upstream_slot("tradingview"):
+            data = TA_Handler(symbol=tv_sym,
+                              exchange=exchange,
+                              screener=screener,
+                              interval=interval).get_analysis()
         if data and data.indicators:
             return data
         logging.info(f"TV-TA had no indicators for {tv_sym}@{exchange}/{screener}")
     except Exception as e:
         logging.info(f"TV-TA failed for {tv_sym}@{exchange}/{screener}: {e}")
+    return None
+
+def get_ta(tv_sym: str, exchange: str, screener: str, interval):
+    """
+    Try TradingView_TA first (through TA_CACHE). If that returns no indicators,
+    switch to the local indicator engine (via Yahoo) and return
+    a drop-in dummy TA object.
 
-    # Fallback: use Yahoo data for continuous futures ('=F') if needed
-    yf_sym = {
-        "COPPER": "HG=F",
-        "GOLD":   "GC=F",
-        "SILVER": "SI=F",
-        "PLATINUM":  "PL=F",
-        "PALLADIUM": "PA=F",
-        "ALUMINIUM": "ALI=F",
-        "WHEAT":  "ZW=F",
-    }.get(tv_sym.upper(), tv_sym)
+    A fresh or stale TA_CACHE entry is returned directly (a stale one is
+    refreshed in the background), outside the router, so TradingView's
+    latency sample and hedge delay only ever see real requests.  On a
+    miss FEED_ROUTER picks the venue: the fallback starts as soon as TradingView fails,
+    when TradingView is slower than its p95, or at once while its breaker
+    is open.  A ticker Yahoo has no bars for answers None, which is not held
+    against Yahoo's breaker; nothing answering within _FEED_TIMEOUT raises.
+    """
+    key = (tv_sym, exchange, screener, interval)
+    tv = lambda: _tv_analysis(tv_sym, exchange, screener, interval)
+    data = TA_CACHE.cached(key, tv)
+    if data is not None:
+        return data
+
+    # Fallback: use Yahoo data for continuous futures ('=F') if needed.
+    # LOCAL_TA fetches the base interval once per ticker and derives the
+    # other timeframes from it, so the four fallbacks share one download.
+    yf_sym = SYMBOL_ROUTES.ta_ticker(tv_sym)
+
+    def local():
+        METRICS.inc("ta_fallback_total", source="yahoo")
+        return LOCAL_TA.get(yf_sym, _YF_INTERVAL[interval])
 
     try:
-        df   = local_fetch_ohlcv(yf_sym, _YF_INTERVAL[interval])
-        ind  = local_indicators(df)
-        reco = local_recommend(ind)
-        logging.info(f"↻ Local TA generated for {tv_sym} ({yf_sym}) [{reco}]")
-        return _DummyTA(ind, reco)
-    except Exception as e:
+        return FEED_ROUTER.route([
+            ("tradingview", lambda: TA_CACHE.get(key, tv)),
+            ("yahoo", local),
+        ], timeout=_FEED_TIMEOUT)
+    except RuntimeError as e:
+        METRICS.inc("ta_fallback_errors_total", source="yahoo")
         raise RuntimeError(f"Local TA failed for {tv_sym}: {e}")
 
 def local_fetch_ohlcv(yf_symbol: str, interval: str, lookback=200):
     """
     Returns a DataFrame with OHLCV data as used by the local indicator engine.
     Uses a shorter period for equities versus futures/commodities.
+    lookback=None returns the whole period.  None if Yahoo has no bars.
     """
     period = "30d" if asset_class(yf_symbol).lower() == "equity" else "60d"
-    hist = yf.download(
-        yf_symbol,
-        period   = period,
-        interval = interval,
-        progress = False,
-        auto_adjust = False
-    )
+    stored = BAR_STORE.read(yf_symbol, interval, period)
+    if stored is not None:
+        return stored if lookback is None else stored.tail(lookback)
+    with upstream_slot("yahoo"):
+        hist = yf.download(
+            yf_symbol,
+            period   = period,
+            interval = interval,
+            progress = False,
+            auto_adjust = False
+        )
     if hist.empty:
-        raise RuntimeError(f"no Yahoo data for {yf_symbol}/{interval}")
+        logging.info(f"no Yahoo data for {yf_symbol}/{interval}")
+        return None
     hist.rename(columns=str.capitalize, inplace=True)  # e.g. Open, High, etc.
-    return hist.tail(lookback)
+    return hist if lookback is None else hist.tail(lookback)
 
 def local_indicators(df: pd.DataFrame) -> dict:
     """
     Computes key technical indicators from OHLCV data.
     Uses moving averages, MACD, RSI, ATR, CCI, ADX, and Bollinger Bands
-    to build a full indicator pack.
-    """
-    close = df["Close"].squeeze()
-    high = df["High"].squeeze()
-    low = df["Low"].squeeze()
-
-    # Moving averages
-    ema9   = _ema(close, 9).iloc[-1].item()
-    ema21  = _ema(close, 21).iloc[-1].item()
-    sma50  = _sma(close, 50).iloc[-1].item()
-    sma200 = _sma(close, 200).iloc[-1].item()
-
-    # MACD (12-26-9)
-    macd_line   = _ema(close, 12) - _ema(close, 26)
-    macd_sig    = _ema(macd_line, 9)
-    macd        = macd_line.iloc[-1].item()
-    macd_signal = macd_sig.iloc[-1].item()
-
-    # Awesome Oscillator
-    median = (high + low) / 2
-    ao = _sma(median, 5).iloc[-1].item() - _sma(median, 34).iloc[-1].item()
-
-    # RSI-14
-    delta = close.diff()
-    up, dn = delta.clip(lower=0), -delta.clip(upper=0)
-    rs = _sma(up, 14) / _sma(dn, 14)
-    rsi = 100 - 100 / (1 + rs.iloc[-1].item())
-
-    # ATR-14 (Wilder)
-    tr = pd.concat([
-        (high - low).abs(),
-        (high - close.shift()).abs(),
-        (low - close.shift()).abs()
-    ], axis=1).max(axis=1)
-    atr = tr.rolling(14).mean().iloc[-1].item()
-
-    # CCI-20
-    tp  = (high + low + close) / 3
-    cci = (tp - tp.rolling(20).mean()) / (0.015 * tp.rolling(20).std())
-    cci = cci.iloc[-1].item()
-
-    # ADX-14
-    plus_dm  = np.where((high.diff() > 0) & (high.diff() > -low.diff()), high.diff(), 0)
-    minus_dm = np.where((-low.diff() > 0) & (-low.diff() > high.diff()), -low.diff(), 0)
-    tr14  = tr.rolling(14).sum()
-    plus_di = 100 * (pd.Series(plus_dm).rolling(14).sum() / tr14)
-    minus_di = 100 * (pd.Series(minus_dm).rolling(14).sum() / tr14)
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(14).mean().iloc[-1].item()
-
-    # Bollinger bands
-    bb_basis = close.rolling(20).mean().iloc[-1].item()
-    bb_std   = close.rolling(20).std().iloc[-1].item()
-    bb_upper = bb_basis + 2 * bb_std
-    bb_lower = bb_basis - 2 * bb_std
-
-    return {
-        "price":       close.iloc[-1].item(),
-        "EMA9":        ema9,
-        "EMA21":       ema21,
-        "SMA50":       sma50,
-        "SMA200":      sma200,
-        "MACD.macd":   macd,
-        "MACD.signal": macd_signal,
-        "AO":          ao,
-        "RSI":         rsi,
-        "CCI20":       cci,
-        "ATR":         atr,
-        "ADX":         adx,
-        "BB.upper":    bb_upper,
-        "BB.lower":    bb_lower,
-        "volume":      df["Volume"].iloc[-1].item(),
-    }
+    to build a full indicator pack.  The maths runs in indicator_pack()
+    on contiguous float64 arrays.
+    """
+    col = lambda name: df[name].to_numpy(dtype=np.float64).reshape(-1)  # (n,) or yfinance's (n, 1)
+    return indicator_pack(col("High"), col("Low"), col("Close"), col("Volume"))
 
 def convert_to_yf_symbol(symbol: str) -> str:
     """
@@ -157,13 +128,22 @@ def fetch_ohlcv(symbol, resolution="HOUR"):
     Attempts to retrieve data via Capital.com (omitted here) and falls back to yfinance.
     """
     symbol = str(symbol)
-    epic = lookup_epic(symbol)
+    if SHARED_BARS is not None:                 # process-pool worker: the parent fetched it already
+        shared = SHARED_BARS.get(symbol, resolution)
+        if shared is not None:
+            METRICS.inc("ohlcv_source_total", source="shared")
+            return shared
+    route = SYMBOL_ROUTES.get(symbol)
+    epic = route.epic
     if not epic:
-        print(f"❌ No EPIC for {symbol}")
+        METRICS.inc("ohlcv_source_total", source="no_epic")
+        if DEBUG:
+            print(f"❌ No EPIC for {symbol}")
         return pd.DataFrame()  # Return empty DataFrame if no EPIC found
 
     # Fallback to yfinance:
-    print(f"⚠️ Falling back to yfinance for {symbol} with {resolution} resolution")
+    if DEBUG:
+        print(f"⚠️ Falling back to yfinance for {symbol} with {resolution} resolution")
     try:
         interval_map = {
             "MINUTE_15": "15m",
@@ -172,17 +152,106 @@ def fetch_ohlcv(symbol, resolution="HOUR"):
             "HOUR_4": "4h"
         }
         yf_interval = interval_map.get(resolution, "1h")
-        ohlcv_df = yf.download(
-            convert_to_yf_symbol(symbol),
-            period="5d",
-            interval=yf_interval,
-            progress=False,
-            auto_adjust=False
-        )
-        if ohlcv_df.empty:
+        # Always the base interval, resampled here, so the bar store and the
+        # prefetch only ever hold one series per ticker.
+        derive = lambda df: df if yf_interval == BASE_INTERVAL else \
+            resample_ohlcv(df, yf_interval, session_for(route.yf_ticker))
+        stored = BAR_STORE.read(route.yf_ticker, BASE_INTERVAL, "5d")
+        if stored is not None:
+            METRICS.inc("ohlcv_source_total", source="bar_store")
+            return derive(stored)
+        METRICS.inc("ohlcv_source_total", source="yahoo")
+
+        def download():
+            with upstream_slot("yahoo"):
+                df = yf.download(
+                    route.yf_ticker,
+                    period="5d",
+                    interval=BASE_INTERVAL,
+                    progress=False,
+                    auto_adjust=False
+                )
+            return None if df.empty else df
+
+        # Through the router for Yahoo's breaker: while it is open this fails fast.
+        try:
+            ohlcv_df = FEED_ROUTER.route([("yahoo", download)], hedge=False, timeout=_FEED_TIMEOUT)
+        except RuntimeError:
             raise RuntimeError(f"no data from yfinance for {symbol}")
         ohlcv_df.rename(columns=lambda x: x.capitalize(), inplace=True)
-        return ohlcv_df
+        return derive(ohlcv_df)
     except Exception as e:
-        print(f"❌ yfinance OHLCV error for {symbol}: {e}")
-        raise RuntimeError(f"Unable to fetch OHLCV data for {symbol}")
\ No newline at end of file
+        METRICS.inc("ohlcv_errors_total", source="yahoo")
+        logging.warning(f"yfinance OHLCV error for {symbol}: {e}")
+        raise RuntimeError(f"Unable to fetch OHLCV data for {symbol}")
+
+def fetch_ohlcv_bulk(yf_tickers: List[str], intervals=("1h",), period: str = _BULK_PERIOD,
+                     chunk: int = 100, start=None) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    Download many Yahoo tickers with one multi-ticker request per interval
+    (per `chunk` tickers) and split the result into per-ticker frames.
+    Pass `start` instead of `period` to fetch only a tail.
+    Returns {(ticker, interval): DataFrame}; tickers Yahoo had nothing for
+    are simply absent.
+    """
+    span = {"start": start} if start is not None else {"period": period}
+    tickers = list(dict.fromkeys(yf_tickers))
+    frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+    for interval in intervals:
+        for i in range(0, len(tickers), chunk):
+            batch = tickers[i:i + chunk]
+            try:
+                with upstream_slot("yahoo"):
+                    raw = yf.download(
+                        batch,
+                        interval=interval,
+                        group_by="ticker",
+                        progress=False,
+                        auto_adjust=False,
+                        threads=True,
+                        **span,
+                    )
+            except Exception as e:
+                logging.warning(f"bulk Yahoo download failed ({interval}, {len(batch)} tickers): {e}")
+                continue
+            frames.update(_split_bulk_frame(raw, batch, interval))
+    return frames
+
+def _split_bulk_frame(raw: pd.DataFrame, tickers: List[str], interval: str) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    Split a group_by="ticker" download into flat per-ticker OHLCV frames.
+    """
+    out: Dict[Tuple[str, str], pd.DataFrame] = {}
+    if raw is None or raw.empty:
+        return out
+    multi = isinstance(raw.columns, pd.MultiIndex)
+    present = set(raw.columns.get_level_values(0)) if multi else set(tickers[:1])
+    for t in tickers:
+        if t not in present:
+            continue
+        df = raw[t] if multi else raw
+        df = df.dropna(how="all")
+        if df.empty:
+            continue
+        out[(t, interval)] = df.rename(columns=str.capitalize)
+    return out
+
+def prefetch_ohlcv(symbols: List[str], intervals=None,
+                   period: str = _BULK_PERIOD) -> int:
+    """
+    Bring the bar store up to date for every Yahoo frame a sweep over
+    `symbols` can ask for: the fetch_ohlcv ticker and get_ta's fallback
+    ticker, at the base interval (the other TA intervals are resampled
+    from it).  Only bars newer than what is stored are downloaded.
+    Returns the number of keys updated.
+    """
+    intervals = intervals or (BASE_INTERVAL,)
+    tickers = []
+    for sym in symbols:
+        route = SYMBOL_ROUTES.get(sym)
+        tickers += [route.yf_ticker, route.ta_yf_ticker]
+    if BAR_STORE.offline:
+        return 0
+    updated = BAR_STORE.refresh_many(tickers, intervals, period)
+    logging.info(f"bar store: refreshed {updated} OHLCV keys for {len(symbols)} symbols")
+    return updated
@@ -0,0 +1,200 @@
+# Online learning of dynamic_weights from labelled outcomes, with versioned weight snapshots.
+
+import json
+import os
+
+
+def directional_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Mask of feature-log rows that carry a trade direction: "bullish" or
+    "bearish", with the TF vote not tied (older logs wrote ties as "bearish").
+    """
+    mask = df["direction"].astype(str).isin(("bullish", "bearish"))
+    if "tf_buys" in df and "tf_sells" in df:
+        mask &= df["tf_buys"] != df["tf_sells"]
+    return mask.to_numpy()
+
+
+class OnlineWeightLearner:
+    """
+    Streaming logistic regression on calculate_trade_probability()'s own model:
+
+        logit = bias + w_adx·f_adx + s(f_adx)·Σ w_i·f_i
+
+    The logit is linear in the weights, so every labelled row is one SGD step
+    over seven numbers.  Retrain cost depends on the new rows only, never on
+    the size of the history.  Features come from the batch scorer, so the
+    learner fits exactly the vector production scores.
+
+    The bias stays at the production default unless `learn_bias` is set,
+    and weights are pulled gently (`l2`) toward the prior they were
+    warm-started from.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, bias: float = 0.1,
+                 lr: float = 0.5, l2: float = 1e-3, decay: float = 1e-4,
+                 nonneg: bool = True, learn_bias: bool = False, seen: int = 0):
+        self.w = np.array([_resolve_weights(weights)[k] for k in WEIGHT_KEYS], dtype=np.float64)
+        self.prior = self.w.copy()
+        self.bias = bias
+        self.lr, self.l2, self.decay = lr, l2, decay
+        self.nonneg = nonneg
+        self.learn_bias = learn_bias
+        self.seen = seen
+
+    @property
+    def weights(self) -> Dict[str, float]:
+        return {k: float(v) for k, v in zip(WEIGHT_KEYS, self.w)}
+
+    def _design(self, f: Dict[str, np.ndarray]) -> np.ndarray:
+        """N×7 effective inputs: f_adx, then s·f_i for the scaled features."""
+        s = np.clip(1 + (f["adx"] - 0.5), 0.5, 1.5)
+        return np.column_stack([f["adx"]] + [s * f[k] for k in WEIGHT_KEYS[1:]])
+
+    def partial_fit(self, indicators, direction, success, buys=None, sells=None, n_votes=None,
+                    batch: int = 32) -> float:
+        """
+        Take SGD steps over newly labelled rows (mini-batches of `batch`).
+        Arguments mirror calculate_trade_probability_batch(); `success` is
+        0/1 per row.  Returns the mean log-loss seen before each step.
+        """
+        X = self._design(_batch_features(indicators, direction, buys, sells, n_votes))
+        y = np.asarray(success, dtype=np.float64)
+        keep = np.isfinite(X).all(axis=1) & np.isfinite(y)
+        X, y = X[keep], y[keep]
+
+        losses = []
+        for i in range(0, len(y), batch):
+            xb, yb = X[i:i + batch], y[i:i + batch]
+            p = 1.0 / (1.0 + np.exp(-(self.bias + xb @ self.w)))
+            losses.append(-np.mean(yb * np.log(p + 1e-12) + (1 - yb) * np.log(1 - p + 1e-12)))
+            err = p - yb
+            lr_t = self.lr / (1.0 + self.decay * self.seen)
+            self.w -= lr_t * (xb.T @ err / len(yb) + self.l2 * (self.w - self.prior))
+            if self.learn_bias:
+                self.bias -= lr_t * err.mean()
+            if self.nonneg:
+                np.maximum(self.w, 0.0, out=self.w)
+            self.seen += len(yb)
+        return float(np.mean(losses)) if losses else float("nan")
+
+    def partial_fit_frame(self, df: pd.DataFrame, batch: int = 32) -> float:
+        """
+        partial_fit() on labelled feature-log rows (direction, tf_buys,
+        tf_sells, tf_votes and success columns, as analyze_ticker logs them).
+        Rows without a direction are skipped: "neutral" ones, and tied votes
+        logged as "bearish" before ties were marked.
+        """
+        df = df[directional_rows(df)]
+        return self.partial_fit(df, df["direction"].to_numpy(), df["success"].to_numpy(),
+                                df.get("tf_buys"), df.get("tf_sells"), df.get("tf_votes"), batch=batch)
+
+    def observe(self, indicators: Dict[str, float], direction: str,
+                tf_summary_votes: Optional[List[str]], success: int) -> float:
+        """One labelled outcome, in calculate_trade_probability()'s argument shape."""
+        buys, sells, n = tf_vote_counts([tf_summary_votes])
+        frame = {k: np.array([indicators.get(k, d)], dtype=np.float64) for k, d in BATCH_INDICATORS.items()}
+        return self.partial_fit(frame, [direction], [success], buys, sells, n, batch=1)
+
+
+class WeightStore:
+    """
+    Versioned dynamic_weights snapshots: <root>/v000001.json, … plus a
+    CURRENT pointer.  Files are written to a temp name and renamed, so
+    readers (running scanners) always load a complete snapshot.
+    """
+
+    def __init__(self, root: str = "weights", keep: int = 50):
+        self.root = Path(root)
+        self.keep = keep
+
+    def _atomic_write(self, path: Path, text: str) -> None:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(text)
+        os.replace(tmp, path)
+
+    def current_version(self) -> Optional[int]:
+        try:
+            return int((self.root / "CURRENT").read_text().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def load(self, version: Optional[int] = None) -> Optional[dict]:
+        version = self.current_version() if version is None else version
+        if version is None:
+            return None
+        return json.loads((self.root / f"v{version:06d}.json").read_text())
+
+    def publish(self, weights: Dict[str, float], bias: float, meta: Optional[dict] = None) -> int:
+        """
+        Write a new snapshot, point CURRENT at it and prune old versions.
+        Returns the new version number.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = (self.current_version() or 0) + 1
+        snap = {
+            "version": version,
+            "published_at": datetime.now(timezone.utc).isoformat(),
+            "weights": weights,
+            "bias": bias,
+            "meta": meta or {},
+        }
+        self._atomic_write(self.root / f"v{version:06d}.json", json.dumps(snap, indent=2))
+        self._atomic_write(self.root / "CURRENT", str(version))
+        for old in sorted(self.root.glob("v*.json"))[:-self.keep]:
+            old.unlink(missing_ok=True)
+        return version
+
+
+WEIGHT_STORE = WeightStore()
+_loaded_weights_version: Optional[int] = None
+
+
+def learner_from_store(store: WeightStore = WEIGHT_STORE, **kwargs) -> OnlineWeightLearner:
+    """
+    Warm-start a learner from the current snapshot (or the static weights).
+    """
+    snap = store.load()
+    if snap is None:
+        return OnlineWeightLearner(**kwargs)
+    return OnlineWeightLearner(snap["weights"], bias=snap["bias"],
+                               seen=snap["meta"].get("seen", 0), **kwargs)
+
+
+def update_weights_from_outcomes(labelled: pd.DataFrame, store: WeightStore = WEIGHT_STORE) -> Optional[int]:
+    """
+    Fold newly labelled feature-log rows into the current weights and
+    publish a new snapshot.  Rows at or before the snapshot's
+    `trained_through` timestamp are skipped, so calling this repeatedly on
+    overlapping windows never double-counts an outcome.
+    """
+    snap = store.load()
+    through = snap["meta"].get("trained_through") if snap else None
+    if through is not None:
+        labelled = labelled[labelled["timestamp"] > pd.Timestamp(through)]
+    if labelled.empty:
+        return None
+    learner = learner_from_store(store)
+    loss = learner.partial_fit_frame(labelled.sort_values("timestamp"))
+    return store.publish(learner.weights, learner.bias, meta={
+        "seen": learner.seen,
+        "rows": int(len(labelled)),
+        "log_loss": loss,
+        "trained_through": labelled["timestamp"].max().isoformat(),
+    })
+
+
+def refresh_dynamic_weights(store: WeightStore = WEIGHT_STORE) -> bool:
+    """
+    Swap the newest published snapshot into `dynamic_weights`.  Rebinding
+    the global is atomic, so a scanner thread mid-analysis keeps the dict
+    it already read.  Returns True if the weights changed.
+    """
+    global dynamic_weights, _loaded_weights_version
+    version = store.current_version()
+    if version is None or version == _loaded_weights_version:
+        return False
+    dynamic_weights = dict(store.load(version)["weights"])
+    _loaded_weights_version = version
+    logging.info(f"dynamic_weights → v{version}")
+    return True
@@ -0,0 +1,290 @@
+# Outcome labelling for the feature log: did each logged signal hit its ATR take-profit or stop-loss first?
+
+import json
+import os
+import time
+
+
+def first_touch_from(high: np.ndarray, low: np.ndarray, start: np.ndarray, side: np.ndarray,
+                     tp: np.ndarray, sl: np.ndarray, horizon: int,
+                     chunk: int = 25_000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    _first_touch() for trades opened at arbitrary bars: row i watches bars
+    start[i] … start[i] + horizon - 1.  Several symbols can share one
+    concatenated high/low array as long as each is followed by `horizon`
+    NaN bars, so no window runs into the next symbol.
+
+    Returns outcome +1 (TP), -1 (SL), 0 (timed out) or NaN (bars end
+    before the horizon does), and bars held.  A bar that spans both
+    levels counts as SL.
+    """
+    n = len(start)
+    outcome, held = np.full(n, np.nan), np.full(n, np.nan)
+    # Short trades are long trades on the mirrored series: row 0 is the
+    # favourable extreme (high / -low), row 1 the adverse one (low / -high).
+    fav, adv = np.stack([high, -low]), np.stack([low, -high])
+    steps = np.arange(horizon)
+    never = horizon + 1
+    for s in range(0, n, chunk):
+        at = slice(s, s + chunk)
+        idx = start[at, None] + steps
+        row = (side[at] < 0).astype(np.intp)[:, None]
+        sign = np.where(side[at] < 0, -1.0, 1.0)[:, None]
+        hit_tp = fav[row, idx] >= sign * tp[at, None]
+        adverse = adv[row, idx]
+        hit_sl = adverse <= sign * sl[at, None]
+        t_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), never)
+        t_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), never)
+        out = np.where(t_sl <= t_tp, np.where(t_sl < never, -1.0, 0.0), 1.0)
+        out[(out == 0) & np.isnan(adverse[:, -1])] = np.nan
+        outcome[at] = out
+        held[at] = np.minimum(np.minimum(t_tp, t_sl) + 1, horizon)
+    held[np.isnan(outcome)] = np.nan
+    return outcome, held
+
+
+def _resolves_at(t: np.ndarray, ts: np.ndarray, first: np.ndarray, horizon: int, step: int,
+                 session: Optional[Tuple[str, str]]) -> np.ndarray:
+    """
+    When the horizon of trades logged at `ts` and starting at bar `first`
+    (indices into the bar times `t`; all ns) closes: the close of its last
+    bar where the bars reach it.  The rest is projected on the symbol's
+    calendar from the last stored bar, or from `ts` if that is later: at
+    one bar per `step` round the clock, or for a session market
+    (session_for()) at the bars per session seen in `t`, one session per
+    business day.
+    """
+    last = np.minimum(first + horizon - 1, len(t) - 1)
+    out = t[last] + step
+    remaining = first + horizon - 1 - last
+    beyond = remaining > 0
+    if not beyond.any():
+        return out
+    base = np.maximum(t[-1] + step, ts)              # the first bar not stored yet opens here
+    if session is None:
+        out[beyond] = base[beyond] + remaining[beyond] * step
+        return out
+    open_at, tz = session
+    local = pd.DatetimeIndex(t).tz_localize("UTC").tz_convert(tz).tz_localize(None) - pd.Timedelta(f"{open_at}:00")
+    per_session = max(float(np.median(np.unique(local.normalize().asi8, return_counts=True)[1])), 1.0)
+    days = np.ceil(remaining / per_session).astype(np.int64)
+    for d in np.unique(days[beyond]):
+        at = beyond & (days == d)
+        out[at] = (pd.DatetimeIndex(base[at] - step).tz_localize("UTC") + pd.offsets.BDay(int(d))).asi8 + step
+    return out
+
+
+def label_signals(signals: pd.DataFrame, bars: Dict[str, pd.DataFrame],
+                  params: Optional["BacktestParams"] = None,
+                  sessions: Optional[Dict[str, Tuple[str, str]]] = None) -> pd.DataFrame:
+    """
+    Label feature-log rows against forward bars.
+
+    `signals` needs timestamp, symbol, price, ATR and direction.  `bars`
+    maps symbol → OHLCV (any symbol missing is left unlabelled).  Rows
+    without a trade direction (directional_rows()) are left unlabelled.  A
+    signal enters at its logged price.  The TP sits `tp_atr` ATRs away in
+    its direction, the SL `sl_atr` ATRs against it, and both are watched
+    for `horizon` bars from the first bar opening at or after the signal.
+    These are the exit terms backtest_frame() uses.
+
+    Returns one row per signal: outcome (+1 / -1 / 0, NaN if it cannot be
+    decided), success (1 on TP, else 0), bars_held, `pending` (undecided
+    only because the bars end too early) and `resolves_at`, when the
+    horizon closes on the symbol's bar calendar (_resolves_at(); `sessions`
+    maps symbol → session_for(), missing means round the clock).
+    """
+    p = params or BacktestParams()
+    sessions = sessions or {}
+    n = len(signals)
+    stamps = pd.DatetimeIndex(signals["timestamp"])
+    ts = stamps.as_unit("ns").asi8
+    symbols = signals["symbol"].astype(str).to_numpy()
+    step = interval_seconds(BASE_INTERVAL) * 10 ** 9
+    resolves_at = ts + p.horizon * step
+
+    highs, lows = [], []
+    start = np.zeros(n, dtype=np.int64)
+    covered = np.zeros(n, dtype=bool)
+    pad = np.full(p.horizon, np.nan)
+    offset = 0
+    for sym, rows in pd.Series(np.arange(n)).groupby(symbols):
+        df = bars.get(sym)
+        if df is None or df.empty:
+            continue
+        t = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+        rows = rows.to_numpy()
+        first = np.searchsorted(t, ts[rows], side="left")
+        start[rows] = offset + first
+        covered[rows] = ts[rows] >= t[0]             # older than the stored history: cannot tell
+        resolves_at[rows] = _resolves_at(t, ts[rows], first, p.horizon, step, sessions.get(sym))
+        highs += [df["High"].to_numpy(dtype=np.float64).reshape(-1), pad]
+        lows += [df["Low"].to_numpy(dtype=np.float64).reshape(-1), pad]
+        offset += len(t) + p.horizon
+
+    # Rows without bars point into a trailing block of NaNs.
+    start[~covered] = offset
+    high, low = np.concatenate([*highs, pad]), np.concatenate([*lows, pad])
+    price = pd.to_numeric(signals["price"], errors="coerce").to_numpy(dtype=np.float64)
+    atr = pd.to_numeric(signals["ATR"], errors="coerce").to_numpy(dtype=np.float64)
+    directional = directional_rows(signals)
+    side = np.where(signals["direction"].astype(str).to_numpy() == "bullish", 1.0, -1.0)
+    tp = price + side * p.tp_atr * atr
+    sl = price - side * p.sl_atr * atr
+    outcome, held = first_touch_from(high, low, start, side, tp, sl, p.horizon)
+    decidable = covered & directional & (price > 0) & (atr > 0)
+    outcome[~decidable] = np.nan
+
+    out = pd.DataFrame({
+        "timestamp": stamps,
+        "symbol": symbols,
+        "outcome": outcome,
+        "success": np.where(outcome > 0, 1.0, np.where(np.isnan(outcome), np.nan, 0.0)),
+        "bars_held": held,
+        "pending": decidable & np.isnan(outcome),
+        "resolves_at": pd.to_datetime(resolves_at, unit="ns", utc=True),
+    })
+    return out.set_axis(signals.index)
+
+
+class OutcomeLabeller:
+    """
+    Incremental labelling of the feature log into `root` (label parts laid
+    out like the feature log itself).
+
+    Each run() reads only feature rows logged after the watermark whose
+    horizon has closed by `now`, labels them in one vectorised pass against
+    the bar store, and writes the labels as new immutable parts.  Each
+    symbol's rows are committed in timestamp order: a row whose bars have
+    not arrived yet holds back itself and the later rows of its symbol
+    until they do, or until `max_wait` past its resolves_at has passed,
+    after which it is given up on.  Other symbols carry on.  Watermarks
+    (one shared floor, plus one per symbol ahead of it) therefore only
+    move forward over rows that are settled, and a label is never written
+    twice.
+    """
+
+    def __init__(self, root: str = "rl_labels", features_root: str = "rl_features",
+                 params: Optional["BacktestParams"] = None, max_wait: float = 3 * 86_400):
+        self.root = Path(root)
+        self.features_root = features_root
+        self.params = params or BacktestParams()
+        self.max_wait = max_wait
+        self._writer = FeatureLogWriter(root)
+
+    # ---------- watermark ----------
+    @property
+    def _state_path(self) -> Path:
+        return self.root / "_STATE.json"
+
+    def _state(self) -> Tuple[Optional[pd.Timestamp], Dict[str, pd.Timestamp]]:
+        try:
+            state = json.loads(self._state_path.read_text())
+            floor = pd.Timestamp(state["labelled_through"])
+        except (OSError, ValueError, KeyError):
+            return None, {}
+        return floor, {s: pd.Timestamp(t) for s, t in state.get("symbols", {}).items()}
+
+    def labelled_through(self, symbol: Optional[str] = None) -> Optional[pd.Timestamp]:
+        """Every row at or before this is settled: for `symbol`, else for all symbols."""
+        floor, marks = self._state()
+        return marks.get(symbol, floor) if symbol is not None else floor
+
+    def _commit(self, floor: pd.Timestamp, marks: Dict[str, pd.Timestamp]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "labelled_through": floor.isoformat(),
+            "symbols": {s: t.isoformat() for s, t in sorted(marks.items()) if t > floor},
+        }))
+        os.replace(tmp, self._state_path)
+
+    # ---------- labelling ----------
+    def _bars(self, symbols) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Tuple[str, str]]]:
+        """Stored bars and session_for() per symbol, looked up by its routed Yahoo ticker."""
+        bars, sessions = {}, {}
+        for sym in symbols:
+            try:
+                yf_ticker = SYMBOL_ROUTES.get(sym).yf_ticker
+                df = BAR_STORE.read(yf_ticker, BASE_INTERVAL)
+            except Exception as e:
+                logging.info(f"no bars to label {sym}: {e}")
+                continue
+            if df is not None:
+                bars[sym] = df
+                sessions[sym] = session_for(yf_ticker)
+        return bars, sessions
+
+    def run(self, now=None) -> pd.DataFrame:
+        """
+        Label every row whose horizon closed since the last run.  Returns
+        the newly labelled feature rows with `success` filled in, ready for
+        update_weights_from_outcomes().
+        """
+        now = _utc(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        span = pd.Timedelta(seconds=interval_seconds(BASE_INTERVAL) * self.params.horizon)
+        floor, marks = self._state()
+        t0 = time.perf_counter()
+        feats = read_feature_log(self.features_root, start=floor, end=now - span)
+        if floor is not None:
+            since = feats["symbol"].astype(str).map(marks).fillna(floor)
+            feats = feats[feats["timestamp"] > since].reset_index(drop=True)
+        if feats.empty:
+            return feats
+
+        symbols = feats["symbol"].astype(str)
+        bars, sessions = self._bars(symbols.unique())
+        labels = label_signals(feats, bars, self.params, sessions)
+        undecided = labels["outcome"].isna().to_numpy()
+        waiting = labels["pending"] & (labels["resolves_at"] + pd.Timedelta(seconds=self.max_wait) > now)
+        # A waiting row holds back the later rows of its own symbol only.
+        held_from = labels["timestamp"].where(waiting).groupby(symbols).transform("min")
+        keep = (held_from.isna() | (labels["timestamp"] < held_from)).to_numpy()
+        done = keep & ~undecided
+        if keep.any():
+            self._writer.write_frame(labels.loc[done, ["timestamp", "symbol", "outcome", "success", "bars_held"]])
+            kept = feats.loc[keep, "timestamp"]
+            marks.update(kept.groupby(symbols[keep]).max().to_dict())
+            # The shared floor: the newest time below every symbol's first waiting row.
+            if waiting.any():
+                kept = kept[kept < labels.loc[waiting.to_numpy(), "timestamp"].min()]
+            if not kept.empty:
+                floor = max(floor, kept.max()) if floor is not None else kept.max()
+            elif floor is None:
+                floor = feats["timestamp"].min() - pd.Timedelta(1, "ns")
+            self._commit(pd.Timestamp(floor), marks)
+
+        METRICS.inc("labels_total", float(done.sum()), result="labelled")
+        METRICS.inc("labels_total", float((keep & undecided).sum()), result="unlabelled")
+        METRICS.observe("stage_seconds", time.perf_counter() - t0, stage="labelling")
+        logging.info(f"labelled {int(done.sum())} rows ({int((keep & undecided).sum())} undecidable, "
+                     f"{int((~keep).sum())} waiting for bars)")
+        out = feats[done].copy()
+        out["success"] = labels.loc[done, "success"].to_numpy()
+        return out.reset_index(drop=True)
+
+    def read(self, start=None, end=None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Labelled feature rows in [start, end]: the feature log joined with
+        the stored labels on (timestamp, symbol).  Unlabelled rows are left out.
+        """
+        feats = read_feature_log(self.features_root, columns=columns and [*columns, "symbol"],
+                                 start=start, end=end)
+        labels = read_feature_log(str(self.root), columns=["symbol", "outcome", "success", "bars_held"],
+                                  start=start, end=end)
+        if feats.empty or labels.empty:
+            return feats.iloc[0:0]
+        feats = feats.drop(columns=["success"], errors="ignore")
+        return feats.merge(labels, on=["timestamp", "symbol"], how="inner")
+
+
+def label_and_retrain(labeller: Optional[OutcomeLabeller] = None, store: Optional["WeightStore"] = None,
+                      now=None) -> Optional[int]:
+    """Label newly closed horizons and fold them into the weights; returns the new snapshot version."""
+    labelled = (labeller or OUTCOME_LABELLER).run(now)
+    if labelled.empty:
+        return None
+    return update_weights_from_outcomes(labelled, store or WEIGHT_STORE)
+
+
+OUTCOME_LABELLER = OutcomeLabeller()
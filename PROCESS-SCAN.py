@@ -0,0 +1,290 @@
+# Process-pool sweep: the watchlist sharded across worker processes, OHLCV handed over in shared memory.
+
+import atexit
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+# Set inside worker processes only; fetch_ohlcv() answers from it first.
+SHARED_BARS: Optional["SharedBars"] = None
+
+
+class SharedBars:
+    """
+    OHLCV frames for a whole sweep in one shared-memory block.
+
+    The parent publish()es the frames once; workers attach() by name and
+    get read-only frames whose columns are views on the block, so no bar
+    is pickled or copied per symbol.  `spec` (block name plus per-symbol
+    offsets) is all that crosses the process boundary.  The parent unlinks
+    the block when the sweep is done (close(unlink=True), or `with`).
+    """
+
+    def __init__(self, spec: dict, shm: shared_memory.SharedMemory):
+        self.spec = spec
+        self.name = spec["name"]
+        self._shm = shm
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def publish(cls, frames: Dict[str, pd.DataFrame], resolution: str = "HOUR") -> "SharedBars":
+        layout, offset = {}, 0
+        frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+        for sym, df in frames.items():
+            cols = [c for c in df.columns if isinstance(c, str)]
+            layout[sym] = {"offset": offset, "n": len(df), "columns": cols,
+                           "tz": str(df.index.tz) if getattr(df.index, "tz", None) else None,
+                           "index_name": df.index.name}
+            offset += 8 * len(df) * (1 + len(cols))
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        for sym, df in frames.items():
+            meta = layout[sym]
+            block = np.ndarray((1 + len(meta["columns"]), meta["n"]), dtype=np.float64,
+                               buffer=shm.buf, offset=meta["offset"])
+            block[0].view(np.int64)[:] = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+            for i, c in enumerate(meta["columns"], start=1):
+                block[i] = df[c].to_numpy(dtype=np.float64).reshape(-1)
+        spec = {"name": shm.name, "resolution": resolution, "symbols": layout}
+        return cls(spec, shm)
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedBars":
+        return cls(spec, shared_memory.SharedMemory(name=spec["name"]))
+
+    def get(self, symbol: str, resolution: str = "HOUR") -> Optional[pd.DataFrame]:
+        """The shared frame for `symbol`, or None if it was not published at this resolution."""
+        if resolution != self.spec["resolution"]:
+            return None
+        df = self._frames.get(symbol)
+        if df is not None:
+            return df
+        meta = self.spec["symbols"].get(symbol)
+        if meta is None:
+            return None
+        block = np.ndarray((1 + len(meta["columns"]), meta["n"]), dtype=np.float64,
+                           buffer=self._shm.buf, offset=meta["offset"])
+        block.flags.writeable = False
+        index = pd.DatetimeIndex(pd.to_datetime(block[0].view(np.int64), unit="ns", utc=True),
+                                 name=meta["index_name"])
+        if meta["tz"] is None:
+            index = index.tz_localize(None)
+        elif meta["tz"] != "UTC":
+            index = index.tz_convert(meta["tz"])
+        df = pd.DataFrame({c: block[i] for i, c in enumerate(meta["columns"], start=1)},
+                          index=index, copy=False)
+        self._frames[symbol] = df
+        return df
+
+    def close(self, unlink: bool = False) -> None:
+        self._frames.clear()
+        try:
+            self._shm.close()
+        except BufferError:
+            pass                                # a caller still holds a view; freed with the process
+        if unlink:
+            self._shm.unlink()
+
+    def __enter__(self) -> "SharedBars":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close(unlink=True)
+
+
+def _collect_ohlcv(symbols: List[str], max_workers: int = 8) -> Dict[str, pd.DataFrame]:
+    """fetch_ohlcv() for every symbol in the parent; failures are left for the worker to report."""
+    def one(sym):
+        try:
+            return fetch_ohlcv(sym)
+        except Exception:
+            return None
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="share") as pool:
+        return dict(zip(symbols, pool.map(one, symbols)))
+
+
+def _init_scan_worker(slots: Dict[str, Any]) -> None:
+    global _TF_POOL
+    # A forked child has the parent's executors but none of their threads,
+    # and its idle keep-alive sockets are the parent's: start fresh ones.
+    _TF_POOL = ThreadPoolExecutor(max_workers=_TF_POOL._max_workers, thread_name_prefix="tf")
+    FEED_ROUTER._pool = ThreadPoolExecutor(max_workers=FEED_ROUTER._pool._max_workers, thread_name_prefix="feed")
+    TA_CACHE._pool = ThreadPoolExecutor(max_workers=TA_CACHE._pool._max_workers, thread_name_prefix="ta-refresh")
+    HTTP_POOL._idle = {}
+    # A lock some parent thread held at the fork stays held here for good,
+    # and in-flight entries wait on threads that do not exist: replace them.
+    for obj in (METRICS, FEED_ROUTER, HTTP_POOL, TA_CACHE, LOCAL_TA, META_CACHE,
+                SYMBOL_ROUTES, FEATURE_LOG, VBP_INDEX):
+        obj._lock = threading.Lock()
+    for v in FEED_ROUTER._venues.values():
+        v._lock, v.breaker._lock = threading.Lock(), threading.Lock()
+    for prof in VBP_INDEX.profiles.values():
+        prof._lock = threading.RLock()
+    BAR_STORE._locks, BAR_STORE._locks_guard = {}, threading.Lock()
+    TA_CACHE._refreshing = set()
+    LOCAL_TA._inflight, META_CACHE._inflight = {}, {}
+    FEATURE_LOG._rows, FEATURE_LOG._oldest = [], None   # the parent writes its own pending rows
+    # Request slots shared with the parent's other workers: UPSTREAM_LIMITS
+    # stays the budget for the whole pool, however many processes it has.
+    _UPSTREAM_SLOTS.update(slots)
+
+
+def _scan_shard(symbols: List[str], ctx: "MarketContext", spec: dict, threads: int,
+                epics: Dict[str, Optional[str]]) -> Tuple[List[ScanResult], dict]:
+    global SHARED_BARS
+    if SHARED_BARS is None or SHARED_BARS.name != spec["name"]:
+        if SHARED_BARS is not None:
+            SHARED_BARS.close()
+        SHARED_BARS = SharedBars.attach(spec)
+    SYMBOL_ROUTES.adopt(epics)                  # symbols added since this worker was forked
+    METRICS.reset()
+    try:
+        results = list(scan_watchlist(symbols, max_workers=threads, ctx=ctx))
+    finally:
+        FEATURE_LOG.flush()                     # pool workers exit without running atexit hooks
+    return results, METRICS.to_json()
+
+
+def _shard_of(symbol: str, processes: int) -> int:
+    return zlib.crc32(symbol.encode()) % processes
+
+
+class ScanProcessPool:
+    """
+    `processes` single-process workers kept alive across sweeps.
+
+    Each symbol always goes to the same worker (a stable hash of its
+    name), so TA_CACHE, LOCAL_TA and VBP_INDEX in that worker stay warm
+    for it from one sweep to the next, as they would in a threaded scan.
+    Workers are forked on first use, with the parent's state at that
+    moment.  They share one set of UPSTREAM_LIMITS request slots.  A
+    worker that dies is replaced, and its shard is retried once; since it
+    may have died holding a slot, the next sweep starts every worker
+    afresh on new slots.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._ctx = multiprocessing.get_context("fork")
+        self._workers: List[Optional[ProcessPoolExecutor]] = [None] * processes
+        self._slots = self._new_slots()
+        self._recycle = False
+        self._lock = threading.Lock()
+
+    def _new_slots(self) -> Dict[str, Any]:
+        return {name: self._ctx.BoundedSemaphore(n) for name, n in UPSTREAM_LIMITS.items()}
+
+    def _worker(self, i: int, fresh: bool = False) -> ProcessPoolExecutor:
+        with self._lock:
+            w = self._workers[i]
+            if w is None or fresh:
+                if w is not None:
+                    w.shutdown(wait=False, cancel_futures=True)
+                w = self._workers[i] = ProcessPoolExecutor(
+                    max_workers=1, mp_context=self._ctx,
+                    initializer=_init_scan_worker, initargs=(self._slots,))
+            return w
+
+    def scan(self, symbols: List[str], ctx: "MarketContext", spec: dict, threads: int):
+        """Yield (ScanResults, METRICS export) per worker as they finish."""
+        if self._recycle:
+            self.close()
+            self._slots, self._recycle = self._new_slots(), False
+        shards: Dict[int, List[str]] = {}
+        for s in symbols:
+            shards.setdefault(_shard_of(s, self.processes), []).append(s)
+        epics = {s: SYMBOL_ROUTES.get(s).epic for s in symbols}
+
+        def submit(i, fresh=False):
+            args = (_scan_shard, shards[i], ctx, spec, threads, {s: epics[s] for s in shards[i]})
+            try:
+                return self._worker(i, fresh).submit(*args)
+            except BrokenProcessPool:                   # died between sweeps
+                self._recycle = True
+                return self._worker(i, fresh=True).submit(*args)
+
+        futures = {submit(i): i for i in shards}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                yield fut.result()
+            except BrokenProcessPool:
+                logging.warning(f"scan worker {i} died; restarting it and retrying its {len(shards[i])} symbols")
+                self._recycle = True
+                yield submit(i, fresh=True).result()
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, [None] * self.processes
+        for w in workers:
+            if w is not None:
+                w.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ScanProcessPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Shared by every process-mode sweep in this process; see scan_pool().
+_SCAN_POOL: Optional[ScanProcessPool] = None
+_SCAN_POOL_LOCK = threading.Lock()
+
+
+def scan_pool(processes: int) -> ScanProcessPool:
+    """The long-lived ScanProcessPool, rebuilt only if `processes` changes."""
+    global _SCAN_POOL
+    with _SCAN_POOL_LOCK:
+        if _SCAN_POOL is None or _SCAN_POOL.processes != processes:
+            if _SCAN_POOL is not None:
+                _SCAN_POOL.close()
+            _SCAN_POOL = ScanProcessPool(processes)
+        return _SCAN_POOL
+
+
+def close_scan_pool() -> None:
+    global _SCAN_POOL
+    with _SCAN_POOL_LOCK:
+        pool, _SCAN_POOL = _SCAN_POOL, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_scan_pool)
+
+
+def scan_watchlist_processes(symbols: List[str], processes: Optional[int] = None,
+                             ctx: Optional["MarketContext"] = None, threads: int = 4,
+                             pool: Optional[ScanProcessPool] = None):
+    """
+    scan_watchlist() across `processes` worker processes (default: one per
+    core), for sweeps whose feeds are local and whose cost is CPU.
+
+    The parent fetches every symbol's OHLCV and publishes it as SharedBars.
+    Symbols are sharded by a stable hash onto the workers of `pool`
+    (default: the long-lived scan_pool()), so each worker's caches stay
+    warm across sweeps.  Each worker scans its shard with `threads`
+    threads, and UPSTREAM_LIMITS bounds the whole pool.  Workers score
+    with `ctx` alone (weights included), so a sweep's results do not
+    depend on which process ran which symbol.  Each shard returns its ScanResults and its
+    METRICS, which are merged here.  Yields ScanResult objects as shards
+    complete.
+
+    State a worker changes (caches, charts, history) stays in the worker.
+    """
+    processes = pool.processes if pool is not None else processes or os.cpu_count() or 1
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return
+    ctx = ctx or load_market_context(symbols)
+    pool = pool or scan_pool(processes)
+    with METRICS.span("share_ohlcv"):
+        bars = SharedBars.publish(_collect_ohlcv(symbols))
+    with bars:
+        for results, metrics in pool.scan(symbols, ctx, bars.spec, threads):
+            METRICS.merge(metrics)
+            yield from results
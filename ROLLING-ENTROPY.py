@@ -0,0 +1,91 @@
+# Entropy20 for every bar at once: calc_entropy() over strided return windows.
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _pct_sorted(s: np.ndarray, q: float) -> np.ndarray:
+    """
+    Row-wise numpy "linear" percentile of already-sorted rows, using the
+    same virtual-index and interpolation arithmetic as np.percentile.
+    """
+    n = s.shape[1]
+    vi = n * q + (1 + q * -1.0) - 1
+    lo = int(np.floor(vi))
+    t = vi - lo
+    prev_v, next_v = s[:, lo], s[:, min(lo + 1, n - 1)]
+    d = next_v - prev_v
+    return prev_v + d * t if t < 0.5 else next_v - d * (1 - t)
+
+
+def _fd_entropy_rows(w: np.ndarray) -> np.ndarray:
+    """
+    calc_entropy() for every row of `w` (m windows × n returns).
+
+    Freedman–Diaconis width from the row IQR, bin count ceil(range/width),
+    bin indices with np.histogram's edge corrections, then
+    H = -Σ_bins p·ln p.  Each element's bin occupancy c_j is read off the
+    sorted bin indices, and H = -mean_j ln(c_j / n) is the same sum
+    regrouped by element.
+    """
+    m, n = w.shape
+    s = np.sort(w, axis=1)
+    first, last = s[:, 0], s[:, -1]
+    width = 2.0 * (_pct_sorted(s, 0.75) - _pct_sorted(s, 0.25)) * n ** (-1.0 / 3.0)
+    ok = (width > 0) & (last > first)
+
+    out = np.zeros(m)
+    if not ok.any():
+        return out
+    s, first, last, width = s[ok], first[ok, None], last[ok, None], width[ok, None]
+
+    span = last - first
+    bins = np.ceil(span / width)
+    step = span / bins
+    edge = lambda k: np.where(k == bins, last, k * step + first)
+
+    idx = np.trunc((s - first) / span * bins)
+    idx[idx == bins] -= 1
+    idx -= s < edge(idx)
+    idx += (s >= edge(idx + 1)) & (idx != bins - 1)
+
+    # s is sorted, so equal bin indices form runs; c_j = run length of j's bin.
+    pos = np.broadcast_to(np.arange(n), idx.shape)
+    new_run = np.ones(idx.shape, dtype=bool)
+    new_run[:, 1:] = idx[:, 1:] != idx[:, :-1]
+    end_run = np.ones(idx.shape, dtype=bool)
+    end_run[:, :-1] = new_run[:, 1:]
+    run_start = np.maximum.accumulate(np.where(new_run, pos, 0), axis=1)
+    run_end = np.minimum.accumulate(np.where(end_run, pos, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    counts = run_end - run_start + 1
+
+    out[ok] = -np.log(counts / n).mean(axis=1)
+    return out
+
+
+def rolling_entropy(returns, window: int = 20, chunk: int = 200_000):
+    """
+    Entropy (nats) of every `window`-long slice of a return series, the
+    value at position t covering returns[t-window+1 : t+1].  The first
+    window-1 positions are NaN.  Each value equals calc_entropy() on that
+    slice (to float rounding).  Windows are strided views, processed
+    `chunk` at a time to bound memory.  A Series in gives a Series out on
+    the same index.
+    """
+    index = returns.index if isinstance(returns, pd.Series) else None
+    r = np.asarray(returns, dtype=np.float64)
+    out = np.full(len(r), np.nan)
+    if len(r) >= window:
+        views = sliding_window_view(r, window)
+        for i in range(0, len(views), chunk):
+            out[window - 1 + i: window - 1 + i + len(views[i:i + chunk])] = _fd_entropy_rows(views[i:i + chunk])
+    return pd.Series(out, index=index, name=f"Entropy{window}") if index is not None else out
+
+
+def entropy20_series(close, window: int = 20):
+    """
+    Entropy20 for every bar of a close series, as analyze_ticker computes it
+    for the latest bar: entropy of the last `window` log-returns.
+    """
+    close = close if isinstance(close, pd.Series) else pd.Series(np.asarray(close, dtype=np.float64))
+    ent = rolling_entropy(np.log(close).diff().iloc[1:], window)
+    return ent.reindex(close.index)
@@ -0,0 +1,187 @@
+# Warm scan daemon: one long-lived process serves sweeps over HTTP so repeat invocations skip the cold start.
+
+import errno
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Where run_or_delegate() looks for a running daemon; unset means always scan in-process.
+DAEMON_URL = os.getenv("RABIT_DAEMON_URL")
+
+
+def _jsonable(v):
+    if isinstance(v, np.generic):
+        return v.item()
+    if hasattr(v, "isoformat"):
+        return v.isoformat()
+    return str(v)
+
+
+class ScanDaemon:
+    """
+    run_sweep() behind a small HTTP server on localhost.  The process pays
+    for its imports and caches once; every request after that starts warm.
+
+        POST /scan     {"symbols": [...], "max_workers": 16, "processes": 0}
+        GET  /health   uptime, sweeps served, heavy modules loaded
+        GET  /metrics  METRICS in Prometheus text format
+
+    Sweeps run one at a time (they share METRICS, the caches and the
+    feature log); concurrent /scan requests queue.  Run it in the
+    foreground with serve_forever(), or on a thread with `with`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, warm: bool = True):
+        self.host, self.port = host, port
+        self.warm_on_start = warm
+        self.sweeps = 0
+        self.started = time.time()
+        self._sweep_lock = threading.Lock()
+        self._httpd = None
+
+    def warm(self) -> float:
+        """Import what a sweep will need and load the routing table; returns the seconds it took."""
+        t0 = time.perf_counter()
+        for mod in (yf, _tradingview_ta, scipy_stats):
+            try:
+                mod._load()
+            except ImportError as e:
+                logging.warning(f"daemon warm-up: {e}")
+        SYMBOL_ROUTES._ensure_loaded()
+        return time.perf_counter() - t0
+
+    def scan(self, payload: dict) -> dict:
+        symbols = [str(s) for s in payload.get("symbols") or []]
+        with self._sweep_lock:
+            t0 = time.perf_counter()
+            results = run_sweep(symbols, max_workers=int(payload.get("max_workers", 16)),
+                                processes=int(payload.get("processes", 0)))
+            self.sweeps += 1
+        return {"results": [asdict(r) for r in results], "seconds": round(time.perf_counter() - t0, 3)}
+
+    def health(self) -> dict:
+        return {"ok": True, "uptime_s": round(time.time() - self.started, 1), "sweeps": self.sweeps,
+                "busy": self._sweep_lock.locked(), "heavy_modules": heavy_modules_loaded()}
+
+    def _handler(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _reply(self, status: int, body: bytes, ctype: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, status: int, obj) -> None:
+                self._reply(status, json.dumps(obj, default=_jsonable).encode())
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self._json(200, daemon.health())
+                elif self.path == "/metrics":
+                    self._reply(200, METRICS.to_prometheus().encode(), "text/plain; version=0.0.4")
+                else:
+                    self._json(404, {"error": f"no route {self.path}"})
+
+            def do_POST(self):
+                if self.path != "/scan":
+                    self._json(404, {"error": f"no route {self.path}"})
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                except ValueError as e:
+                    self._json(400, {"error": f"bad request body: {e}"})
+                    return
+                try:
+                    self._json(200, daemon.scan(payload))
+                except Exception as e:
+                    logging.exception("daemon sweep failed")
+                    self._json(500, {"error": f"{type(e).__name__}: {e}"})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def _bind(self) -> None:
+        if self.warm_on_start:
+            logging.info(f"daemon warmed up in {self.warm():.2f}s")
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._handler())
+
+    def serve_forever(self) -> None:
+        """Serve in the foreground until interrupted."""
+        self._bind()
+        logging.info(f"scan daemon listening on {self.url}")
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def __enter__(self) -> "ScanDaemon":
+        self._bind()
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def scan_via_daemon(symbols: List[str], url: Optional[str] = None, max_workers: int = 16,
+                    processes: int = 0, timeout: float = 600.0) -> List["ScanResult"]:
+    """One sweep on a running ScanDaemon.  Raises OSError if none answers at `url`."""
+    body = json.dumps({"symbols": list(symbols), "max_workers": max_workers,
+                       "processes": processes}).encode()
+    status, data = HTTP_POOL.request("POST", f"{(url or DAEMON_URL).rstrip('/')}/scan", body,
+                                     {"Content-Type": "application/json"}, timeout=timeout)
+    payload = json.loads(data)
+    if status != 200:
+        raise RuntimeError(f"daemon sweep failed ({status}): {payload.get('error')}")
+    return [ScanResult(**{**r, "result": tuple(r["result"]) if r["result"] is not None else None})
+            for r in payload["results"]]
+
+
+def _no_daemon(e: OSError) -> bool:
+    """True if the connection never reached a daemon, so no sweep can have started there."""
+    return isinstance(e, (ConnectionRefusedError, socket.gaierror)) or \
+        e.errno in (errno.ENETUNREACH, errno.EHOSTUNREACH, errno.EADDRNOTAVAIL)
+
+
+def run_or_delegate(symbols: List[str], url: Optional[str] = None, max_workers: int = 16,
+                    processes: int = 0, timeout: float = 600.0, report_slowest: int = 10,
+                    prefetch: bool = True) -> List["ScanResult"]:
+    """
+    Entry point for short-lived invocations (cron, CLI): hand the sweep to
+    the daemon at `url` (default DAEMON_URL) if one is running, else run it
+    here with run_sweep().  Only a daemon that cannot be reached falls back.
+    A timeout or a dropped connection raises, because the daemon may still
+    be running (or have queued) the sweep, and a second one here would
+    write the feature log and signal history twice.  `timeout` applies to
+    the daemon, `report_slowest` and `prefetch` to an in-process sweep.
+    """
+    url = url or DAEMON_URL
+    if url:
+        try:
+            return scan_via_daemon(symbols, url, max_workers=max_workers, processes=processes,
+                                   timeout=timeout)
+        except OSError as e:
+            if not _no_daemon(e):
+                raise
+            logging.info(f"no scan daemon at {url} ({e}); scanning in-process")
+    return run_sweep(symbols, max_workers=max_workers, report_slowest=report_slowest,
+                     prefetch=prefetch, processes=processes)
@@ -0,0 +1,158 @@
+# Fans analyze_ticker out across the watchlist with bounded concurrency per upstream feed.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+
+# Max in-flight requests per upstream.  TradingView and Yahoo throttle hardest,
+# OpenAI is bounded by our rate-limit tier rather than by latency.
+UPSTREAM_LIMITS = {
+    "tradingview": 8,
+    "yahoo":       4,
+    "capital":     6,
+    "openai":      4,
+}
+_UPSTREAM_SLOTS = {name: threading.BoundedSemaphore(n) for name, n in UPSTREAM_LIMITS.items()}
+
+# Per-timeframe TA requests run here, separate from the per-symbol pool so a
+# symbol worker waiting on its four timeframes can never starve them.
+_TF_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tf")
+
+
+@contextmanager
+def upstream_slot(name: str):
+    """
+    Hold one of the bounded request slots for an upstream while the body runs.
+    """
+    sem = _UPSTREAM_SLOTS[name]
+    sem.acquire()
+    try:
+        yield
+    finally:
+        sem.release()
+
+
+def bounded(name: str):
+    """
+    Decorator form of upstream_slot() for functions that are one upstream call.
+    """
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with upstream_slot(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def set_upstream_limit(name: str, limit: int) -> None:
+    """
+    Resize an upstream's slot count.  Only call between sweeps.
+    """
+    UPSTREAM_LIMITS[name] = limit
+    _UPSTREAM_SLOTS[name] = threading.BoundedSemaphore(limit)
+
+
+def _timed_ta(tv_sym: str, exchange: str, screener: str, interval):
+    with METRICS.span("ta", interval=str(interval)):
+        return get_ta(tv_sym, exchange, screener, interval)
+
+
+def fetch_timeframes(tv_sym: str, exchange: str, screener: str, intervals) -> list:
+    """
+    Run get_ta for every interval concurrently and return the analyses in
+    the order of `intervals`.  A RuntimeError from any timeframe propagates,
+    exactly like the sequential calls did.
+    """
+    futures = [_TF_POOL.submit(_timed_ta, tv_sym, exchange, screener, ivl) for ivl in intervals]
+    return [f.result() for f in futures]
+
+
+@dataclass
+class ScanResult:
+    symbol: str
+    result: Optional[tuple]
+    wall_time: float            # seconds spent inside analyze_ticker
+    error: Optional[str] = None
+    price: Optional[float] = None   # real-time price the symbol was scored at
+    skipped: Optional[str] = None   # skip reason when analyze_ticker returned without scoring
+
+
+# Per-thread scratch for the symbol being analysed; analyze_ticker notes its
+# price and any skip reason here.
+_scan_state = threading.local()
+
+
+def _skip_symbol(reason: str) -> None:
+    """Count a skip, and mark the symbol being analysed as not scored."""
+    METRICS.inc("skips_total", reason=reason)
+    _scan_state.skipped = reason
+
+
+def _timed_analyze(symbol: str, ctx: Optional["MarketContext"] = None) -> ScanResult:
+    t0 = time.perf_counter()
+    _scan_state.price = _scan_state.skipped = None
+    try:
+        res = analyze_ticker(symbol, ctx)
+        return ScanResult(symbol, res, time.perf_counter() - t0, price=_scan_state.price,
+                          skipped=_scan_state.skipped)
+    except Exception as e:
+        logging.warning(f"analyze_ticker crashed for {symbol}: {e}")
+        return ScanResult(symbol, None, time.perf_counter() - t0, error=str(e))
+
+
+def scan_watchlist(symbols: List[str], max_workers: int = 16, ctx: Optional["MarketContext"] = None):
+    """
+    Analyse every symbol concurrently and yield ScanResult objects in
+    completion order, so fast symbols are scored while slow ones are still
+    waiting on their feeds.  Upstream fan-out is capped by UPSTREAM_LIMITS
+    regardless of `max_workers`.  Every symbol shares `ctx`, which is loaded
+    once here if not given.
+    """
+    ctx = ctx or load_market_context(symbols)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan") as pool:
+        futures = [pool.submit(_timed_analyze, sym, ctx) for sym in symbols]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def run_sweep(symbols: List[str], max_workers: int = 16, report_slowest: int = 10,
+              prefetch: bool = True, processes: int = 0) -> List[ScanResult]:
+    """
+    Full sweep over the watchlist.  Returns results in completion order and
+    prints a per-symbol wall-time report (slowest first).  With `prefetch`,
+    all Yahoo OHLCV is bulk-loaded up front so the fallbacks never download.
+    The market context (VIX, headlines, sentiment) loads alongside the
+    prefetch and is shared by every symbol.  With `processes` > 0 the
+    symbols are analysed in that many worker processes
+    (scan_watchlist_processes), `max_workers` threads split between them.
+    """
+    t0 = time.perf_counter()
+    refresh_dynamic_weights()
+    SYMBOL_ROUTES.sync(symbols)                 # only new symbols / missing EPICs hit the network
+    ctx_future = _TF_POOL.submit(load_market_context, symbols)
+    if prefetch:
+        prefetch_ohlcv(symbols)
+    ctx = ctx_future.result()
+    if processes:
+        results = list(scan_watchlist_processes(symbols, processes, ctx=ctx,
+                                                threads=max(1, max_workers // processes)))
+    else:
+        results = list(scan_watchlist(symbols, max_workers=max_workers, ctx=ctx))
+    FEATURE_LOG.flush()
+    SIGNAL_HISTORY.record_results(results, timestamp=ctx.fetched_at)
+    total = time.perf_counter() - t0
+
+    busy = sum(r.wall_time for r in results)
+    failed = sum(1 for r in results if r.error)
+    print(f"\n⏱ Sweep: {len(results)} symbols in {total:.1f}s "
+          f"(sum of per-symbol time {busy:.1f}s, {failed} failed)")
+    for r in sorted(results, key=lambda r: r.wall_time, reverse=True)[:report_slowest]:
+        note = f"  ✖ {r.error}" if r.error else ""
+        print(f"   ↳ {r.symbol:<12} {r.wall_time:6.2f}s{note}")
+    print("⏱ Stages:")
+    print(METRICS.stage_report())
+    return results
@@ -0,0 +1,194 @@
+# Bounded per-symbol signal history: fixed-capacity ring buffers of NumPy records, optionally memory-mapped.
+
+import os
+import threading
+import time
+from urllib.parse import quote
+
+HISTORY_DTYPE = np.dtype([
+    ("ts", "<i8"),                  # ns since epoch, UTC
+    ("confidence", "<f4"),
+    ("probability", "<f4"),
+    ("price", "<f8"),
+    ("direction", "i1"),            # +1 bullish, -1 bearish, 0 flat / unknown
+])
+
+# Memory-mapped file: this header, then 2 × capacity records.
+_HEADER_DTYPE = np.dtype([("magic", "S8"), ("capacity", "<i8"), ("count", "<i8")])
+_MAGIC = b"RABITHS1"
+
+
+class HistoryRing:
+    """
+    The last `capacity` records for one symbol.
+
+    Every record is written twice, at slot i and i + capacity, so the
+    newest `capacity` records always sit contiguously in one slice of the
+    doubled buffer.  append() is O(1), and view() is a zero-copy slice in
+    time order that can go straight into a chart or a NumPy reduction.
+    With a `path` the buffer is a memory-mapped file that other processes
+    can read with read_history() while the scanner keeps appending.
+    """
+
+    def __init__(self, capacity: int = 512, path: Optional[str] = None):
+        self.capacity = capacity
+        self.path = Path(path) if path else None
+        if self.path is None:
+            self._header = np.zeros(1, dtype=_HEADER_DTYPE)
+            self._buf = np.zeros(2 * capacity, dtype=HISTORY_DTYPE)
+        else:
+            self._header, self._buf = _open_ring_file(self.path, capacity)
+        self._header["magic"], self._header["capacity"] = _MAGIC, capacity
+
+    @property
+    def count(self) -> int:
+        """Records ever appended (the ring holds at most `capacity` of them)."""
+        return int(self._header["count"][0])
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self._buf.nbytes + self._header.nbytes
+
+    def append(self, confidence: float, probability: float = np.nan, price: float = np.nan,
+               direction: int = 0, timestamp=None) -> None:
+        n = self.count
+        i = n % self.capacity
+        ts = time.time_ns() if timestamp is None else pd.Timestamp(timestamp).as_unit("ns").value
+        rec = (ts, confidence, probability, price, direction)
+        self._buf[i] = rec
+        self._buf[i + self.capacity] = rec
+        self._header["count"] = n + 1            # after the record, so readers never see a blank slot
+
+    def view(self, last: Optional[int] = None) -> np.ndarray:
+        """The newest `last` records (all held by default), oldest first, as a view."""
+        return _ring_view(self._buf, self.capacity, self.count, last)
+
+    def frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """view() as a DataFrame indexed by UTC timestamp, for charting."""
+        return _history_frame(self.view(last))
+
+    def flush(self) -> None:
+        if isinstance(self._buf, np.memmap):
+            self._buf.flush()
+            self._header.flush()
+
+
+def _ring_view(buf: np.ndarray, capacity: int, count: int, last: Optional[int]) -> np.ndarray:
+    held = min(count, capacity)
+    last = held if last is None else max(0, min(last, held))
+    end = (count - 1) % capacity + capacity + 1 if count > capacity else count
+    return buf[end - last:end]
+
+
+def _history_frame(rows: np.ndarray) -> pd.DataFrame:
+    index = pd.DatetimeIndex(pd.to_datetime(rows["ts"], unit="ns", utc=True), name="timestamp")
+    return pd.DataFrame({c: rows[c] for c in HISTORY_DTYPE.names if c != "ts"}, index=index)
+
+
+def _open_ring_file(path: Path, capacity: int):
+    size = _HEADER_DTYPE.itemsize + 2 * capacity * HISTORY_DTYPE.itemsize
+    if path.exists() and path.stat().st_size == size:
+        header = np.memmap(path, dtype=_HEADER_DTYPE, mode="r+", shape=(1,))
+        if header["magic"][0] == _MAGIC and header["capacity"][0] == capacity:
+            buf = np.memmap(path, dtype=HISTORY_DTYPE, mode="r+", offset=_HEADER_DTYPE.itemsize,
+                            shape=(2 * capacity,))
+            return header, buf
+        del header
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.truncate(size)
+    header = np.memmap(path, dtype=_HEADER_DTYPE, mode="r+", shape=(1,))
+    buf = np.memmap(path, dtype=HISTORY_DTYPE, mode="r+", offset=_HEADER_DTYPE.itemsize,
+                    shape=(2 * capacity,))
+    return header, buf
+
+
+def read_history(path: str, last: Optional[int] = None) -> pd.DataFrame:
+    """
+    A symbol's history straight from its ring file, read-only, for
+    dashboards outside the scanner process.  The records are copied out,
+    so a concurrent append cannot change the frame afterwards.
+    """
+    header = np.memmap(path, dtype=_HEADER_DTYPE, mode="r", shape=(1,))
+    if header["magic"][0] != _MAGIC:
+        raise ValueError(f"{path} is not a signal history file")
+    capacity, count = int(header["capacity"][0]), int(header["count"][0])
+    buf = np.memmap(path, dtype=HISTORY_DTYPE, mode="r", offset=_HEADER_DTYPE.itemsize,
+                    shape=(2 * capacity,))
+    return _history_frame(_ring_view(buf, capacity, count, last).copy())
+
+
+class SignalHistory:
+    """
+    Symbol → HistoryRing, created on first use.  Memory is `capacity`
+    records per symbol however long the scanner runs (memory_report()).
+    With `root`, each ring is memory-mapped at <root>/<symbol>.ring and
+    survives restarts.
+    """
+
+    def __init__(self, capacity: int = 512, root: Optional[str] = None):
+        self.capacity = capacity
+        self.root = Path(root) if root else None
+        self._rings: Dict[str, HistoryRing] = {}
+        self._lock = threading.Lock()
+
+    def ring(self, symbol: str) -> HistoryRing:
+        r = self._rings.get(symbol)
+        if r is None:
+            with self._lock:
+                r = self._rings.get(symbol)
+                if r is None:
+                    path = None if self.root is None else self.root / f"{quote(symbol, safe='')}.ring"
+                    r = self._rings[symbol] = HistoryRing(self.capacity, path)
+        return r
+
+    __getitem__ = ring
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._rings
+
+    def __iter__(self):
+        return iter(list(self._rings))
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def record(self, symbol: str, confidence: float, probability: float = np.nan,
+               price: Optional[float] = None, direction: Optional[int] = None, timestamp=None) -> None:
+        """One scored signal.  `direction` defaults to the sign of `confidence`."""
+        if direction is None:
+            direction = int(np.sign(confidence))
+        self.ring(symbol).append(confidence, probability, np.nan if price is None else price,
+                                 direction, timestamp)
+
+    def record_results(self, results: List["ScanResult"], timestamp=None) -> int:
+        """record() every ScanResult that was scored; returns how many were recorded."""
+        n = 0
+        for r in results:
+            if r.error or r.skipped or not r.result or r.price is None:
+                continue
+            self.record(r.symbol, float(r.result[0]), float(r.result[1]), r.price, timestamp=timestamp)
+            n += 1
+        return n
+
+    def view(self, symbol: str, last: Optional[int] = None) -> np.ndarray:
+        return self.ring(symbol).view(last)
+
+    def frame(self, symbol: str, last: Optional[int] = None) -> pd.DataFrame:
+        return self.ring(symbol).frame(last)
+
+    def memory_report(self) -> Dict[str, int]:
+        """Bytes held per symbol (fixed by `capacity`), plus a "_total"."""
+        report = {sym: r.nbytes for sym, r in list(self._rings.items())}
+        report["_total"] = sum(report.values())
+        return report
+
+    def flush(self) -> None:
+        for r in list(self._rings.values()):
+            r.flush()
+
+
+SIGNAL_HISTORY = SignalHistory(root=os.getenv("RABIT_HISTORY_DIR"))
@@ -0,0 +1,278 @@
+# Per-(symbol, interval) indicator state that absorbs one closed bar at a time in O(1).
+
+import json
+import math
+from collections import deque
+
+
+class _EMA:
+    """EMA with the ewm(span, adjust=False) recursion, seeded by the first value."""
+
+    def __init__(self, span: int, value: Optional[float] = None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def update(self, x: float) -> float:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+class _Window:
+    """
+    Fixed-length window with a running sum.  The sum is recomputed exactly
+    every `maxlen` pushes so float drift cannot accumulate.
+    """
+
+    def __init__(self, maxlen: int, values=()):
+        self.maxlen = maxlen
+        self.values = deque(values, maxlen=maxlen)
+        self.total = math.fsum(self.values)
+        self._since_resync = 0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.maxlen:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self._since_resync += 1
+        if self._since_resync >= self.maxlen:
+            self.total = math.fsum(self.values)
+            self._since_resync = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.maxlen
+
+    def mean(self) -> float:
+        return self.total / self.maxlen if self.full else math.nan
+
+    def sum(self) -> float:
+        return self.total if self.full else math.nan
+
+    def std(self) -> float:
+        """Sample std (ddof=1) of a full window; O(maxlen) with maxlen ≤ 20 here."""
+        if not self.full:
+            return math.nan
+        m = self.total / self.maxlen
+        return math.sqrt(math.fsum((x - m) ** 2 for x in self.values) / (self.maxlen - 1))
+
+
+class IndicatorState:
+    """
+    Incremental version of the local indicator pack for one (symbol, interval).
+
+    update() takes one *closed* bar and returns the same keys as
+    local_indicators() plus "Entropy20".  Definitions follow the batch
+    kernel exactly, so a state replayed over a frame ends on the values
+    indicator_pack() gives for that frame.  State round-trips through
+    to_dict()/from_dict(), so a restarted scanner resumes without replaying
+    history.
+    """
+
+    _WINDOWS = {
+        "close20": 20, "close50": 50, "close200": 200,
+        "median5": 5, "median34": 34,
+        "up14": 14, "dn14": 14, "tr14": 14,
+        "plus_dm14": 14, "minus_dm14": 14, "dx14": 14,
+        "tp20": 20, "ret20": 20,
+    }
+    _EMAS = {"ema9": 9, "ema12": 12, "ema21": 21, "ema26": 26, "macd_sig": 9}
+
+    def __init__(self, symbol: str, interval: str):
+        self.symbol = symbol
+        self.interval = interval
+        self.bars = 0
+        self.last_ts = None
+        self.prev: Optional[Tuple[float, float, float]] = None  # (high, low, close)
+        self.emas = {k: _EMA(span) for k, span in self._EMAS.items()}
+        self.win = {k: _Window(n) for k, n in self._WINDOWS.items()}
+        self.values: Dict[str, float] = {}
+
+    def update(self, high: float, low: float, close: float, volume: float, ts=None) -> Dict[str, float]:
+        """
+        Absorb one closed bar and return the updated indicator dict.
+        """
+        w, e = self.win, self.emas
+
+        e["ema9"].update(close)
+        e["ema21"].update(close)
+        macd = e["ema12"].update(close) - e["ema26"].update(close)
+        macd_sig = e["macd_sig"].update(macd)
+
+        w["close20"].push(close)
+        w["close50"].push(close)
+        w["close200"].push(close)
+        median = (high + low) / 2
+        w["median5"].push(median)
+        w["median34"].push(median)
+        tp = (high + low + close) / 3
+        w["tp20"].push(tp)
+
+        if self.prev is None:
+            tr = abs(high - low)
+            plus_dm = minus_dm = 0.0
+        else:
+            ph, pl, pc = self.prev
+            delta = close - pc
+            w["up14"].push(max(delta, 0.0))
+            w["dn14"].push(-min(delta, 0.0))
+            if close > 0 and pc > 0:
+                w["ret20"].push(math.log(close / pc))
+            tr = max(abs(high - low), abs(high - pc), abs(low - pc))
+            up_move, down_move = high - ph, pl - low
+            plus_dm = up_move if up_move > 0 and up_move > down_move else 0.0
+            minus_dm = down_move if down_move > 0 and down_move > up_move else 0.0
+        w["tr14"].push(tr)
+        w["plus_dm14"].push(plus_dm)
+        w["minus_dm14"].push(minus_dm)
+        if w["tr14"].full:
+            tr14 = w["tr14"].sum()
+            plus_di = 100 * w["plus_dm14"].sum() / tr14 if tr14 else math.nan
+            minus_di = 100 * w["minus_dm14"].sum() / tr14 if tr14 else math.nan
+            denom = plus_di + minus_di
+            w["dx14"].push(100 * abs(plus_di - minus_di) / denom if denom else math.nan)
+
+        dn = w["dn14"].mean()
+        rs = w["up14"].mean() / dn if dn else (math.inf if w["up14"].mean() else math.nan)
+        tp_std = w["tp20"].std()
+        bb_basis, bb_std = w["close20"].mean(), w["close20"].std()
+
+        self.prev = (high, low, close)
+        self.bars += 1
+        self.last_ts = ts
+        self.values = {
+            "price":       close,
+            "EMA9":        e["ema9"].value,
+            "EMA21":       e["ema21"].value,
+            "SMA50":       w["close50"].mean(),
+            "SMA200":      w["close200"].mean(),
+            "MACD.macd":   macd,
+            "MACD.signal": macd_sig,
+            "AO":          w["median5"].mean() - w["median34"].mean(),
+            "RSI":         100 - 100 / (1 + rs),
+            "CCI20":       (tp - w["tp20"].mean()) / (0.015 * tp_std) if tp_std else math.nan,
+            "ATR":         w["tr14"].mean(),
+            "ADX":         w["dx14"].mean(),
+            "BB.upper":    bb_basis + 2 * bb_std,
+            "BB.lower":    bb_basis - 2 * bb_std,
+            "volume":      volume,
+            "Entropy20":   _window_entropy(w["ret20"].values) if w["ret20"].full else math.nan,
+        }
+        return self.values
+
+    @classmethod
+    def from_frame(cls, symbol: str, interval: str, df: pd.DataFrame) -> "IndicatorState":
+        """
+        Seed a state by replaying a historical OHLCV frame once.
+        """
+        state = cls(symbol, interval)
+        cols = [df[c].to_numpy(dtype=np.float64).reshape(-1) for c in ("High", "Low", "Close", "Volume")]
+        for ts, h, l, c, v in zip(df.index, *cols):
+            state.update(h, l, c, v, ts=str(ts))
+        return state
+
+    # ---------- persistence ----------
+    def to_dict(self) -> dict:
+        return {
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "bars": self.bars,
+            "last_ts": self.last_ts,
+            "prev": self.prev,
+            "emas": {k: ema.value for k, ema in self.emas.items()},
+            "windows": {k: list(win.values) for k, win in self.win.items()},
+            "values": self.values,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "IndicatorState":
+        state = cls(d["symbol"], d["interval"])
+        state.bars = d["bars"]
+        state.last_ts = d["last_ts"]
+        state.prev = tuple(d["prev"]) if d["prev"] is not None else None
+        for k, v in d["emas"].items():
+            state.emas[k].value = v
+        for k, vals in d["windows"].items():
+            state.win[k] = _Window(cls._WINDOWS[k], vals)
+        state.values = d["values"]
+        return state
+
+
+def _window_entropy(returns) -> float:
+    """
+    Shannon entropy (nats) of one return window, as calc_entropy() computes
+    it: Freedman–Diaconis bins with numpy.histogram's edge arithmetic, then
+    -Σ p·ln p over the occupied bins.  Plain Python, because
+    np.histogram(bins="fd") costs ~0.2 ms on 20 values.
+    """
+    a = sorted(returns)
+    n = len(a)
+    if n == 0:
+        return 0.0
+    first, last = a[0], a[-1]
+
+    def pct(q):  # numpy's default "linear" percentile
+        vi = q * (n - 1)
+        lo = int(vi)
+        t = vi - lo
+        prev_v, next_v = a[lo], a[min(lo + 1, n - 1)]
+        d = next_v - prev_v
+        return prev_v + d * t if t < 0.5 else next_v - d * (1 - t)
+
+    width = 2.0 * (pct(0.75) - pct(0.25)) * n ** (-1.0 / 3.0)
+    if first == last:
+        first, last = first - 0.5, last + 0.5
+    if not width:
+        return 0.0
+    bins = int(math.ceil((last - first) / width))
+    step = (last - first) / bins
+    edge = lambda k: last if k == bins else k * step + first
+
+    counts: Dict[int, int] = {}
+    for x in a:
+        i = int((x - first) / (last - first) * bins)
+        if i == bins:
+            i -= 1
+        if x < edge(i):
+            i -= 1
+        elif x >= edge(i + 1) and i != bins - 1:
+            i += 1
+        counts[i] = counts.get(i, 0) + 1
+    return -math.fsum(c / n * math.log(c / n) for c in counts.values())
+
+
+class IndicatorStateStore:
+    """
+    All live IndicatorState objects keyed by (symbol, interval), with JSON
+    save/load so the scanner can restart without replaying history.
+    """
+
+    def __init__(self, path: str = "indicator_state.json"):
+        self.path = Path(path)
+        self.states: Dict[Tuple[str, str], IndicatorState] = {}
+
+    def get(self, symbol: str, interval: str) -> IndicatorState:
+        key = (symbol, interval)
+        if key not in self.states:
+            self.states[key] = IndicatorState(symbol, interval)
+        return self.states[key]
+
+    def update(self, symbol: str, interval: str, high, low, close, volume, ts=None) -> Dict[str, float]:
+        return self.get(symbol, interval).update(high, low, close, volume, ts=ts)
+
+    def save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps([s.to_dict() for s in self.states.values()]))
+        tmp.replace(self.path)
+
+    def load(self) -> int:
+        if not self.path.exists():
+            return 0
+        for d in json.loads(self.path.read_text()):
+            s = IndicatorState.from_dict(d)
+            self.states[(s.symbol, s.interval)] = s
+        return len(self.states)
+
+
+INDICATOR_STATES = IndicatorStateStore()
@@ -0,0 +1,217 @@
+# Symbol routing table: TV symbol, exchange, screener, EPIC, Yahoo tickers, asset class and rules, resolved once per symbol.
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from types import MappingProxyType
+
+
+@dataclass(frozen=True)
+class SymbolRoute:
+    """
+    Everything the scan needs to know about where a symbol lives.
+    `yf_ticker` is what fetch_ohlcv reads, `ta_yf_ticker` what get_ta's
+    local fallback reads (continuous futures for TV commodities).
+    """
+    symbol: str
+    tv_symbol: str
+    exchange: str
+    screener: str
+    epic: Optional[str]
+    yf_ticker: str
+    ta_yf_ticker: str
+    asset_class: str
+    rules: Mapping[str, Any]
+
+
+def build_route(symbol: str, epic: Optional[str] = None) -> SymbolRoute:
+    """Apply the routing rules to one symbol.  Only the EPIC needs the network; pass it if known."""
+    tv_sym, exchange, screener = tv_symbol_info(symbol)
+    rules = _rules_for(symbol)
+    return SymbolRoute(
+        symbol=symbol,
+        tv_symbol=tv_sym,
+        exchange=exchange,
+        screener=screener,
+        epic=epic,
+        yf_ticker=convert_to_yf_symbol(symbol),
+        ta_yf_ticker=_FUTURES_YF_ALIAS.get(tv_sym.upper(), tv_sym),
+        asset_class=asset_class(symbol),
+        rules=MappingProxyType(dict(rules or {})),
+    )
+
+
+def _lookup_epic(symbol: str) -> Tuple[bool, Optional[str]]:
+    """(answered, EPIC).  answered is False if the lookup itself failed; EPIC is None if not listed."""
+    try:
+        with upstream_slot("capital"):
+            return True, lookup_epic(symbol) or None
+    except Exception as e:
+        logging.warning(f"EPIC lookup failed for {symbol}: {e}")
+        return False, None
+
+
+class SymbolRegistry:
+    """
+    Watchlist symbol → SymbolRoute, built once and read lock-free.
+
+    sync() resolves only what is new: unknown symbols get routed, and their
+    EPICs (plus any still missing) are looked up concurrently.  Symbols that
+    left the watchlist are dropped.  The table is replaced wholesale, so
+    get() always sees a consistent snapshot and costs one dict lookup.  A
+    symbol outside the table is routed on first use and kept.
+
+    A symbol Capital.com does not list is remembered as such and looked up
+    again only after `missing_ttl` seconds (or with refresh_epics); one
+    whose lookup failed is retried on the next sync().
+
+    Only the EPICs, the part that costs a network round trip, are persisted
+    as JSON at `path` (None: memory only), with the time each unlisted
+    symbol was last looked up.  On load every route is rebuilt from them
+    with build_route(), so a restart skips the EPIC lookups but picks up
+    any change to the routing rules.  sync_file() reloads the table when a
+    watchlist file changes.
+    """
+
+    def __init__(self, path: Optional[str] = "symbol_routes.json", max_workers: int = 6,
+                 missing_ttl: float = 86_400.0):
+        self.path = Path(path) if path else None
+        self.max_workers = max_workers
+        self.missing_ttl = missing_ttl
+        self._routes: Dict[str, SymbolRoute] = {}
+        self._missing: Dict[str, float] = {}             # symbol → when a lookup found no EPIC
+        self._by_tv: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._watch_mtime: Optional[float] = None
+        self._loaded = False
+
+    # ---------- hot path ----------
+    def get(self, symbol: str) -> SymbolRoute:
+        route = self._routes.get(symbol)
+        if route is None:
+            self._ensure_loaded()
+            route = self._routes.get(symbol)
+        if route is None:
+            answered, epic = _lookup_epic(symbol)
+            if answered and epic is None:
+                self._missing[symbol] = time.time()
+            route = build_route(symbol, epic)
+            # Merged under the lock: a concurrent first use of another symbol is kept.
+            self._install(lambda current: {symbol: route, **current})
+            route = self._routes[symbol]
+        return route
+
+    def ta_ticker(self, tv_sym: str) -> str:
+        """get_ta's fallback Yahoo ticker for a TV symbol."""
+        t = self._by_tv.get(tv_sym)
+        return t if t is not None else _FUTURES_YF_ALIAS.get(tv_sym.upper(), tv_sym)
+
+    # ---------- building ----------
+    def _install(self, update: Callable[[Dict[str, SymbolRoute]], Dict[str, SymbolRoute]]) -> None:
+        """Replace the table with update(current table), atomically."""
+        with self._lock:
+            routes = self._routes = update(self._routes)
+            self._by_tv = {r.tv_symbol: r.ta_yf_ticker for r in routes.values()}
+
+    def adopt(self, epics: Dict[str, Optional[str]]) -> None:
+        """Route symbols not yet in the table from EPICs resolved elsewhere (no network)."""
+        new = {s: build_route(s, e) for s, e in epics.items() if s not in self._routes}
+        if new:
+            self._install(lambda current: {**new, **current})
+
+    def resolve_epics(self, symbols: List[str]) -> Dict[str, Optional[str]]:
+        """
+        EPICs for many symbols at once, fanned out under the Capital.com
+        slot limit: None for a symbol it does not list.  Symbols whose
+        lookup failed are left out.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols)),
+                                thread_name_prefix="epic") as pool:
+            answers = pool.map(_lookup_epic, symbols)
+            return {s: epic for s, (answered, epic) in zip(symbols, answers) if answered}
+
+    def sync(self, symbols: List[str], refresh_epics: bool = False) -> int:
+        """
+        Make the table match `symbols`.  Returns how many routes were
+        (re)built.  With `refresh_epics`, every EPIC is looked up again.
+        """
+        self._ensure_loaded()
+        symbols = list(dict.fromkeys(str(s) for s in symbols))
+        current = self._routes
+        now = time.time()
+        unlisted = lambda s: now - self._missing.get(s, float("-inf")) < self.missing_ttl
+        stale = [s for s in symbols if s not in current or refresh_epics or
+                 (current[s].epic is None and not unlisted(s))]
+        if not stale and set(current) == set(symbols):
+            return 0
+        epics = self.resolve_epics(stale)
+        routes = {}
+        for s in symbols:
+            old = current.get(s)
+            if s in epics:
+                routes[s] = build_route(s, epics[s] or (old.epic if old else None))
+            else:
+                routes[s] = old or build_route(s)
+        for s, epic in epics.items():
+            if epic is None:
+                self._missing[s] = now
+            else:
+                self._missing.pop(s, None)
+        self._missing = {s: t for s, t in self._missing.items() if s in routes}
+        self._install(lambda _: routes)
+        self.save()
+        logging.info(f"symbol routes: {len(stale)} resolved, {len(routes)} total")
+        return len(stale)
+
+    def sync_file(self, watchlist_path: str) -> int:
+        """
+        sync() against a watchlist file (one symbol per line, or a JSON
+        list) if it changed since the last call; 0 if it did not.
+        """
+        p = Path(watchlist_path)
+        mtime = p.stat().st_mtime
+        if mtime == self._watch_mtime:
+            return 0
+        text = p.read_text()
+        symbols = json.loads(text) if text.lstrip().startswith("[") else \
+            [ln.split("#")[0].strip() for ln in text.splitlines() if ln.split("#")[0].strip()]
+        n = self.sync(symbols)
+        self._watch_mtime = mtime
+        return n
+
+    # ---------- persistence ----------
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            raw = json.loads(self.path.read_text())
+            epics = raw["epics"] if "epics" in raw else {s: d["epic"] for s, d in raw["routes"].items()}
+            missing = {s: float(t) for s, t in raw.get("missing", {}).items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"ignoring unreadable symbol routes at {self.path}: {e}")
+            return
+        self._missing = {**missing, **self._missing}
+        routes = {s: build_route(s, epic) for s, epic in epics.items()}
+        self._install(lambda current: {**routes, **current})
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"epics": {s: r.epic for s, r in self._routes.items()},
+                "missing": {s: t for s, t in self._missing.items() if s in self._routes}}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1, default=str))
+        os.replace(tmp, self.path)
+
+
+SYMBOL_ROUTES = SymbolRegistry()
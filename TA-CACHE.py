@@ -0,0 +1,135 @@
+# TTL + LRU cache in front of TradingView TA_Handler analyses.
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Bar length in seconds per TradingView interval string.
+_TV_INTERVAL_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "1d": 86400, "1W": 604800, "1M": 2592000,
+}
+
+
+class TACache:
+    """
+    Bounded LRU of TA analyses keyed by (tv_sym, exchange, screener, interval).
+
+    An entry is fresh for `ttl_fraction` of its bar length (15m → 225s,
+    4h → 1h with the default 0.25).  After that it is stale for another
+    `stale_fraction` of a bar: a stale hit is served immediately while one
+    background refresh runs.  If a blocking refresh fails, an entry still
+    inside that stale window is served instead of returning None, so a
+    TradingView hiccup does not push the sweep into the local-indicator
+    fallback; anything older returns None and the caller fails over.
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl_fraction: float = 0.25,
+                 stale_fraction: float = 1.0, background: bool = True):
+        self.maxsize = maxsize
+        self.ttl_fraction = ttl_fraction
+        self.stale_fraction = stale_fraction
+        self.background = background
+        self._data: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()  # key → (stored_at, value)
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ta-refresh")
+        self.hits = self.misses = self.stale = self.evictions = self.refresh_errors = 0
+
+    def _bar_seconds(self, interval) -> float:
+        return _TV_INTERVAL_SECONDS.get(str(interval), 3600)
+
+    def get(self, key: tuple, loader):
+        """
+        Return the cached analysis for `key` (its last element is the TV
+        interval), calling `loader()` on a miss.  `loader` returns the
+        analysis or None.
+        """
+        value = self.cached(key, loader)
+        if value is not None:
+            return value
+        with self._lock:
+            entry = self._data.get(key)
+            self.misses += 1
+
+        value = self._load(loader)
+        if value is not None:
+            self.put(key, value)
+            return value
+        bar = self._bar_seconds(key[-1])
+        if entry is not None and time.monotonic() - entry[0] < bar * (self.ttl_fraction + self.stale_fraction):
+            with self._lock:
+                self.stale += 1
+            return entry[1]
+        return None
+
+    def cached(self, key: tuple, loader):
+        """
+        The entry for `key` if fresh, or if stale (a background refresh
+        through `loader` is then scheduled); None on a miss.  `loader` is
+        never called in the caller's thread.
+        """
+        bar = self._bar_seconds(key[-1])
+        ttl, grace = bar * self.ttl_fraction, bar * self.stale_fraction
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age < ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if self.background and age < ttl + grace:
+                self._data.move_to_end(key)
+                self.stale += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._pool.submit(self._refresh, key, loader)
+                return entry[1]
+        return None
+
+    def put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _load(self, loader):
+        try:
+            return loader()
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+            logging.info(f"TA cache loader failed: {e}")
+            return None
+
+    def _refresh(self, key: tuple, loader) -> None:
+        try:
+            value = self._load(loader)
+            if value is not None:
+                self.put(key, value)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "refresh_errors": self.refresh_errors,
+            }
+
+
+TA_CACHE = TACache()
@@ -0,0 +1,260 @@
+# Incremental volume-by-price profiles: bars are added into price bins as they close, queries cost O(bins).
+
+import threading
+from collections import deque
+
+
+class VolumeProfile:
+    """
+    Running volume-by-price histogram for one symbol.
+
+    Volume is kept on a fine grid of `bins * oversample` equal bins.  When a
+    bar closes outside the grid, the range doubles toward it and adjacent
+    bin pairs merge.  Every old edge stays an edge, so nothing is re-read.
+    Re-binning therefore happens only when price leaves the range, and
+    costs O(grid).  A windowed profile whose bars fill less than a quarter
+    of the grid is re-centred on them at query time.
+
+    Optional forgetting:
+      • `window`: keep only the last N bars; expired bars are subtracted.
+      • `half_life`: weight volume by 0.5 ** (age / half_life) bars.
+
+    The bar still forming is not folded in: set_forming() lays it over
+    the histogram at query time and is replaced on every call, so its
+    partial volume is counted once and only until the bar closes.
+
+    stats() returns calc_vbp()-style keys ("poc", "hvn_band") plus "lvn"
+    for the occupied price range at `bins` resolution.  Its edges snap to
+    the fine grid, so they sit within 1/oversample of a bin of calc_vbp's.
+    """
+
+    def __init__(self, bins: int = 20, window: Optional[int] = None, half_life: Optional[float] = None,
+                 oversample: int = 8, hvn_quantile: float = 0.7, lvn_quantile: float = 0.3):
+        self.bins = bins
+        self.n = 2 * ((bins * oversample + 1) // 2)      # even, so pairs merge cleanly
+        self.window = window
+        self.decay = 0.5 ** (1.0 / half_life) if half_life else 1.0
+        self.hvn_quantile, self.lvn_quantile = hvn_quantile, lvn_quantile
+        self.lo = self.hi = None
+        self.hist = np.zeros(self.n)
+        self.recent: deque = deque()                      # (price, volume) still inside the window
+        self.last_ts = None
+        self.forming = None                               # (price, volume) of the open bar, not in hist
+        self.rebins = 0
+        self._lock = threading.RLock()
+
+    # ---------- updates ----------
+    def _bin(self, price: float) -> int:
+        i = int((price - self.lo) / (self.hi - self.lo) * self.n)
+        return min(max(i, 0), self.n - 1)
+
+    def _grow_to(self, price: float) -> None:
+        while price < self.lo or price > self.hi:
+            span = self.hi - self.lo
+            pairs = self.hist.reshape(-1, 2).sum(axis=1)
+            self.hist = np.zeros(self.n)
+            if price < self.lo:
+                self.lo = self.hi - 2 * span
+                self.hist[self.n // 2:] = pairs
+            else:
+                self.hi = self.lo + 2 * span
+                self.hist[:self.n // 2] = pairs
+            self.rebins += 1
+
+    def add(self, price: float, volume: float, ts=None) -> None:
+        """Fold one closed bar (close price, volume) into the profile."""
+        if not np.isfinite(price) or not np.isfinite(volume):
+            return
+        with self._lock:
+            if self.lo is None:
+                pad = abs(price) * 0.01 or 1.0
+                self.lo, self.hi = price - pad, price + pad
+            self._grow_to(price)
+            if self.decay != 1.0:
+                self.hist *= self.decay
+            self.hist[self._bin(price)] += volume
+            if self.window:
+                self.recent.append((price, volume))
+                if len(self.recent) > self.window:
+                    old_p, old_v = self.recent.popleft()
+                    # Decay and windowing together: the expiring bar has aged `window` bars.
+                    j = self._bin(old_p)
+                    self.hist[j] = max(self.hist[j] - old_v * self.decay ** self.window, 0.0)
+            self.last_ts = ts
+
+    def set_forming(self, price: float, volume: float, ts=None) -> None:
+        """
+        Overlay the bar still forming, replacing the previous overlay.  A
+        bar at or before last_ts has already closed and clears it instead.
+        """
+        with self._lock:
+            if not np.isfinite(price) or not np.isfinite(volume) or \
+                    (ts is not None and self.last_ts is not None and ts <= self.last_ts):
+                self.forming = None
+                return
+            if self.lo is None:
+                pad = abs(price) * 0.01 or 1.0
+                self.lo, self.hi = price - pad, price + pad
+            self._grow_to(price)
+            self.forming = (price, volume)
+
+    def extend(self, close, volume, index=None) -> int:
+        """
+        add() every bar newer than the last one seen.  With an `index`
+        (timestamps), bars at or before last_ts are skipped, so the same
+        overlapping frame can be passed on every tick.  Every bar passed
+        must have closed; the open one goes to set_forming().
+        """
+        close = np.asarray(close, dtype=np.float64).reshape(-1)
+        volume = np.asarray(volume, dtype=np.float64).reshape(-1)
+        with self._lock:
+            start = 0
+            if index is not None and self.last_ts is not None:
+                start = int(pd.Index(index).searchsorted(self.last_ts, side="right"))
+            if start == 0 and self.lo is None and len(close):
+                # Seed the range from the whole batch so it never has to grow bar by bar.
+                lo, hi = np.nanmin(close), np.nanmax(close)
+                pad = (hi - lo) * 0.05 or abs(hi) * 0.01 or 1.0
+                self.lo, self.hi = lo - pad, hi + pad
+            for i in range(start, len(close)):
+                self.add(close[i], volume[i], None if index is None else index[i])
+        return len(close) - start
+
+    def _compact(self) -> bool:
+        """
+        Rebuild a windowed grid around the bars still inside the window.
+        Only needed once a trend has left most of the grid empty; returns
+        False, without touching the grid, when it already fits them.
+        """
+        prices = np.array([p for p, _ in self.recent] + ([self.forming[0]] if self.forming else []))
+        lo, hi = prices.min(), prices.max()
+        pad = (hi - lo) * 0.05 or abs(hi) * 0.01 or 1.0
+        lo, hi = lo - pad, hi + pad
+        if lo <= self.lo and hi >= self.hi:
+            return False
+        self.lo, self.hi = lo, hi
+        self.hist = np.zeros(self.n)
+        k = len(self.recent)
+        for age, (p, v) in enumerate(self.recent):
+            self.hist[self._bin(p)] += v * self.decay ** (k - 1 - age)
+        self.rebins += 1
+        return True
+
+    # ---------- queries ----------
+    def _hist_now(self) -> np.ndarray:
+        if self.forming is None:
+            return self.hist
+        hist = self.hist.copy()
+        hist[self._bin(self.forming[0])] += self.forming[1]
+        return hist
+
+    def _coarse(self, bins: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(volume per coarse bin, edges) over the occupied part of the grid, forming bar included."""
+        bins = bins or self.bins
+        hist = self._hist_now()
+        occupied = np.flatnonzero(hist > 1e-12 * max(hist.max(), 1e-300))
+        if occupied.size == 0:
+            return np.zeros(0), np.zeros(1)
+        first, last = occupied[0], occupied[-1] + 1
+        # At most one re-centre per query: volume piled into a few bins
+        # (a flat price, or volume on one bar only) stays narrow after it.
+        if self.window and last - first < self.n // 4 and self._compact():
+            hist = self._hist_now()
+            occupied = np.flatnonzero(hist > 1e-12 * max(hist.max(), 1e-300))
+            first, last = occupied[0], occupied[-1] + 1
+        g = max(1, round((last - first) / bins))
+        seg = hist[first:last]
+        seg = np.pad(seg, (0, -len(seg) % g))
+        step = (self.hi - self.lo) / self.n
+        vol = seg.reshape(-1, g).sum(axis=1)
+        edges = self.lo + (first + g * np.arange(len(vol) + 1)) * step
+        return vol, edges
+
+    def stats(self, bins: Optional[int] = None) -> dict:
+        """
+        {"poc", "hvn_band", "lvn"}: the centre of the heaviest bin, the
+        price span of bins at or above the HVN quantile, and the centres
+        of occupied-range bins at or below the LVN quantile.
+        """
+        with self._lock:
+            vol, edges = self._coarse(bins)
+        if vol.size == 0:
+            return {"poc": 0.0, "hvn_band": (0.0, 0.0), "lvn": []}
+        centres = (edges[:-1] + edges[1:]) / 2
+        heavy = np.flatnonzero(vol >= np.quantile(vol, self.hvn_quantile))
+        light = np.flatnonzero(vol <= np.quantile(vol, self.lvn_quantile))
+        return {
+            "poc": float(centres[vol.argmax()]),
+            "hvn_band": (float(edges[heavy[0]]), float(edges[heavy[-1] + 1])),
+            "lvn": [float(centres[i]) for i in light],
+        }
+
+
+class MultiResolutionProfile:
+    """
+    One VolumeProfile per lookback, fed from the same bars, so the zone
+    bias can be checked on several horizons without rebuilding anything.
+    """
+
+    def __init__(self, lookbacks=(50, 200, 1000), bins: int = 20, **kwargs):
+        self.profiles = {lb: VolumeProfile(bins, window=lb, **kwargs) for lb in lookbacks}
+
+    def extend(self, close, volume, index=None) -> None:
+        for prof in self.profiles.values():
+            prof.extend(close, volume, index)
+
+    def set_forming(self, price: float, volume: float, ts=None) -> None:
+        for prof in self.profiles.values():
+            prof.set_forming(price, volume, ts)
+
+    def views(self, bins: Optional[int] = None) -> Dict[int, dict]:
+        return {lb: prof.stats(bins) for lb, prof in self.profiles.items()}
+
+    def zone_bias(self, price: float, decision: str, buffer: float = 0.005) -> Dict[int, float]:
+        """
+        Supply/demand confidence adjustment per lookback, with the
+        whitepaper's rules: +0.10 / -0.05 for BUY and -0.10 / +0.05 for SELL.
+        """
+        out = {}
+        for lb, view in self.views().items():
+            demand_z, supply_z = view["hvn_band"]
+            near_demand = price <= demand_z * (1 + buffer)
+            near_supply = price >= supply_z * (1 - buffer)
+            if decision == "BUY":
+                out[lb] = 0.10 if near_demand else -0.05 if near_supply else 0.0
+            else:
+                out[lb] = -0.10 if near_supply else 0.05 if near_demand else 0.0
+        return out
+
+
+class VBPIndex:
+    """
+    Per-symbol profiles kept across ticks.  sync() folds in only the
+    closed bars of `ohlcv_df` that have not been seen before, overlays its
+    last row as the bar still forming, then answers from the profile; that
+    replaces a full calc_vbp() rebuild on every tick.
+    """
+
+    def __init__(self, bins: int = 20, **kwargs):
+        self.bins = bins
+        self.kwargs = kwargs
+        self.profiles: Dict[str, VolumeProfile] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, symbol: str, ohlcv_df: pd.DataFrame) -> dict:
+        with self._lock:
+            prof = self.profiles.get(symbol)
+            if prof is None:
+                # Window = the frame's closed bars; with the forming bar on
+                # top, the first answer covers the same bars calc_vbp() did.
+                kwargs = {"window": max(len(ohlcv_df) - 1, 1), **self.kwargs}
+                prof = self.profiles[symbol] = VolumeProfile(self.bins, **kwargs)
+        close = ohlcv_df["Close"].to_numpy(dtype=np.float64).reshape(-1)
+        volume = ohlcv_df["Volume"].to_numpy(dtype=np.float64).reshape(-1)
+        if len(close):
+            prof.extend(close[:-1], volume[:-1], ohlcv_df.index[:-1])
+            prof.set_forming(close[-1], volume[-1], ohlcv_df.index[-1])
+        return prof.stats()
+
+
+VBP_INDEX = VBPIndex()